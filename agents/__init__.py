@@ -1,9 +1,10 @@
 """Agents module."""
+import importlib
+
 from .base import AgentBase, AgentConfig, AgentResponse
 from .simple_agent import EchoAgent, CounterAgent, RouterAgent, CalculatorAgent
 from .llm_agent import LLMAgent, ToolUsingLLMAgent
 from .registry import AgentRegistry
-from . import chain
 
 __all__ = [
     "AgentBase",
@@ -18,3 +19,10 @@ __all__ = [
     "AgentRegistry",
     "chain",
 ]
+
+
+def __getattr__(name: str):
+    """Il sottopacchetto chain viene importato solo al primo accesso (agents.chain)."""
+    if name == "chain":
+        return importlib.import_module(f"{__name__}.chain")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -11,8 +11,9 @@ Questa classe definisce l'interfaccia comune che tutti gli agenti devono seguire
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Optional
 from datetime import datetime
+import asyncio
 import uuid
 
 from pydantic import BaseModel
@@ -57,6 +58,8 @@ class AgentBase(ABC):
         self.config = config
         self.storage = storage
         self._internal_state: dict[str, Any] = {}
+        # Se True, act() può eseguire le azioni indipendenti in parallelo
+        self.parallel_actions: bool = False
 
     @property
     def id(self) -> str:
@@ -96,21 +99,36 @@ class AgentBase(ABC):
 
     # ==================== METODI COMUNI ====================
 
-    @requires_permission(Permission.SEND_MESSAGES)
-    async def receive_message(
+    async def _run_actions(
         self,
-        ctx: CallerContext,
-        content: str,
-        sender_id: str,
-        conversation_id: Optional[str] = None
-    ) -> AgentResponse:
+        actions: list[dict],
+        run_action: Callable[[dict], Awaitable[Optional[dict]]]
+    ) -> list[dict]:
         """
-        Riceve un messaggio e genera una risposta.
+        Esegue run_action su ogni azione e raccoglie i risultati non nulli.
 
-        Questo è il punto di ingresso principale per interagire con l'agente.
+        Con parallel_actions attivo e più di un'azione, le azioni girano
+        concorrentemente in un TaskGroup; i risultati mantengono comunque
+        l'ordine originale delle azioni.
         """
-        # Crea il messaggio
-        message = Message(
+        if self.parallel_actions and len(actions) > 1:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(run_action(action)) for action in actions]
+            outcomes = [task.result() for task in tasks]
+        else:
+            outcomes = [await run_action(action) for action in actions]
+
+        return [outcome for outcome in outcomes if outcome is not None]
+
+    def _incoming_message(
+        self,
+        ctx: CallerContext,
+        content: str,
+        sender_id: str,
+        conversation_id: Optional[str]
+    ) -> Message:
+        """Crea il messaggio in arrivo (dati interni: model_construct salta la validazione)."""
+        return Message.model_construct(
             id=str(uuid.uuid4())[:8],
             sender=sender_id,
             receiver=self.id,
@@ -118,11 +136,43 @@ class AgentBase(ABC):
             timestamp=datetime.now(),
             metadata={
                 "conversation_id": conversation_id or "default",
-                "caller_context": ctx.model_dump()
+                "caller_context": ctx.to_dict()
             }
         )
 
+    async def _save_reply(
+        self,
+        content: str,
+        receiver_id: str,
+        conversation_id: Optional[str]
+    ) -> Message:
+        """Salva la risposta dell'agente nella conversazione."""
+        reply = Message.model_construct(
+            id=str(uuid.uuid4())[:8],
+            sender=self.id,
+            receiver=receiver_id,
+            content=content,
+            timestamp=datetime.now(),
+            metadata={"conversation_id": conversation_id or "default"}
+        )
+        await self.storage.save_message(reply)
+        return reply
+
+    @requires_permission(Permission.SEND_MESSAGES)
+    async def receive_message(
+        self,
+        ctx: CallerContext,
+        content: str,
+        sender_id: str,
+        conversation_id: Optional[str] = None
+    ) -> AgentResponse:
+        """
+        Riceve un messaggio e genera una risposta.
+
+        Questo è il punto di ingresso principale per interagire con l'agente.
+        """
         # Salva il messaggio in arrivo
+        message = self._incoming_message(ctx, content, sender_id, conversation_id)
         await self.storage.save_message(message)
 
         # Elabora il messaggio
@@ -138,16 +188,7 @@ class AgentBase(ABC):
 
         # Crea e salva la risposta
         response_content = thought.get("response", "")
-
-        response_message = Message(
-            id=str(uuid.uuid4())[:8],
-            sender=self.id,
-            receiver=sender_id,
-            content=response_content,
-            timestamp=datetime.now(),
-            metadata={"conversation_id": conversation_id or "default"}
-        )
-        await self.storage.save_message(response_message)
+        response_message = await self._save_reply(response_content, sender_id, conversation_id)
 
         return AgentResponse(
             content=response_content,
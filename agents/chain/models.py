@@ -8,7 +8,7 @@ from typing import Literal, Optional
 from datetime import datetime
 import uuid
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 
 
 class TokenUsage(BaseModel):
@@ -57,22 +57,19 @@ class PipelineResult(BaseModel):
     error: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.now)
 
+    # Computed fields are serialized by both model_dump() and model_dump_json()
+
+    @computed_field
     @property
     def total_input_tokens(self) -> int:
         return sum(s.tokens.input_tokens for s in self.steps)
 
+    @computed_field
     @property
     def total_output_tokens(self) -> int:
         return sum(s.tokens.output_tokens for s in self.steps)
 
+    @computed_field
     @property
     def total_tokens(self) -> int:
         return self.total_input_tokens + self.total_output_tokens
-
-    def model_dump(self, **kwargs) -> dict:
-        """Override to include computed properties."""
-        data = super().model_dump(**kwargs)
-        data["total_input_tokens"] = self.total_input_tokens
-        data["total_output_tokens"] = self.total_output_tokens
-        data["total_tokens"] = self.total_tokens
-        return data
@@ -5,8 +5,8 @@ Wraps graph execution and emits events for real-time visualization.
 """
 
 import asyncio
+import secrets
 import time
-import uuid
 from datetime import datetime
 from typing import Any, AsyncIterator, Callable, Optional
 
@@ -58,7 +58,7 @@ class GraphRunner:
 
     def _generate_task_id(self) -> str:
         """Generate a unique task ID."""
-        return uuid.uuid4().hex[:8]
+        return secrets.token_hex(4)
 
     async def run(
         self,
@@ -75,7 +75,7 @@ class GraphRunner:
             event_handler: Optional callback for events
 
         Returns:
-            Final GraphState after execution
+            Final GraphState after execution, plus duration_ms when completed
         """
         if task_id is None:
             task_id = self._generate_task_id()
@@ -120,9 +120,11 @@ class GraphRunner:
 
             result = await self.graph.ainvoke(initial_state, config=config)
 
-            # Update status
-            result["status"] = "completed"
+            # Update status (duration in the result too: callers need no
+            # second lookup in the task table)
             total_duration_ms = int((time.time() - start_time) * 1000)
+            result["status"] = "completed"
+            result["duration_ms"] = total_duration_ms
 
             self._tasks[task_id]["status"] = "completed"
             self._tasks[task_id]["completed_at"] = datetime.now().isoformat()
@@ -10,10 +10,11 @@ Configurazione via variabili d'ambiente:
 - LITELLM_API_BASE: per proxy custom
 """
 
-from typing import Any
+from typing import Any, AsyncIterator, Optional
 import asyncio
 
 from storage.base import StorageBase, Message
+from auth.permissions import CallerContext, Permission, requires_permission
 from .base import AgentBase, AgentConfig
 
 
@@ -34,7 +35,8 @@ class LLMAgent(AgentBase):
         agent_id: str,
         storage: StorageBase,
         system_prompt: str = "Sei un assistente utile.",
-        model: str = "claude-sonnet-4-5"
+        model: str = "claude-sonnet-4-5",
+        cache_system_prompt: bool = False
     ):
         config = AgentConfig(
             id=agent_id,
@@ -46,25 +48,131 @@ class LLMAgent(AgentBase):
 
         self.system_prompt = system_prompt
         self.model = model
+        # Se True, il system prompt viene marcato come cacheable (prompt caching Anthropic)
+        self.cache_system_prompt = cache_system_prompt
 
-    async def think(self, message: Message) -> dict[str, Any]:
-        """Usa LiteLLM per elaborare il messaggio."""
+    def _system_message(self) -> dict[str, Any]:
+        """
+        Costruisce il messaggio di sistema.
+
+        Con cache_system_prompt il contenuto diventa un blocco con
+        cache_control, che LiteLLM inoltra ad Anthropic: il prefisso statico
+        viene letto dalla cache invece di essere rielaborato ad ogni chiamata.
+        """
+        if not self.cache_system_prompt:
+            return {"role": "system", "content": self.system_prompt}
+
+        return {
+            "role": "system",
+            "content": [{
+                "type": "text",
+                "text": self.system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        }
+
+    def _usage_metadata(self, usage: Any) -> dict[str, int]:
+        """Estrae il consumo di token dalla risposta LiteLLM."""
+        metadata = {
+            "input_tokens": usage.prompt_tokens if usage else 0,
+            "output_tokens": usage.completion_tokens if usage else 0
+        }
+        if self.cache_system_prompt:
+            cached = getattr(usage, "cache_read_input_tokens", 0) if usage else 0
+            metadata["cache_read_input_tokens"] = cached or 0
+        return metadata
+
+    async def _build_messages(self, message: Message) -> list[dict[str, Any]]:
+        """Costruisce i messaggi in formato OpenAI (usato da LiteLLM) dalla cronologia."""
+        conversation_id = message.metadata.get("conversation_id", "default")
+        history = await self.storage.get_messages(conversation_id)
+
+        messages = [self._system_message()]
+
+        for msg in history[-10:]:  # Ultimi 10 messaggi per contesto
+            role = "user" if msg.sender != self.id else "assistant"
+            messages.append({"role": role, "content": msg.content})
+
+        # Aggiungi il messaggio corrente
+        messages.append({"role": "user", "content": message.content})
+        return messages
+
+    async def stream(
+        self,
+        message: Message,
+        usage: Optional[dict[str, int]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Come think(), ma restituisce il testo man mano che il modello lo genera.
+
+        Il chiamante può mostrare i primi token senza attendere la risposta
+        completa. Se viene passato un dict `usage`, a fine stream viene
+        riempito con il consumo di token (stesso formato di metadata["usage"]).
+        """
         try:
             import litellm
 
-            # Costruisci il contesto dalla cronologia
-            conversation_id = message.metadata.get("conversation_id", "default")
-            history = await self.storage.get_messages(conversation_id)
+            messages = await self._build_messages(message)
 
-            # Costruisci messaggi in formato OpenAI (usato da LiteLLM)
-            messages = [{"role": "system", "content": self.system_prompt}]
+            response = await litellm.acompletion(
+                model=self.model,
+                messages=messages,
+                max_tokens=1024,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            async for chunk in response:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+                chunk_usage = getattr(chunk, "usage", None)
+                if chunk_usage and usage is not None:
+                    usage.update(self._usage_metadata(chunk_usage))
+
+        except ImportError:
+            yield "Errore: litellm non installato. Esegui: pip install litellm"
+        except Exception as e:
+            yield f"Errore nell'elaborazione: {str(e)}"
 
-            for msg in history[-10:]:  # Ultimi 10 messaggi per contesto
-                role = "user" if msg.sender != self.id else "assistant"
-                messages.append({"role": role, "content": msg.content})
+    @requires_permission(Permission.SEND_MESSAGES)
+    async def receive_message_stream(
+        self,
+        ctx: CallerContext,
+        content: str,
+        sender_id: str,
+        conversation_id: Optional[str] = None,
+        usage: Optional[dict[str, int]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Come receive_message(), ma restituisce la risposta man mano.
 
-            # Aggiungi il messaggio corrente
-            messages.append({"role": "user", "content": message.content})
+        Stesso controllo dei permessi e stessi messaggi salvati: la risposta
+        completa viene salvata a fine stream. `usage` come in stream().
+        """
+        message = self._incoming_message(ctx, content, sender_id, conversation_id)
+        await self.storage.save_message(message)
+
+        if usage is None:
+            usage = {}
+        parts = []
+        async for delta in self.stream(message, usage=usage):
+            parts.append(delta)
+            yield delta
+
+        await self._update_state({
+            "last_model": self.model,
+            "last_tokens": usage.get("output_tokens", 0)
+        })
+        await self._save_reply("".join(parts), sender_id, conversation_id)
+
+    async def think(self, message: Message) -> dict[str, Any]:
+        """Usa LiteLLM per elaborare il messaggio."""
+        try:
+            import litellm
+
+            messages = await self._build_messages(message)
 
             # Chiama LLM via LiteLLM
             response = await litellm.acompletion(
@@ -85,10 +193,7 @@ class LLMAgent(AgentBase):
                 },
                 "metadata": {
                     "model": self.model,
-                    "usage": {
-                        "input_tokens": usage.prompt_tokens if usage else 0,
-                        "output_tokens": usage.completion_tokens if usage else 0
-                    }
+                    "usage": self._usage_metadata(usage)
                 }
             }
 
@@ -134,6 +239,7 @@ class ToolUsingLLMAgent(LLMAgent):
     ):
         super().__init__(agent_id, storage, system_prompt, model)
         self._tools: dict[str, dict] = {}  # name -> {schema, handler}
+        self._tool_schemas: Optional[list[dict]] = None  # Cache, invalidata da add_tool
         self.max_tool_rounds = max_tool_rounds
 
     def add_tool(
@@ -163,10 +269,13 @@ class ToolUsingLLMAgent(LLMAgent):
             },
             "handler": handler
         }
+        self._tool_schemas = None
 
     def _get_tool_schemas(self) -> list[dict]:
-        """Ritorna gli schemas dei tools per LiteLLM."""
-        return [t["schema"] for t in self._tools.values()]
+        """Ritorna gli schemas dei tools per LiteLLM (costruiti una volta, riusati ad ogni round)."""
+        if self._tool_schemas is None:
+            self._tool_schemas = [t["schema"] for t in self._tools.values()]
+        return self._tool_schemas
 
     async def _execute_tool(self, name: str, input_data: dict) -> str:
         """Esegue un tool e ritorna il risultato."""
@@ -192,17 +301,7 @@ class ToolUsingLLMAgent(LLMAgent):
             import litellm
 
             # Costruisci contesto
-            conversation_id = message.metadata.get("conversation_id", "default")
-            history = await self.storage.get_messages(conversation_id)
-
-            # Costruisci messaggi
-            messages = [{"role": "system", "content": self.system_prompt}]
-
-            for msg in history[-10:]:
-                role = "user" if msg.sender != self.id else "assistant"
-                messages.append({"role": role, "content": msg.content})
-
-            messages.append({"role": "user", "content": message.content})
+            messages = await self._build_messages(message)
 
             # Tool use loop
             tool_calls_log = []
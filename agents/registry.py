@@ -40,6 +40,12 @@ class AgentRegistry:
 
     def __init__(self):
         self._agents: dict[str, AgentBase] = {}
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every change, for caches derived from the registry."""
+        return self._version
 
     def register(self, agent: AgentBase, replace: bool = False) -> None:
         """
@@ -59,6 +65,7 @@ class AgentRegistry:
             )
 
         self._agents[agent.id] = agent
+        self._version += 1
 
     def unregister(self, agent_id: str) -> Optional[AgentBase]:
         """
@@ -70,7 +77,10 @@ class AgentRegistry:
         Returns:
             The removed agent, or None if not found
         """
-        return self._agents.pop(agent_id, None)
+        agent = self._agents.pop(agent_id, None)
+        if agent is not None:
+            self._version += 1
+        return agent
 
     def get(self, agent_id: str) -> Optional[AgentBase]:
         """
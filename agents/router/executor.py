@@ -4,6 +4,7 @@ TaskExecutor - Executes tasks on matched agents.
 Handles running subtasks on appropriate agents from the registry.
 """
 
+import asyncio
 import time
 from typing import Optional, Callable
 from datetime import datetime
@@ -154,6 +155,10 @@ class TaskExecutor:
         """
         Execute all subtasks on matched agents.
 
+        Subtasks are independent, so they run concurrently: wall time is
+        the slowest agent rather than the sum of all of them. Results keep
+        the order of matches.
+
         Args:
             matches: List of capability matches with agent IDs
             subtasks: Dict mapping capability -> subtask description
@@ -162,7 +167,7 @@ class TaskExecutor:
         Returns:
             List of ExecutionResults
         """
-        results = []
+        tasks = []
 
         for match in matches:
             if not match.matched or not match.agent_ids:
@@ -179,12 +184,12 @@ class TaskExecutor:
             agent = self.registry.get(agent_id)
 
             if agent:
-                result = await self.execute_on_agent(
+                tasks.append(self.execute_on_agent(
                     agent=agent,
                     capability=capability,
                     subtask=subtask,
                     task_id=task_id
-                )
-                results.append(result)
+                ))
 
-        return results
+        # execute_on_agent never raises: failures come back as ExecutionResult
+        return list(await asyncio.gather(*tasks))
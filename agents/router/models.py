@@ -11,12 +11,12 @@ Defines:
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
-import uuid
+import secrets
 
 
 def generate_task_id() -> str:
     """Generate a short unique task ID."""
-    return uuid.uuid4().hex[:8]
+    return secrets.token_hex(4)
 
 
 class TaskInput(BaseModel):
@@ -80,8 +80,12 @@ class RouterResult(BaseModel):
     @property
     def total_tokens(self) -> dict:
         """Sum of all token usage including synthesis."""
-        total_input = sum(e.tokens.get("input", 0) for e in self.executions)
-        total_output = sum(e.tokens.get("output", 0) for e in self.executions)
+        total_input = 0
+        total_output = 0
+        for e in self.executions:
+            tokens = e.tokens
+            total_input += tokens.get("input", 0)
+            total_output += tokens.get("output", 0)
         # Add synthesis tokens if present
         if self.synthesis:
             total_input += self.synthesis.tokens.get("input", 0)
@@ -5,9 +5,13 @@ Phase 2 of Two-Phase Execution: receives all parallel execution results
 and integrates them into a unified, coherent answer.
 """
 
+import asyncio
+import io
+import json
 import time
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
+from xml.sax.saxutils import escape, quoteattr
 
 from storage.base import StorageBase, Message
 from agents.llm_agent import LLMAgent
@@ -15,6 +19,11 @@ from agents.base import AgentConfig
 from .models import ExecutionResult
 
 
+# Jobs per batched LLM call: beyond this the combined prompt/answer grows
+# enough that latency outweighs the saved per-request overhead
+DEFAULT_BATCH_SIZE = 8
+
+
 class SynthesizerAgent(LLMAgent):
     """
     Synthesizes multiple agent outputs into a coherent response.
@@ -44,8 +53,16 @@ Formato risposta:
 - Dettagli integrati (informazioni complementari)
 - Fonti utilizzate (quali agenti hanno contribuito)
 
-Scrivi in modo chiaro e strutturato.""",
-            model=model
+Scrivi in modo chiaro e strutturato.
+
+Struttura dell'input:
+<task>task originale dell'utente</task>
+<result agent="nome agente" capability="capability">output dell'agente</result>
+(un blocco <result> per ogni agente che ha contribuito)
+
+Sintetizza questi risultati in una risposta coerente e completa.""",
+            model=model,
+            cache_system_prompt=True
         )
         self.config = AgentConfig(
             id=self.id,
@@ -54,6 +71,150 @@ Scrivi in modo chiaro e strutturato.""",
             capabilities=["synthesis", "integration"]
         )
 
+    @staticmethod
+    def _build_prompt(original_task: str, successful: list[ExecutionResult]) -> str:
+        """
+        Build the synthesis prompt from the successful executions.
+
+        Instructions and the input schema live in the cached system prompt;
+        the message only fills the <task>/<result> slots with per-call data.
+        Pieces are written straight into one buffer instead of formatting an
+        intermediate string per execution and joining them afterwards.
+        Per-call text is XML-escaped, so a quote, "<" or "&" in a task,
+        agent name or output cannot break the tag structure.
+        """
+        buf = io.StringIO()
+        write = buf.write
+
+        write("<task>")
+        write(escape(original_task))
+        write("</task>\n")
+
+        for exec_result in successful:
+            write("<result agent=")
+            write(quoteattr(exec_result.agent_name))
+            write(" capability=")
+            write(quoteattr(exec_result.capability))
+            write(">\n")
+            write(escape(exec_result.output_text))
+            write("\n</result>\n")
+
+        return buf.getvalue()
+
+    def _synthesis_message(
+        self,
+        original_task: str,
+        successful: list[ExecutionResult],
+        task_id: str
+    ) -> Message:
+        """Wrap the synthesis prompt in a message for the LLM."""
+        return Message(
+            id=f"synthesize-{task_id}",
+            sender="router",
+            receiver=self.id,
+            content=self._build_prompt(original_task, successful),
+            timestamp=datetime.now(),
+            metadata={"task_id": task_id}
+        )
+
+    def _batch_message(
+        self,
+        jobs: list[tuple[str, list[ExecutionResult], str]]
+    ) -> Message:
+        """
+        Pack several synthesis jobs into one message.
+
+        Each job keeps the usual <task>/<result> layout under a ---JOB i---
+        delimiter; the model is asked for a JSON array with one synthesis
+        per job, in order.
+        """
+        buf = io.StringIO()
+        write = buf.write
+
+        write(
+            f"Ci sono {len(jobs)} task indipendenti. Sintetizza ciascuno separatamente.\n"
+            f"Rispondi SOLO con un array JSON di {len(jobs)} stringhe, "
+            "una sintesi per job, nello stesso ordine.\n\n"
+        )
+        for index, (original_task, successful, _) in enumerate(jobs):
+            write(f"---JOB {index}---\n")
+            write(self._build_prompt(original_task, successful))
+
+        return Message(
+            id=f"synthesize-batch-{jobs[0][2]}",
+            sender="router",
+            receiver=self.id,
+            content=buf.getvalue(),
+            timestamp=datetime.now(),
+            metadata={"task_ids": [task_id for _, _, task_id in jobs]}
+        )
+
+    @staticmethod
+    def _parse_batch_response(text: str, expected: int) -> Optional[list[str]]:
+        """Parse the JSON array answer of a batch call (None if malformed)."""
+        start, end = text.find("["), text.rfind("]")
+        if start == -1 or end < start:
+            return None
+        try:
+            outputs = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+        if (
+            not isinstance(outputs, list)
+            or len(outputs) != expected
+            or not all(isinstance(o, str) for o in outputs)
+        ):
+            return None
+        return outputs
+
+    @staticmethod
+    def _split_usage(usage: dict, parts: int) -> list[dict]:
+        """Spread the usage of one batch call across its jobs (totals are preserved)."""
+        shares = [{} for _ in range(parts)]
+        for key, value in usage.items():
+            base, remainder = divmod(value, parts)
+            for index, share in enumerate(shares):
+                share[key] = base + (1 if index < remainder else 0)
+        return shares
+
+    @staticmethod
+    def _split_successful(
+        executions: list[ExecutionResult]
+    ) -> tuple[list[ExecutionResult], list[str]]:
+        """Collect successful executions and their agent IDs in a single pass."""
+        successful = []
+        sources = []
+        for exec_result in executions:
+            if exec_result.success:
+                successful.append(exec_result)
+                sources.append(exec_result.agent_id)
+        return successful, sources
+
+    @staticmethod
+    def _synthesis_result(
+        output: str,
+        sources: list[str],
+        start_time: float,
+        usage: Optional[dict] = None
+    ) -> dict:
+        """Build the dict returned by synthesize()."""
+        usage = usage or {}
+        return {
+            "synthesized_output": output,
+            "duration_ms": int((time.time() - start_time) * 1000),
+            "sources": sources,
+            "tokens": {
+                "input": usage.get("input_tokens", 0),
+                "output": usage.get("output_tokens", 0),
+                "cache_read": usage.get("cache_read_input_tokens", 0)
+            }
+        }
+
+    @staticmethod
+    def _passthrough_output(successful: list[ExecutionResult]) -> str:
+        """Output used when there is nothing to merge (zero or one success)."""
+        return successful[0].output_text if successful else "All executions failed."
+
     async def synthesize(
         self,
         original_task: str,
@@ -73,38 +234,158 @@ Scrivi in modo chiaro e strutturato.""",
         """
         start_time = time.time()
 
-        # Build context from all executions
-        context_parts = [f"**Task originale**: {original_task}\n"]
-        context_parts.append("**Risultati degli agenti:**\n")
-
-        for exec_result in executions:
-            if exec_result.success:
-                context_parts.append(
-                    f"\n### {exec_result.agent_name} ({exec_result.capability}):\n"
-                    f"{exec_result.output_text}\n"
-                )
-
-        synthesis_prompt = "\n".join(context_parts)
-        synthesis_prompt += "\n---\nSintetizza questi risultati in una risposta coerente e completa."
+        # Nothing to merge with zero or one successful result: skip the LLM
+        successful, sources = self._split_successful(executions)
+        if len(successful) <= 1:
+            return self._synthesis_result(
+                self._passthrough_output(successful), sources, start_time
+            )
 
         # Call LLM for synthesis
-        message = Message(
-            id=f"synthesize-{task_id}",
-            sender="router",
-            receiver=self.id,
-            content=synthesis_prompt,
-            timestamp=datetime.now(),
-            metadata={"task_id": task_id}
+        message = self._synthesis_message(original_task, successful, task_id)
+        result = await self.think(message)
+
+        return self._synthesis_result(
+            result.get("response", ""),
+            sources,
+            start_time,
+            result.get("metadata", {}).get("usage", {})
         )
 
-        result = await self.think(message)
-        response_text = result.get("response", "")
+    async def synthesize_stream(
+        self,
+        original_task: str,
+        executions: list[ExecutionResult],
+        task_id: str
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of synthesize().
 
-        duration_ms = int((time.time() - start_time) * 1000)
+        Yields synthesis_delta events with text chunks as the model produces
+        them, so callers can forward output before generation ends, then a
+        single synthesis_completed event whose data is the synthesize() dict.
 
-        return {
-            "synthesized_output": response_text,
-            "duration_ms": duration_ms,
-            "sources": [e.agent_id for e in executions if e.success],
-            "tokens": result.get("tokens", {"input": 0, "output": 0})
+        Args:
+            original_task: The original user task
+            executions: Results from parallel agent executions
+            task_id: Task identifier
+
+        Yields:
+            Event dicts with "event" and "data" keys
+        """
+        start_time = time.time()
+
+        successful, sources = self._split_successful(executions)
+        if len(successful) <= 1:
+            output = self._passthrough_output(successful)
+            yield {"event": "synthesis_delta", "data": {"text": output}}
+            yield {
+                "event": "synthesis_completed",
+                "data": self._synthesis_result(output, sources, start_time)
+            }
+            return
+
+        message = self._synthesis_message(original_task, successful, task_id)
+        usage: dict = {}
+        chunks = []
+
+        async for text in self.stream(message, usage=usage):
+            chunks.append(text)
+            yield {"event": "synthesis_delta", "data": {"text": text}}
+
+        yield {
+            "event": "synthesis_completed",
+            "data": self._synthesis_result("".join(chunks), sources, start_time, usage)
         }
+
+    async def synthesize_many(
+        self,
+        requests: list[tuple[str, list[ExecutionResult], str]]
+    ) -> list[dict]:
+        """
+        Synthesize several independent tasks concurrently.
+
+        Args:
+            requests: List of (original_task, executions, task_id) tuples
+
+        Returns:
+            List of synthesis dicts, in the same order as requests
+        """
+        return list(await asyncio.gather(
+            *(self.synthesize(task, executions, task_id) for task, executions, task_id in requests)
+        ))
+
+    async def _synthesize_batch_chunk(
+        self,
+        jobs: list[tuple[str, list[ExecutionResult], str]],
+        sources: list[list[str]],
+        start_time: float
+    ) -> list[dict]:
+        """One LLM call for a chunk of jobs; falls back to per-job calls on a bad answer."""
+        result = await self.think(self._batch_message(jobs))
+        outputs = self._parse_batch_response(result.get("response") or "", len(jobs))
+
+        if outputs is None:
+            return list(await asyncio.gather(
+                *(self.synthesize(task, successful, task_id) for task, successful, task_id in jobs)
+            ))
+
+        usages = self._split_usage(result.get("metadata", {}).get("usage", {}), len(jobs))
+        return [
+            self._synthesis_result(output, job_sources, start_time, usage)
+            for output, job_sources, usage in zip(outputs, sources, usages)
+        ]
+
+    async def synthesize_batch(
+        self,
+        requests: list[tuple[str, list[ExecutionResult], str]],
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> list[dict]:
+        """
+        Synthesize many tasks with one LLM request per batch of jobs.
+
+        Unlike synthesize_many(), which issues one request per task, jobs are
+        packed batch_size at a time into a single prompt and the model answers
+        with a JSON array, amortizing per-request overhead and rate limits.
+        Jobs with at most one successful execution never reach the LLM. If a
+        batch answer cannot be parsed, that batch falls back to synthesize().
+        Use synthesize() when latency of a single task matters.
+
+        Args:
+            requests: List of (original_task, executions, task_id) tuples
+            batch_size: Maximum number of jobs per LLM request
+
+        Returns:
+            List of synthesis dicts, in the same order as requests
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        start_time = time.time()
+        results: list[Optional[dict]] = [None] * len(requests)
+        pending: list[tuple[int, tuple[str, list[ExecutionResult], str], list[str]]] = []
+
+        for index, (original_task, executions, task_id) in enumerate(requests):
+            successful, sources = self._split_successful(executions)
+            if len(successful) <= 1:
+                results[index] = self._synthesis_result(
+                    self._passthrough_output(successful), sources, start_time
+                )
+            else:
+                pending.append((index, (original_task, successful, task_id), sources))
+
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        chunk_results = await asyncio.gather(*(
+            self._synthesize_batch_chunk(
+                [job for _, job, _ in chunk],
+                [sources for _, _, sources in chunk],
+                start_time
+            )
+            for chunk in chunks
+        ))
+
+        for chunk, synthesized in zip(chunks, chunk_results):
+            for (index, _, _), result in zip(chunk, synthesized):
+                results[index] = result
+
+        return results
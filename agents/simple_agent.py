@@ -9,11 +9,49 @@ Utile per:
 - Prototipazione rapida
 """
 
-from typing import Any
+from datetime import datetime
+from typing import Any, Optional
+import operator
 import re
 
 from storage.base import StorageBase, Message
-from .base import AgentBase, AgentConfig
+from .base import AgentBase, AgentConfig, AgentResponse
+
+try:
+    import ahocorasick  # Opzionale: matching multi-keyword in un solo passaggio
+except ImportError:
+    ahocorasick = None
+
+
+# Con poche route il loop di substring è già più veloce dell'automa
+_AC_MIN_ROUTES = 4
+
+
+def _fold(text: str) -> str:
+    """
+    Normalizza maiuscole/minuscole per il confronto delle keyword.
+
+    casefold() gestisce anche i caratteri non ASCII (es. 'ß' -> 'ss');
+    per il testo ASCII (isascii() è O(1)) lower() dà lo stesso risultato.
+    """
+    return text.lower() if text.isascii() else text.casefold()
+
+
+# Pattern per operazioni: "5 + 3", "10 * 2", etc. (compilato una sola volta)
+_CALC_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([+\-*/])\s*(\d+(?:\.\d+)?)')
+
+# Dispatch degli operatori: funzioni C del modulo operator, niente lambda per chiamata
+_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+
+def _parse_number(text: str) -> int | float:
+    """Interi restano int (aritmetica esatta, niente '8.0'); solo i decimali diventano float."""
+    return float(text) if "." in text else int(text)
 
 
 class EchoAgent(AgentBase):
@@ -96,29 +134,65 @@ class RouterAgent(AgentBase):
         )
         super().__init__(config, storage)
         self.routes: dict[str, AgentBase] = routes or {}
+        # Automa Aho-Corasick sulle keyword, costruito lazy alla prima think()
+        self._automaton = None
 
     def add_route(self, keyword: str, agent: AgentBase) -> None:
         """Aggiunge una regola di routing."""
-        self.routes[keyword.lower()] = agent
+        self.routes[_fold(keyword)] = agent
+        self._automaton = None  # Va ricostruito con la nuova keyword
         print(f"[Router {self.id}] Aggiunta route: '{keyword}' -> {agent.id}")
 
+    def _build_automaton(self):
+        """Costruisce l'automa con (ordine di inserimento, keyword) come valore."""
+        automaton = ahocorasick.Automaton()
+        for rank, keyword in enumerate(self.routes):
+            automaton.add_word(keyword, (rank, keyword))
+        automaton.make_automaton()
+        return automaton
+
+    def _match_route(self, content_folded: str) -> Optional[str]:
+        """
+        Trova la keyword della prima route (in ordine di inserimento) presente nel testo.
+
+        Con pyahocorasick installato e abbastanza route, un solo passaggio
+        sul testo trova tutte le keyword; altrimenti si usa il loop semplice.
+        """
+        if ahocorasick is None or len(self.routes) < _AC_MIN_ROUTES:
+            for keyword in self.routes:
+                if keyword in content_folded:
+                    return keyword
+            return None
+
+        if self._automaton is None:
+            self._automaton = self._build_automaton()
+
+        best = None
+        for _, (rank, keyword) in self._automaton.iter(content_folded):
+            if best is None or rank < best[0]:
+                best = (rank, keyword)
+                if rank == 0:
+                    break
+
+        return best[1] if best else None
+
     async def think(self, message: Message) -> dict[str, Any]:
         """Decide a chi inoltrare il messaggio."""
-        content_lower = message.content.lower()
+        content_folded = _fold(message.content)
 
         # Cerca una route che matcha
-        for keyword, agent in self.routes.items():
-            if keyword in content_lower:
-                return {
-                    "response": "",  # La risposta verrà dall'agente target
-                    "actions": [{
-                        "type": "forward",
-                        "target_agent": agent,
-                        "message": message.content,
-                        "original_sender": message.sender
-                    }],
-                    "state_updates": {"last_route": keyword}
-                }
+        keyword = self._match_route(content_folded)
+        if keyword is not None:
+            return {
+                "response": "",  # La risposta verrà dall'agente target
+                "actions": [{
+                    "type": "forward",
+                    "target_agent": self.routes[keyword],
+                    "message": message.content,
+                    "original_sender": message.sender
+                }],
+                "state_updates": {"last_route": keyword}
+            }
 
         # Nessuna route trovata
         available = list(self.routes.keys())
@@ -169,9 +243,7 @@ class CalculatorAgent(AgentBase):
         """Cerca operazioni matematiche nel messaggio."""
         content = message.content
 
-        # Pattern per operazioni: "5 + 3", "10 * 2", etc.
-        pattern = r'(\d+(?:\.\d+)?)\s*([+\-*/])\s*(\d+(?:\.\d+)?)'
-        match = re.search(pattern, content)
+        match = _CALC_RE.search(content)
 
         if not match:
             return {
@@ -182,7 +254,7 @@ class CalculatorAgent(AgentBase):
             }
 
         num1, op, num2 = match.groups()
-        num1, num2 = float(num1), float(num2)
+        num1, num2 = _parse_number(num1), _parse_number(num2)
 
         return {
             "response": "",  # Calcolato in act()
@@ -197,42 +269,36 @@ class CalculatorAgent(AgentBase):
         }
 
     async def act(self, actions: list[dict]) -> list[dict]:
-        results = []
-
-        for action in actions:
-            if action["type"] == "calculate":
-                num1 = action["num1"]
-                num2 = action["num2"]
-                op = action["operator"]
+        return await self._run_actions(actions, self._run_action)
 
-                ops = {
-                    "+": lambda a, b: a + b,
-                    "-": lambda a, b: a - b,
-                    "*": lambda a, b: a * b,
-                    "/": lambda a, b: a / b if b != 0 else "Errore: divisione per zero"
-                }
+    async def _run_action(self, action: dict) -> Optional[dict]:
+        """Esegue una singola azione di calcolo (None per azioni sconosciute)."""
+        if action["type"] != "calculate":
+            return None
 
-                result = ops[op](num1, num2)
+        num1 = action["num1"]
+        num2 = action["num2"]
+        op = action["operator"]
 
-                # Aggiorna la risposta
-                results.append({
-                    "type": "calculation_result",
-                    "expression": f"{num1} {op} {num2}",
-                    "result": result
-                })
+        if op == "/" and num2 == 0:
+            result = "Errore: divisione per zero"
+        else:
+            result = _OPS[op](num1, num2)
 
-        return results
+        return {
+            "type": "calculation_result",
+            "expression": f"{num1} {op} {num2}",
+            "result": result
+        }
 
     async def receive_message(self, ctx, content, sender_id, conversation_id=None):
         """Override per gestire il risultato del calcolo."""
-        from auth.permissions import CallerContext
-
         message = Message(
             id="temp",
             sender=sender_id,
             receiver=self.id,
             content=content,
-            timestamp=__import__('datetime').datetime.now(),
+            timestamp=datetime.now(),
             metadata={}
         )
 
@@ -244,11 +310,9 @@ class CalculatorAgent(AgentBase):
                 calc_result = results[0]
                 thought["response"] = f"{calc_result['expression']} = {calc_result['result']}"
 
-        # Chiama il metodo base per il resto
-        from .base import AgentResponse
         return AgentResponse(
             content=thought["response"],
             agent_id=self.id,
-            timestamp=__import__('datetime').datetime.now(),
+            timestamp=datetime.now(),
             metadata=thought.get("metadata", {})
         )
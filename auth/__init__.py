@@ -10,6 +10,8 @@ from .permissions import (
     agent_context,
     guest_context,
     ROLE_PERMISSIONS,
+    CALLER_ROLES,
+    DEFAULT_CALLER_ROLE,
 )
 
 __all__ = [
@@ -23,4 +25,6 @@ __all__ = [
     "agent_context",
     "guest_context",
     "ROLE_PERMISSIONS",
+    "CALLER_ROLES",
+    "DEFAULT_CALLER_ROLE",
 ]
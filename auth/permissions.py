@@ -9,10 +9,17 @@ CONCETTO CHIAVE: Quando qualcuno chiama un agente, dobbiamo sapere:
 Questo modulo implementa un sistema semplice ma estendibile.
 """
 
+import inspect
+import logging
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Callable, Any
+from types import MappingProxyType
+from typing import Callable, Any, Mapping, Optional
 from functools import wraps
-from pydantic import BaseModel
+
+
+# Audit log delle operazioni protette (livello DEBUG)
+logger = logging.getLogger("a2a.auth")
 
 
 class Role(str, Enum):
@@ -23,6 +30,18 @@ class Role(str, Enum):
     AGENT = "agent"       # Un altro agente (fiducia intermedia)
 
 
+# Ruolo di un client esterno che non lo dichiara (o ne dichiara uno sconosciuto)
+DEFAULT_CALLER_ROLE = Role.USER
+
+# Ruoli che un client esterno può dichiarare (header HTTP o parametro MCP):
+# "agent" è riservato agli agenti
+CALLER_ROLES: Mapping[str, Role] = MappingProxyType({
+    "admin": Role.ADMIN,
+    "user": Role.USER,
+    "guest": Role.GUEST
+})
+
+
 class Permission(str, Enum):
     """Permessi granulari."""
     READ_MESSAGES = "read_messages"
@@ -34,59 +53,106 @@ class Permission(str, Enum):
     MANAGE_AGENTS = "manage_agents"
 
 
-# Mapping ruolo -> permessi
-ROLE_PERMISSIONS: dict[Role, set[Permission]] = {
-    Role.ADMIN: set(Permission),  # Tutti i permessi
-    Role.USER: {
+# Tutti i permessi, calcolato una volta sola
+_ALL_PERMISSIONS: frozenset[Permission] = frozenset(Permission)
+
+# Mapping ruolo -> permessi (immutabili: condivisi da tutti i CallerContext)
+ROLE_PERMISSIONS: dict[Role, frozenset[Permission]] = {
+    Role.ADMIN: _ALL_PERMISSIONS,  # Tutti i permessi
+    Role.USER: frozenset({
         Permission.READ_MESSAGES,
         Permission.SEND_MESSAGES,
         Permission.READ_STATE,
         Permission.CREATE_CONVERSATION,
-    },
-    Role.GUEST: {
+    }),
+    Role.GUEST: frozenset({
         Permission.READ_MESSAGES,
         Permission.READ_STATE,
-    },
-    Role.AGENT: {
+    }),
+    Role.AGENT: frozenset({
         Permission.READ_MESSAGES,
         Permission.SEND_MESSAGES,
         Permission.MODIFY_STATE,
         Permission.READ_STATE,
         Permission.CREATE_CONVERSATION,
-    },
+    }),
 }
 
 
-class CallerContext(BaseModel):
+# Metadata vuoto condiviso (read-only) per i contesti senza info aggiuntive
+_EMPTY_METADATA: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(frozen=True, slots=True)
+class CallerContext:
     """
     Contesto di chi sta facendo la chiamata.
 
     Questo oggetto viene passato ad ogni operazione per verificare i permessi.
+    È una dataclass immutabile con __slots__ (viene creata ad ogni richiesta,
+    senza il costo di validazione di un modello Pydantic): ruolo e permessi
+    vengono validati una sola volta in __post_init__, che calcola anche
+    l'insieme dei permessi effettivi riusato da ogni controllo.
     """
-    caller_id: str                    # ID univoco del caller
-    role: Role = Role.GUEST           # Ruolo del caller
-    custom_permissions: set[str] = set()  # Permessi extra oltre al ruolo
-    metadata: dict = {}               # Info aggiuntive (IP, timestamp, etc.)
+    caller_id: str                                       # ID univoco del caller
+    role: Role = Role.GUEST                              # Ruolo del caller
+    custom_permissions: frozenset[str] = frozenset()     # Permessi extra oltre al ruolo
+    # Info aggiuntive (IP, timestamp, etc.); fuori dall'hash perché il
+    # MappingProxyType non è hashable (resta nel confronto ==)
+    metadata: Optional[Mapping[str, Any]] = field(default=None, hash=False)
+    _effective_permissions: frozenset[Permission] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        # Accetta anche stringhe ("user") come faceva il modello Pydantic
+        role = self.role if isinstance(self.role, Role) else Role(self.role)
+        custom = frozenset(self.custom_permissions)
+        # Un MappingProxyType è già read-only: si può condividere senza copia
+        if not self.metadata:
+            metadata = _EMPTY_METADATA
+        elif isinstance(self.metadata, MappingProxyType):
+            metadata = self.metadata
+        else:
+            metadata = MappingProxyType(dict(self.metadata))
+
+        # Permessi del ruolo + permessi custom validi
+        if role is Role.ADMIN:
+            effective = _ALL_PERMISSIONS
+        else:
+            effective = ROLE_PERMISSIONS.get(role, frozenset())
+            valid_custom = frozenset(
+                Permission(p) for p in custom if p in Permission._value2member_map_
+            )
+            if valid_custom:
+                effective = effective | valid_custom
+
+        # Dataclass frozen: i campi si impostano bypassando __setattr__
+        object.__setattr__(self, "role", role)
+        object.__setattr__(self, "custom_permissions", custom)
+        object.__setattr__(self, "metadata", metadata)
+        object.__setattr__(self, "_effective_permissions", effective)
 
     def has_permission(self, permission: Permission) -> bool:
         """Verifica se il caller ha un determinato permesso."""
-        # Admin ha sempre tutti i permessi
-        if self.role == Role.ADMIN:
-            return True
-
-        # Controlla permessi del ruolo
-        role_perms = ROLE_PERMISSIONS.get(self.role, set())
-        if permission in role_perms:
+        # Admin ha sempre tutti i permessi (enum singleton: basta l'identità)
+        if self.role is Role.ADMIN:
             return True
 
-        # Controlla permessi custom
-        return permission.value in self.custom_permissions
+        return permission in self._effective_permissions
 
-    def get_all_permissions(self) -> set[Permission]:
+    def get_all_permissions(self) -> frozenset[Permission]:
         """Ritorna tutti i permessi del caller."""
-        base_perms = ROLE_PERMISSIONS.get(self.role, set())
-        custom = {Permission(p) for p in self.custom_permissions if p in Permission._value2member_map_}
-        return base_perms | custom
+        return self._effective_permissions
+
+    def to_dict(self) -> dict[str, Any]:
+        """Rappresentazione serializzabile (JSON) del contesto, es. per i metadata dei messaggi."""
+        return {
+            "caller_id": self.caller_id,
+            "role": self.role.value,
+            "custom_permissions": sorted(self.custom_permissions),
+            "metadata": dict(self.metadata),
+        }
 
 
 class PermissionDenied(Exception):
@@ -101,6 +167,28 @@ class PermissionDenied(Exception):
         )
 
 
+# Nomi di parametro riconosciuti come CallerContext
+_CTX_PARAM_NAMES = ("ctx", "caller_context")
+
+
+def _find_context_param(func: Callable) -> tuple[Optional[int], Optional[str]]:
+    """
+    Individua posizione e nome del parametro CallerContext nella firma.
+
+    Eseguito una sola volta alla decorazione, così il wrapper non deve
+    scandire gli argomenti ad ogni chiamata.
+    """
+    for index, param in enumerate(inspect.signature(func).parameters.values()):
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            break
+        if (
+            param.annotation in (CallerContext, "CallerContext")
+            or param.name in _CTX_PARAM_NAMES
+        ):
+            return index, param.name
+    return None, None
+
+
 def requires_permission(permission: Permission):
     """
     Decorator per proteggere metodi con controllo permessi.
@@ -110,20 +198,26 @@ def requires_permission(permission: Permission):
         async def send_message(self, ctx: CallerContext, message: str):
             ...
 
-    Il metodo deve avere CallerContext come primo argomento (dopo self).
+    Il metodo (coroutine o generatore async) deve avere CallerContext
+    come primo argomento (dopo self).
+    Il parametro viene riconosciuto dall'annotazione CallerContext o dal nome
+    (ctx, caller_context) una sola volta, alla decorazione.
     """
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            # Trova il CallerContext negli argomenti
-            ctx = None
-            for arg in args:
-                if isinstance(arg, CallerContext):
-                    ctx = arg
-                    break
-
-            if ctx is None:
-                ctx = kwargs.get('ctx') or kwargs.get('caller_context')
+        ctx_index, ctx_name = _find_context_param(func)
+
+        def check(args, kwargs) -> None:
+            # Trova il CallerContext nella posizione nota dalla firma
+            if ctx_index is not None:
+                if len(args) > ctx_index:
+                    ctx = args[ctx_index]
+                else:
+                    ctx = kwargs.get(ctx_name)
+            else:
+                # Firma senza parametro riconoscibile: cerca tra gli argomenti
+                ctx = next((arg for arg in args if isinstance(arg, CallerContext)), None)
+                if ctx is None:
+                    ctx = kwargs.get('ctx') or kwargs.get('caller_context')
 
             if ctx is None:
                 raise ValueError(
@@ -134,9 +228,24 @@ def requires_permission(permission: Permission):
             if not ctx.has_permission(permission):
                 raise PermissionDenied(ctx.caller_id, permission, func.__name__)
 
-            # Log dell'operazione (utile per audit)
-            print(f"[Auth] {ctx.caller_id} ({ctx.role.value}) -> {func.__name__}")
+            # Log dell'operazione (utile per audit). Niente print sincrono
+            # sull'event loop: il messaggio è formattato solo se DEBUG è attivo.
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s (%s) -> %s", ctx.caller_id, ctx.role.value, func.__name__)
+
+        if inspect.isasyncgenfunction(func):
+            # Generatore async (es. risposte in streaming): il controllo
+            # avviene alla prima iterazione, prima di produrre qualsiasi valore
+            @wraps(func)
+            async def gen_wrapper(*args, **kwargs):
+                check(args, kwargs)
+                async for item in func(*args, **kwargs):
+                    yield item
+            return gen_wrapper
 
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            check(args, kwargs)
             return await func(*args, **kwargs)
         return wrapper
     return decorator
@@ -10,9 +10,12 @@ Or:
     ANTHROPIC_API_KEY="sk-ant-..." python examples/llm_demo.py
 """
 
+import ast
 import asyncio
+import operator
 import os
 import sys
+from functools import lru_cache
 
 # Add parent to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,6 +25,37 @@ from agents.llm_agent import LLMAgent, ToolUsingLLMAgent
 from auth.permissions import user_context
 
 
+# Operatori ammessi nella calcolatrice: niente eval(), solo aritmetica
+_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_UNARYOPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+@lru_cache(maxsize=1024)
+def _parse_expression(expression: str) -> ast.expr:
+    """Parsa l'espressione una sola volta; le ripetizioni usano l'albero in cache."""
+    return ast.parse(expression, mode="eval").body
+
+
+def _eval_node(node: ast.expr) -> float:
+    """Valuta un albero che contiene solo numeri e operatori aritmetici."""
+    # type() e non isinstance(): bool è una sottoclasse di int
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        return _BINOPS[type(node.op)](_eval_node(node.left), _eval_node(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARYOPS:
+        return _UNARYOPS[type(node.op)](_eval_node(node.operand))
+    raise ValueError("Espressione non valida")
+
+
 async def demo_basic_llm():
     """Demo: Basic LLM Agent (no tools)."""
     print("\n" + "=" * 60)
@@ -37,6 +71,9 @@ async def demo_basic_llm():
 
     ctx = user_context("demo_user")
 
+    # Conversazione vera: la seconda domanda vede la prima nella cronologia
+    conversation_id = await storage.create_conversation([ctx.caller_id, agent.id])
+
     # Test conversation
     questions = [
         "Ciao! Come ti chiami?",
@@ -45,10 +82,22 @@ async def demo_basic_llm():
 
     for q in questions:
         print(f"\n👤 User: {q}")
-        response = await agent.receive_message(ctx=ctx, content=q, sender_id="demo_user")
-        print(f"🤖 Agent: {response.content}")
-        if response.metadata.get("usage"):
-            usage = response.metadata["usage"]
+
+        # Stampa i token man mano che arrivano invece di attendere la risposta
+        # intera; permessi e salvataggio dei messaggi come receive_message()
+        print("🤖 Agent: ", end="", flush=True)
+        usage = {}
+        async for token in agent.receive_message_stream(
+            ctx=ctx,
+            content=q,
+            sender_id=ctx.caller_id,
+            conversation_id=conversation_id,
+            usage=usage
+        ):
+            print(token, end="", flush=True)
+        print()
+
+        if usage:
             print(f"   (tokens: {usage['input_tokens']} in, {usage['output_tokens']} out)")
 
 
@@ -69,11 +118,9 @@ async def demo_tool_agent():
     def calculate(params: dict) -> str:
         expression = params.get("expression", "")
         try:
-            # Safe eval for simple math
-            allowed = set("0123456789+-*/.() ")
-            if all(c in allowed for c in expression):
-                result = eval(expression)
-                return f"Il risultato di {expression} è {result}"
+            result = _eval_node(_parse_expression(expression))
+            return f"Il risultato di {expression} è {result}"
+        except SyntaxError:
             return "Espressione non valida"
         except Exception as e:
             return f"Errore: {e}"
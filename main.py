@@ -2,6 +2,7 @@
 Main - Demo interattiva del sistema multi-agente.
 
 Esegui con: python main.py
+(con A2A_DEMO_PARALLEL=1 le demo girano in concorrenza)
 
 Questo script dimostra:
 1. Creazione di agenti
@@ -11,6 +12,7 @@ Questo script dimostra:
 """
 
 import asyncio
+import os
 from datetime import datetime
 
 from storage import MemoryStorage
@@ -24,15 +26,12 @@ from auth import (
 )
 
 
-async def demo_basic_agents():
+async def demo_basic_agents(storage: MemoryStorage):
     """Demo 1: Agenti base e storage."""
     print("\n" + "="*60)
     print("DEMO 1: Agenti Base e Storage")
     print("="*60)
 
-    # Crea lo storage condiviso
-    storage = MemoryStorage()
-
     # Crea gli agenti
     echo = EchoAgent("echo-1", storage)
     counter = CounterAgent("counter-1", storage)
@@ -50,7 +49,8 @@ async def demo_basic_agents():
     )
     print(f"Echo risponde: {response.content}")
 
-    # Messaggi al counter agent
+    # Messaggi al counter agent (in sequenza: ogni risposta dipende dal
+    # conteggio salvato dalla precedente)
     for i in range(3):
         response = await counter.receive_message(
             ctx=ctx,
@@ -67,14 +67,12 @@ async def demo_basic_agents():
     print(f"Counter state: {counter_state}")
 
 
-async def demo_agent_to_agent():
+async def demo_agent_to_agent(storage: MemoryStorage):
     """Demo 2: Comunicazione tra agenti."""
     print("\n" + "="*60)
     print("DEMO 2: Comunicazione Agent-to-Agent")
     print("="*60)
 
-    storage = MemoryStorage()
-
     # Crea agenti specializzati
     calculator = CalculatorAgent("calc", storage)
     echo = EchoAgent("echo", storage)
@@ -113,13 +111,12 @@ async def demo_agent_to_agent():
     print(f"Router risponde: {response.content}")
 
 
-async def demo_permissions():
+async def demo_permissions(storage: MemoryStorage):
     """Demo 3: Sistema di permessi."""
     print("\n" + "="*60)
     print("DEMO 3: Sistema di Permessi")
     print("="*60)
 
-    storage = MemoryStorage()
     echo = EchoAgent("echo-secure", storage)
 
     # Admin puo' fare tutto
@@ -160,13 +157,12 @@ async def demo_permissions():
     print(f"Guest puo' vedere lo stato: {state}")
 
 
-async def demo_calculator():
+async def demo_calculator(storage: MemoryStorage):
     """Demo 4: Calculator Agent."""
     print("\n" + "="*60)
     print("DEMO 4: Calculator Agent")
     print("="*60)
 
-    storage = MemoryStorage()
     calc = CalculatorAgent("calc", storage)
     ctx = user_context("studente")
 
@@ -177,23 +173,23 @@ async def demo_calculator():
         "errore: nessun numero qui"
     ]
 
-    for op in operations:
-        response = await calc.receive_message(
-            ctx=ctx,
-            content=op,
-            sender_id="studente"
-        )
+    # Le operazioni sono indipendenti: vengono inviate tutte insieme
+    responses = await asyncio.gather(*(
+        calc.receive_message(ctx=ctx, content=op, sender_id="studente")
+        for op in operations
+    ))
+
+    for op, response in zip(operations, responses):
         print(f"Input: '{op}'")
         print(f"Output: {response.content}\n")
 
 
-async def demo_conversation_history():
+async def demo_conversation_history(storage: MemoryStorage):
     """Demo 5: Cronologia conversazioni."""
     print("\n" + "="*60)
     print("DEMO 5: Cronologia Conversazioni")
     print("="*60)
 
-    storage = MemoryStorage()
     echo = EchoAgent("echo", storage)
 
     # Crea una conversazione
@@ -201,7 +197,7 @@ async def demo_conversation_history():
 
     ctx = user_context("alice")
 
-    # Scambio di messaggi
+    # Scambio di messaggi (in sequenza, per mantenere l'ordine nella cronologia)
     messages = ["Ciao!", "Come stai?", "Che tempo fa?"]
     for msg in messages:
         await echo.receive_message(
@@ -225,14 +221,12 @@ async def demo_conversation_history():
         print(f"  {cid}: {conv.participants} ({len(conv.messages)} messaggi)")
 
 
-async def interactive_mode():
+async def interactive_mode(storage: MemoryStorage):
     """Modalita' interattiva per testare gli agenti."""
     print("\n" + "="*60)
     print("MODALITA' INTERATTIVA")
     print("="*60)
 
-    storage = MemoryStorage()
-
     # Setup agenti
     calculator = CalculatorAgent("calc", storage)
     echo = EchoAgent("echo", storage)
@@ -281,18 +275,33 @@ async def main():
     print("  SISTEMA MULTI-AGENTE - DEMO")
     print("="*60)
 
-    # Esegui tutte le demo
-    await demo_basic_agents()
-    await demo_agent_to_agent()
-    await demo_permissions()
-    await demo_calculator()
-    await demo_conversation_history()
+    demos = [
+        demo_basic_agents,
+        demo_agent_to_agent,
+        demo_permissions,
+        demo_calculator,
+        demo_conversation_history,
+    ]
+
+    # Storage condiviso dalle demo in sequenza e dalla modalità interattiva
+    storage = MemoryStorage()
+
+    if os.getenv("A2A_DEMO_PARALLEL"):
+        # Le demo non dipendono l'una dall'altra: possono girare in concorrenza
+        # (l'output delle demo risulta interlacciato). Ognuna ha il suo
+        # storage: più demo usano gli stessi id di agente ("calc", "echo"),
+        # e con uno storage condiviso stati e conversazioni si mescolerebbero
+        await asyncio.gather(*(demo(MemoryStorage()) for demo in demos))
+    else:
+        # Esegui tutte le demo, una dopo l'altra
+        for demo in demos:
+            await demo(storage)
 
     # Chiedi se avviare modalita' interattiva
     print("\n" + "="*60)
     choice = input("Vuoi provare la modalita' interattiva? (s/n): ").strip().lower()
     if choice == 's':
-        await interactive_mode()
+        await interactive_mode(storage)
 
     print("\nDemo completate!")
 
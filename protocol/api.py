@@ -4,19 +4,28 @@ FastAPI REST API - Espone gli agenti tramite HTTP REST.
 Complementa FastMCP per client non-MCP (curl, browser, altri servizi).
 """
 
+import json
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import AsyncIterator, Optional
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 # Get the project root directory (parent of protocol/)
 _PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 
-from auth.permissions import CallerContext, Role, PermissionDenied
-from .mcp_server import get_agents, get_storage, setup_default_agents
+from auth.permissions import (
+    CALLER_ROLES, DEFAULT_CALLER_ROLE, CallerContext, Permission, PermissionDenied
+)
+from .mcp_server import (
+    freeze_gc, get_agents, get_agents_version, get_research_orchestrator, get_storage,
+    setup_default_agents
+)
 from .sse import router as sse_router
 from .chain_router import router as chain_router
 from .router_api import router as router_api
@@ -57,6 +66,15 @@ class ConversationInfo(BaseModel):
     created_at: str
 
 
+class MessageInfo(BaseModel):
+    """Messaggio di una conversazione."""
+    id: str
+    sender: str
+    receiver: str
+    content: str
+    timestamp: str
+
+
 class HealthResponse(BaseModel):
     """Risposta health check."""
     status: str
@@ -115,32 +133,54 @@ if _graph_static_dir.exists():
 # Dependencies
 # ============================================
 
+# Metadata condiviso (read-only) da tutti i contesti creati dall'API
+_API_METADATA = MappingProxyType({"source": "api"})
+
+
+@lru_cache(maxsize=1024)
+def _build_ctx(caller_id: str, role_header: str) -> CallerContext:
+    """
+    Crea il CallerContext per una coppia (caller_id, ruolo).
+
+    CallerContext è immutabile, quindi lo stesso oggetto può essere
+    condiviso tra le richieste dello stesso client.
+    """
+    # Caso più comune (è anche il default dell'header): niente lookup
+    if role_header == "user":
+        role = DEFAULT_CALLER_ROLE
+    else:
+        role = CALLER_ROLES.get(role_header, DEFAULT_CALLER_ROLE)
+
+    return CallerContext(
+        caller_id=caller_id,
+        role=role,
+        metadata=_API_METADATA
+    )
+
+
 async def get_caller_context(
     x_caller_id: str = Header(default="api_anonymous"),
     x_caller_role: str = Header(default="user")
 ) -> CallerContext:
     """Estrae il CallerContext dagli header HTTP."""
-    role_map = {
-        "admin": Role.ADMIN,
-        "user": Role.USER,
-        "guest": Role.GUEST
-    }
-
-    return CallerContext(
-        caller_id=x_caller_id,
-        role=role_map.get(x_caller_role, Role.USER),
-        metadata={"source": "api"}
-    )
+    return _build_ctx(x_caller_id, x_caller_role)
 
 
 # ============================================
 # Endpoints
 # ============================================
 
+# Nome del tipo di storage, fissato all'avvio (lo storage non cambia dopo)
+_storage_type: Optional[str] = None
+
+
 @app.on_event("startup")
 async def startup_event():
     """Setup iniziale all'avvio del server."""
+    global _storage_type
     setup_default_agents()
+    _storage_type = type(get_storage()).__name__
+    freeze_gc()
     print("[API] Server avviato con agenti di default")
 
 
@@ -148,49 +188,57 @@ async def startup_event():
 async def health():
     """Health check endpoint."""
     agents = get_agents()
-    storage = get_storage()
 
     return HealthResponse(
         status="ok",
         agents_count=len(agents),
-        storage_type=type(storage).__name__
+        storage_type=_storage_type or type(get_storage()).__name__
     )
 
 
-@app.get("/api/agents", response_model=dict[str, AgentInfo], tags=["Agents"])
-async def list_agents():
-    """Lista tutti gli agenti disponibili."""
-    agents = get_agents()
+# AgentInfo per agente, ricostruiti solo quando cambia il registry
+_agent_infos_cache: tuple[int, dict[str, AgentInfo]] = (-1, {})
 
-    return {
+
+def _agent_infos() -> dict[str, AgentInfo]:
+    """Ritorna gli AgentInfo di tutti gli agenti (cache per versione del registry)."""
+    global _agent_infos_cache
+    version = get_agents_version()
+    cached_version, infos = _agent_infos_cache
+    if cached_version == version:
+        return infos
+
+    infos = {
         agent_id: AgentInfo(
             id=agent_id,
             name=agent.name,
             description=agent.config.description,
             capabilities=agent.config.capabilities
         )
-        for agent_id, agent in agents.items()
+        for agent_id, agent in get_agents().items()
     }
+    _agent_infos_cache = (version, infos)
+    return infos
+
+
+@app.get("/api/agents", response_model=dict[str, AgentInfo], tags=["Agents"])
+async def list_agents():
+    """Lista tutti gli agenti disponibili."""
+    return _agent_infos()
 
 
 @app.get("/api/agents/{agent_id}", response_model=AgentInfo, tags=["Agents"])
 async def get_agent(agent_id: str):
     """Dettagli di un agente specifico."""
-    agents = get_agents()
+    info = _agent_infos().get(agent_id)
 
-    if agent_id not in agents:
+    if info is None:
         raise HTTPException(
             status_code=404,
             detail=f"Agente '{agent_id}' non trovato"
         )
 
-    agent = agents[agent_id]
-    return AgentInfo(
-        id=agent_id,
-        name=agent.name,
-        description=agent.config.description,
-        capabilities=agent.config.capabilities
-    )
+    return info
 
 
 @app.post(
@@ -218,6 +266,20 @@ async def send_message(
             detail=f"Agente '{agent_id}' non trovato"
         )
 
+    # Rifiuto immediato: i permessi del contesto sono già calcolati, niente
+    # dispatch all'agente né PermissionDenied da propagare per i guest
+    if not ctx.has_permission(Permission.SEND_MESSAGES):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "permission_denied",
+                "message": str(PermissionDenied(
+                    ctx.caller_id, Permission.SEND_MESSAGES, "receive_message"
+                )),
+                "required_permission": Permission.SEND_MESSAGES.value
+            }
+        )
+
     agent = agents[agent_id]
 
     try:
@@ -283,66 +345,92 @@ async def get_agent_state(
         )
 
 
-@app.get("/api/conversations", response_model=list[ConversationInfo], tags=["Conversations"])
+@app.get(
+    "/api/conversations",
+    response_class=StreamingResponse,
+    responses={
+        200: {"model": list[ConversationInfo], "description": "Riepilogo delle conversazioni"},
+        501: {"description": "Storage senza elenco delle conversazioni"}
+    },
+    tags=["Conversations"]
+)
 async def list_conversations():
-    """Lista tutte le conversazioni attive."""
-    from storage.memory import MemoryStorage
-
-    storage = get_storage()
-
-    if not isinstance(storage, MemoryStorage):
+    """Lista tutte le conversazioni attive (stream di un array JSON)."""
+    try:
+        # Solo gli storage con un elenco completo lo implementano
+        summaries = await get_storage().list_conversations()
+    except NotImplementedError:
         raise HTTPException(
             status_code=501,
             detail="Storage non supporta questa operazione"
         )
 
-    convs = storage.get_all_conversations()
+    return StreamingResponse(
+        _stream_json_array(summaries),
+        media_type="application/json"
+    )
+
+
+# Elementi serializzati per ogni chunk dello stream
+_STREAM_BATCH_SIZE = 256
+
+
+def _message_dict(msg) -> dict:
+    """Campi pubblici di un messaggio."""
+    return {
+        "id": msg.id,
+        "sender": msg.sender,
+        "receiver": msg.receiver,
+        "content": msg.content,
+        "timestamp": msg.timestamp_iso
+    }
 
-    return [
-        ConversationInfo(
-            id=conv_id,
-            participants=conv.participants,
-            message_count=len(conv.messages),
-            created_at=conv.created_at.isoformat()
-        )
-        for conv_id, conv in convs.items()
-    ]
 
+async def _stream_json_array(items, to_dict=None) -> AsyncIterator[bytes]:
+    """
+    Serializza gli elementi come array JSON, un blocco alla volta.
 
-@app.get("/api/conversations/{conversation_id}/messages", tags=["Conversations"])
+    Il client riceve lo stesso array di prima, ma senza costruire prima
+    l'intera lista di dict e poi l'intero buffer JSON in memoria.
+    """
+    parts = ["["]
+    for index, item in enumerate(items):
+        if index:
+            parts.append(",")
+        if to_dict is not None:
+            item = to_dict(item)
+        parts.append(json.dumps(item, ensure_ascii=False))
+        # Conta gli elementi, non le parti (che includono anche le virgole)
+        if (index + 1) % _STREAM_BATCH_SIZE == 0:
+            yield "".join(parts).encode("utf-8")
+            parts.clear()
+    parts.append("]")
+    yield "".join(parts).encode("utf-8")
+
+
+@app.get(
+    "/api/conversations/{conversation_id}/messages",
+    response_class=StreamingResponse,
+    responses={
+        200: {"model": list[MessageInfo], "description": "Messaggi della conversazione"}
+    },
+    tags=["Conversations"]
+)
 async def get_conversation_messages(conversation_id: str):
-    """Recupera i messaggi di una conversazione."""
+    """Recupera i messaggi di una conversazione (stream di un array JSON)."""
     storage = get_storage()
     messages = await storage.get_messages(conversation_id)
 
-    return [
-        {
-            "id": msg.id,
-            "sender": msg.sender,
-            "receiver": msg.receiver,
-            "content": msg.content,
-            "timestamp": msg.timestamp.isoformat()
-        }
-        for msg in messages
-    ]
+    return StreamingResponse(
+        _stream_json_array(messages, _message_dict),
+        media_type="application/json"
+    )
 
 
 # ============================================
 # Research Endpoints
 # ============================================
 
-_research_orchestrator = None
-
-
-def get_research_orchestrator():
-    """Get or create the research orchestrator."""
-    global _research_orchestrator
-    if _research_orchestrator is None:
-        from agents.research import OrchestratorAgent
-        _research_orchestrator = OrchestratorAgent(get_storage())
-    return _research_orchestrator
-
-
 @app.get("/api/research", tags=["Research"])
 async def research(q: str):
     """
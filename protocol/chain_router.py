@@ -9,30 +9,49 @@ Provides:
 """
 
 import asyncio
+import secrets
+import time
+from functools import lru_cache
 from typing import Optional
 from datetime import datetime
 
 from fastapi import APIRouter, Request, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from pydantic import BaseModel
+from pydantic_core import to_json
 
 from .mcp_server import get_storage
-from .sse import SSEEvent
-from agents.chain import (
-    ChainPipeline,
-    WriterAgent,
-    EditorAgent,
-    PublisherAgent,
-    PipelineInput,
-    PipelineResult,
-)
+from .sse import EventStreamResponse, SSEBus, TTLStore, sse_frame, sse_json_frame
 
 
 router = APIRouter(prefix="/api/chain", tags=["Chain Pipeline"])
 
-# Store for pipeline results and event queues
-_pipeline_results: dict[str, PipelineResult] = {}
-_pipeline_queues: dict[str, asyncio.Queue] = {}
+
+# Store for pipeline outcomes and event buses (entries expire after an hour)
+_pipeline_futures = TTLStore()  # pipeline_id -> asyncio.Future[PipelineResult]
+_pipeline_queues = TTLStore()   # pipeline_id -> SSEBus
+
+# Keepalive frame, identical to sse_frame("ping", {"timestamp": ...})
+_PING_TEMPLATE = b'event: ping\ndata: {"timestamp":"%b"}\n\n'
+
+# Timestamp of the current second, shared by all SSE clients
+_clock_second: int = -1
+_clock_iso: str = ""
+
+
+def _now_iso() -> str:
+    """
+    ISO timestamp with one-second resolution.
+
+    Formatted at most once per second, however many clients are connected,
+    and computed lazily instead of by a ticking background task.
+    """
+    global _clock_second, _clock_iso
+    second = int(time.time())
+    if second != _clock_second:
+        _clock_second = second
+        _clock_iso = datetime.fromtimestamp(second).isoformat()
+    return _clock_iso
 
 
 class ChainRunRequest(BaseModel):
@@ -57,6 +76,9 @@ class ChainAgentInfo(BaseModel):
 
 def _create_pipeline_agents():
     """Create the chain pipeline agents."""
+    # Imported on first use: API startup doesn't pay for the chain modules
+    from agents.chain import WriterAgent, EditorAgent, PublisherAgent
+
     storage = get_storage()
     return [
         WriterAgent(storage),
@@ -65,22 +87,43 @@ def _create_pipeline_agents():
     ]
 
 
+@lru_cache(maxsize=1)
+def _agent_info_cache() -> list[dict]:
+    """
+    Serialized info about the chain agents, built once.
+
+    Introspection only needs static names and descriptions, so the agents
+    are instantiated a single time; pipeline runs still create fresh
+    (stateful) agents via _create_pipeline_agents().
+    """
+    return [
+        ChainAgentInfo(
+            step_name=agent.step_name,
+            agent_id=agent.id,
+            description=agent.config.description
+        ).model_dump()
+        for agent in _create_pipeline_agents()
+    ]
+
+
 def _create_event_handler(pipeline_id: str):
     """Create an event handler that broadcasts to SSE clients."""
     def handler(event: dict):
-        if pipeline_id in _pipeline_queues:
-            try:
-                _pipeline_queues[pipeline_id].put_nowait(event)
-            except asyncio.QueueFull:
-                pass
+        bus = _pipeline_queues.get(pipeline_id)
+        if bus is not None:
+            # Unpacked once here, so the SSE loop only dispatches on the tag
+            bus.put_nowait((event.get("event", "update"), event.get("data", {})))
     return handler
 
 
 async def _run_pipeline_background(
     pipeline_id: str,
-    prompt: str
+    prompt: str,
+    future: asyncio.Future
 ):
-    """Run the pipeline in the background."""
+    """Run the pipeline in the background and resolve its future."""
+    from agents.chain import ChainPipeline, PipelineInput
+
     storage = get_storage()
     agents = _create_pipeline_agents()
 
@@ -97,12 +140,18 @@ async def _run_pipeline_background(
         pipeline_id=pipeline_id
     )
 
-    result = await pipeline.run(input_data)
-    _pipeline_results[pipeline_id] = result
+    try:
+        result = await pipeline.run(input_data)
+    except Exception as e:
+        future.set_exception(e)
+    else:
+        future.set_result(result)
+
 
-    # Signal completion to SSE clients
-    if pipeline_id in _pipeline_queues:
-        await _pipeline_queues[pipeline_id].put({"event": "done", "data": {}})
+def _consume_exception(future: asyncio.Future) -> None:
+    """Mark a failure as retrieved: it is reported by /status, not logged at GC."""
+    if not future.cancelled():
+        future.exception()
 
 
 @router.post("/run", response_model=ChainRunResponse)
@@ -122,17 +171,22 @@ async def run_pipeline(
     Returns:
         pipeline_id to track the execution
     """
-    import uuid
-    pipeline_id = request.pipeline_id or str(uuid.uuid4())[:8]
+    pipeline_id = request.pipeline_id or secrets.token_hex(4)
 
-    # Create event queue for this pipeline
-    _pipeline_queues[pipeline_id] = asyncio.Queue(maxsize=100)
+    # Create event bus and completion future for this pipeline
+    bus = SSEBus()
+    future = asyncio.get_running_loop().create_future()
+    future.add_done_callback(_consume_exception)
+    future.add_done_callback(bus.wake)
+    _pipeline_queues[pipeline_id] = bus
+    _pipeline_futures[pipeline_id] = future
 
     # Run pipeline in background
     background_tasks.add_task(
         _run_pipeline_background,
         pipeline_id,
-        request.prompt
+        request.prompt,
+        future
     )
 
     return ChainRunResponse(
@@ -149,11 +203,24 @@ async def get_pipeline_status(pipeline_id: str):
 
     Returns the full result if completed, or current status if running.
     """
-    if pipeline_id in _pipeline_results:
-        result = _pipeline_results[pipeline_id]
-        return result.model_dump(mode='json')
-
-    if pipeline_id in _pipeline_queues:
+    future = _pipeline_futures.get(pipeline_id)
+
+    if future is not None and future.done():
+        if future.cancelled() or future.exception() is not None:
+            return {
+                "pipeline_id": pipeline_id,
+                "status": "failed",
+                "message": "Pipeline execution failed"
+            }
+
+        # Serialized straight to JSON bytes by pydantic-core, skipping the
+        # intermediate dict and FastAPI's generic encoder
+        return Response(
+            content=future.result().model_dump_json(),
+            media_type="application/json"
+        )
+
+    if future is not None:
         return {
             "pipeline_id": pipeline_id,
             "status": "running",
@@ -174,66 +241,50 @@ async def list_chain_agents():
 
     Returns information about Writer, Editor, and Publisher agents.
     """
-    agents = _create_pipeline_agents()
-
-    return [
-        ChainAgentInfo(
-            step_name=agent.step_name,
-            agent_id=agent.id,
-            description=agent.config.description
-        ).model_dump()
-        for agent in agents
-    ]
+    return _agent_info_cache()
 
 
 async def _event_generator(pipeline_id: str):
     """Generate SSE events for a pipeline."""
     if pipeline_id not in _pipeline_queues:
-        yield SSEEvent(
-            event="error",
-            data={"message": "Pipeline not found"}
-        ).format()
+        yield sse_frame("error", {"message": "Pipeline not found"})
         return
 
-    queue = _pipeline_queues[pipeline_id]
+    bus = _pipeline_queues[pipeline_id]
+    future = _pipeline_futures[pipeline_id]
 
     # Send connection event
-    yield SSEEvent(
-        event="connected",
-        data={
-            "pipeline_id": pipeline_id,
-            "timestamp": datetime.now().isoformat()
-        }
-    ).format()
+    yield sse_frame("connected", {
+        "pipeline_id": pipeline_id,
+        "timestamp": _now_iso()
+    })
 
     try:
         while True:
-            try:
-                event = await asyncio.wait_for(queue.get(), timeout=60.0)
-
-                # Check for completion signal
-                if event.get("event") == "done":
-                    # Send final result
-                    if pipeline_id in _pipeline_results:
-                        result = _pipeline_results[pipeline_id]
-                        yield SSEEvent(
-                            event="result",
-                            data=result.model_dump(mode='json')
-                        ).format()
-                    break
-
-                # Forward pipeline events
-                yield SSEEvent(
-                    event=event.get("event", "update"),
-                    data=event.get("data", {})
-                ).format()
+            # Forward buffered pipeline events first, without arming a timeout.
+            # Everything already buffered goes out as a single write.
+            if bus.q:
+                frames = [sse_frame(tag, data) for tag, data in bus.q]
+                bus.q.clear()
+                yield b"".join(frames)
+                continue
+
+            # All events are queued before the future resolves, so once the
+            # buffer is drained the final result can be sent
+            if future.done():
+                if future.cancelled() or future.exception() is not None:
+                    yield sse_frame("error", {"message": "Pipeline execution failed"})
+                else:
+                    yield sse_json_frame(
+                        "result", to_json(future.result())
+                    )
+                break
 
+            try:
+                await asyncio.wait_for(bus.wait(), timeout=60.0)
             except asyncio.TimeoutError:
                 # Send keepalive
-                yield SSEEvent(
-                    event="ping",
-                    data={"timestamp": datetime.now().isoformat()}
-                ).format()
+                yield _PING_TEMPLATE % _now_iso().encode("ascii")
 
     finally:
         # Cleanup
@@ -259,12 +310,4 @@ async def pipeline_events(pipeline_id: str):
     Example:
         curl -N http://localhost:8000/api/chain/events/{pipeline_id}
     """
-    return StreamingResponse(
-        _event_generator(pipeline_id),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
-    )
+    return EventStreamResponse(_event_generator(pipeline_id))
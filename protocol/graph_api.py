@@ -9,16 +9,19 @@ Provides:
 """
 
 import asyncio
-from typing import Optional
+from functools import cache
+from typing import AsyncIterator, Optional
 from datetime import datetime
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
+from pydantic_core import to_json
 
 from agents.registry import AgentRegistry
 from storage.memory import MemoryStorage
 from agents.graph.runner import GraphRunner
+from .sse import EventStreamResponse, sse_frame
 
 
 # ============================================
@@ -59,6 +62,18 @@ class GraphStructureResponse(BaseModel):
     edges: list[dict]
 
 
+class GraphAgentInfo(BaseModel):
+    """An agent available to the graph."""
+    id: str
+    name: str
+    capabilities: list[str]
+
+
+class GraphRegistryResponse(BaseModel):
+    """Agents available to the graph."""
+    agents: list[GraphAgentInfo]
+
+
 # ============================================
 # Router
 # ============================================
@@ -66,52 +81,55 @@ class GraphStructureResponse(BaseModel):
 
 router = APIRouter(prefix="/api/graph", tags=["graph"])
 
+# Final frame of every event stream (constant, encoded once)
+_DONE_FRAME = sse_frame("done", {"status": "completed"})
 
-# Module-level runner (lazy initialization)
-_graph_runner: Optional[GraphRunner] = None
+# Serialized /structure response and the compiled graph it was built from:
+# the topology never changes after compilation, so it is encoded only once
+_structure_cache: Optional[tuple[object, bytes]] = None
 
+# Encoded /registry response and the registry version it was built from
+_registry_cache: tuple[int, bytes] = (-1, b"")
 
-def get_graph_runner() -> GraphRunner:
-    """Get or create the graph runner."""
-    global _graph_runner
-    if _graph_runner is None:
-        # Create shared instances
-        storage = MemoryStorage()
-        registry = AgentRegistry()
-
-        # Register specialist agents
-        from agents.router.specialist_agents import (
-            ResearchAgent,
-            EstimationAgent,
-            AnalysisAgent,
-            TranslationAgent,
-            SummaryAgent,
-        )
-        from agents.simple_agent import CalculatorAgent, EchoAgent
-
-        # Create and register agents
-        calc = CalculatorAgent("calculator", storage)
-        echo = EchoAgent("echo", storage)
-        research = ResearchAgent(storage)
-        estimation = EstimationAgent(storage)
-        analysis = AnalysisAgent(storage)
-        translation = TranslationAgent(storage)
-        summary = SummaryAgent(storage)
-
-        registry.register(calc)
-        registry.register(echo)
-        registry.register(research)
-        registry.register(estimation)
-        registry.register(analysis)
-        registry.register(translation)
-        registry.register(summary)
-
-        _graph_runner = GraphRunner(
-            registry=registry,
-            storage=storage
-        )
 
-    return _graph_runner
+@cache
+def get_graph_runner() -> GraphRunner:
+    """Get or create the graph runner (built once, on first use)."""
+    # Create shared instances
+    storage = MemoryStorage()
+    registry = AgentRegistry()
+
+    # Register specialist agents
+    from agents.router.specialist_agents import (
+        ResearchAgent,
+        EstimationAgent,
+        AnalysisAgent,
+        TranslationAgent,
+        SummaryAgent,
+    )
+    from agents.simple_agent import CalculatorAgent, EchoAgent
+
+    # Create and register agents
+    calc = CalculatorAgent("calculator", storage)
+    echo = EchoAgent("echo", storage)
+    research = ResearchAgent(storage)
+    estimation = EstimationAgent(storage)
+    analysis = AnalysisAgent(storage)
+    translation = TranslationAgent(storage)
+    summary = SummaryAgent(storage)
+
+    registry.register(calc)
+    registry.register(echo)
+    registry.register(research)
+    registry.register(estimation)
+    registry.register(analysis)
+    registry.register(translation)
+    registry.register(summary)
+
+    return GraphRunner(
+        registry=registry,
+        storage=storage
+    )
 
 
 # ============================================
@@ -139,14 +157,30 @@ async def run_graph(request: GraphTaskRequest):
         task_id=request.task_id
     )
 
-    return GraphTaskResponse(
+    # Fields come straight from the runner: skip validation and serialize
+    # with pydantic-core (response_model is kept for the OpenAPI schema)
+    response = GraphTaskResponse.model_construct(
         task_id=result["task_id"],
         status=result["status"],
         final_output=result.get("final_output", ""),
-        duration_ms=runner.get_task_status(result["task_id"]).get("duration_ms", 0),
+        duration_ms=result.get("duration_ms", 0),
         executions_count=len(result.get("executions", [])),
         synthesis_used=result.get("synthesis") is not None
     )
+    return Response(content=response.model_dump_json(), media_type="application/json")
+
+
+async def _sse_frames(events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Frame runner events as SSE, then close the stream with the done frame.
+
+    Each event dict is encoded exactly once, here; the runner keeps
+    yielding plain dicts so its other consumers need no decoding.
+    """
+    async for event in events:
+        yield sse_frame(event.get("type", "message"), event)
+
+    yield _DONE_FRAME
 
 
 @router.get("/events/{task_id}")
@@ -163,29 +197,7 @@ async def stream_events(task_id: str):
     Use this endpoint with EventSource for real-time updates.
     """
     runner = get_graph_runner()
-
-    async def event_generator():
-        """Generate SSE events."""
-        async for event in runner.get_events(task_id):
-            event_type = event.get("type", "message")
-            data = event
-
-            yield f"event: {event_type}\n"
-            yield f"data: {data}\n\n"
-
-        # Send done event
-        yield "event: done\n"
-        yield "data: {\"status\": \"completed\"}\n\n"
-
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
-    )
+    return EventStreamResponse(_sse_frames(runner.get_events(task_id)))
 
 
 @router.post("/stream")
@@ -197,34 +209,8 @@ async def run_and_stream(request: GraphTaskRequest):
     and immediately streams all events.
     """
     runner = get_graph_runner()
-
-    async def event_generator():
-        """Generate SSE events during execution."""
-        import json
-
-        async for event in runner.stream(
-            task=request.task,
-            task_id=request.task_id
-        ):
-            event_type = event.get("type", "message")
-            data_str = json.dumps(event)
-
-            yield f"event: {event_type}\n"
-            yield f"data: {data_str}\n\n"
-
-        # Send done event
-        yield "event: done\n"
-        yield "data: {\"status\": \"completed\"}\n\n"
-
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
-    )
+    events = runner.stream(task=request.task, task_id=request.task_id)
+    return EventStreamResponse(_sse_frames(events))
 
 
 @router.get("/status/{task_id}", response_model=GraphStatusResponse)
@@ -243,7 +229,7 @@ async def get_task_status(task_id: str):
             detail=f"Task '{task_id}' not found"
         )
 
-    return GraphStatusResponse(
+    response = GraphStatusResponse.model_construct(
         task_id=task_id,
         status=status.get("status", "unknown"),
         started_at=status.get("started_at"),
@@ -251,6 +237,7 @@ async def get_task_status(task_id: str):
         duration_ms=status.get("duration_ms"),
         error=status.get("error")
     )
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 
 @router.get("/structure", response_model=GraphStructureResponse)
@@ -263,33 +250,46 @@ async def get_graph_structure():
     - nodes: List of nodes with IDs and names
     - edges: List of edges with source/target
     """
+    global _structure_cache
     runner = get_graph_runner()
 
-    from agents.graph.graph import get_graph_structure as get_structure
-    structure = get_structure(runner.graph)
+    if _structure_cache is None or _structure_cache[0] is not runner.graph:
+        from agents.graph.graph import get_graph_structure as get_structure
+        structure = get_structure(runner.graph)
 
-    return GraphStructureResponse(
-        mermaid=structure["mermaid"],
-        nodes=structure["nodes"],
-        edges=structure["edges"]
-    )
+        content = to_json(GraphStructureResponse.model_construct(
+            mermaid=structure["mermaid"],
+            nodes=structure["nodes"],
+            edges=structure["edges"]
+        ))
+        _structure_cache = (runner.graph, content)
+
+    return Response(content=_structure_cache[1], media_type="application/json")
 
 
-@router.get("/registry")
+@router.get("/registry", response_model=GraphRegistryResponse)
 async def get_registry_info():
     """
     Get information about registered agents.
 
     Returns list of agents with their capabilities.
     """
-    runner = get_graph_runner()
-
-    agents = []
-    for agent in runner.registry.list_all():
-        agents.append({
-            "id": agent.id,
-            "name": agent.name,
-            "capabilities": agent.config.capabilities if hasattr(agent, 'config') else []
-        })
-
-    return {"agents": agents}
+    global _registry_cache
+    registry = get_graph_runner().registry
+
+    # Every AgentBase has a config: no per-agent hasattr() probe
+    version, content = _registry_cache
+    if version != registry.version:
+        content = to_json(GraphRegistryResponse(
+            agents=[
+                GraphAgentInfo(
+                    id=agent.id,
+                    name=agent.name,
+                    capabilities=agent.config.capabilities
+                )
+                for agent in registry.list_all()
+            ]
+        ))
+        _registry_cache = (registry.version, content)
+
+    return Response(content=content, media_type="application/json")
@@ -4,18 +4,31 @@ FastMCP Server - Espone gli agenti tramite Model Context Protocol.
 Usa FastMCP per una API più semplice basata su decoratori.
 """
 
+import asyncio
+import gc
 import json
+from functools import cache
 from typing import Optional
 from fastmcp import FastMCP
+from pydantic_core import to_json
 
 from agents.base import AgentBase
 from storage.base import StorageBase
 from storage.memory import MemoryStorage
-from auth.permissions import CallerContext, Role, user_context, admin_context
+from auth.permissions import (
+    CALLER_ROLES, DEFAULT_CALLER_ROLE, CallerContext, user_context, admin_context
+)
+
+try:
+    import uvloop  # Opzionale: event loop basato su libuv (incluso in uvicorn[standard])
+except ImportError:
+    uvloop = None
 
 # Registry globale degli agenti (condiviso con FastAPI)
 _storage: Optional[StorageBase] = None
 _agents: dict[str, AgentBase] = {}
+# Incrementato ad ogni modifica del registry (invalida le cache derivate)
+_agents_version: int = 0
 
 
 def get_storage() -> StorageBase:
@@ -31,9 +44,16 @@ def get_agents() -> dict[str, AgentBase]:
     return _agents
 
 
+def get_agents_version() -> int:
+    """Ritorna la versione corrente del registry degli agenti."""
+    return _agents_version
+
+
 def register_agent(agent: AgentBase) -> None:
     """Registra un agente nel registry globale."""
+    global _agents_version
     _agents[agent.id] = agent
+    _agents_version += 1
     print(f"[MCP] Registrato agente: {agent.id}")
 
 
@@ -47,9 +67,18 @@ def set_storage(storage: StorageBase) -> None:
 mcp = FastMCP("a2a-agents")
 
 
+# JSON di list_agents() e versione del registry da cui è stato costruito
+_agents_list_cache: tuple[int, str] = (-1, "")
+
+
 @mcp.tool()
 def list_agents() -> str:
     """Lista tutti gli agenti disponibili con le loro capacità."""
+    global _agents_list_cache
+    version, payload = _agents_list_cache
+    if version == _agents_version:
+        return payload
+
     agents = get_agents()
     result = {
         agent_id: {
@@ -59,7 +88,9 @@ def list_agents() -> str:
         }
         for agent_id, agent in agents.items()
     }
-    return json.dumps(result, indent=2)
+    payload = json.dumps(result, indent=2)
+    _agents_list_cache = (_agents_version, payload)
+    return payload
 
 
 @mcp.tool()
@@ -92,15 +123,9 @@ async def send_message(
     agent = agents[agent_id]
 
     # Costruisci il contesto
-    role_map = {
-        "admin": Role.ADMIN,
-        "user": Role.USER,
-        "guest": Role.GUEST
-    }
-
     ctx = CallerContext(
         caller_id=caller_id,
-        role=role_map.get(caller_role, Role.USER),
+        role=CALLER_ROLES.get(caller_role, DEFAULT_CALLER_ROLE),
         metadata={"source": "mcp"}
     )
 
@@ -146,27 +171,29 @@ async def get_agent_state(agent_id: str) -> str:
     ctx = user_context("mcp_client")
     state = await agents[agent_id].get_state(ctx)
 
-    return json.dumps(state, indent=2, default=str)
+    # Serializer di pydantic-core: datetime in ISO 8601 nativamente,
+    # str() solo per i tipi che non sa serializzare
+    return to_json(state, indent=2, fallback=str).decode()
 
 
 @mcp.tool()
-def list_conversations() -> str:
+async def list_conversations() -> str:
     """Mostra tutte le conversazioni attive."""
-    storage = get_storage()
+    try:
+        # Stessi riepiloghi di GET /api/conversations
+        summaries = await get_storage().list_conversations()
+    except NotImplementedError:
+        return json.dumps({"error": "Storage non supporta questa operazione"})
 
-    if isinstance(storage, MemoryStorage):
-        convs = storage.get_all_conversations()
-        result = {
-            conv_id: {
-                "participants": conv.participants,
-                "message_count": len(conv.messages),
-                "created_at": conv.created_at.isoformat()
-            }
-            for conv_id, conv in convs.items()
+    result = {
+        summary["id"]: {
+            "participants": summary["participants"],
+            "message_count": summary["message_count"],
+            "created_at": summary["created_at"]
         }
-        return json.dumps(result, indent=2)
-
-    return json.dumps({"error": "Storage non supporta questa operazione"})
+        for summary in summaries
+    }
+    return json.dumps(result, indent=2)
 
 
 @mcp.tool()
@@ -186,7 +213,7 @@ async def get_conversation_messages(conversation_id: str) -> str:
             "sender": msg.sender,
             "receiver": msg.receiver,
             "content": msg.content,
-            "timestamp": msg.timestamp.isoformat()
+            "timestamp": msg.timestamp_iso
         }
         for msg in messages
     ]
@@ -210,16 +237,11 @@ async def resource_agent_state(agent_id: str) -> str:
 # Research Tools
 # ============================================
 
-_research_orchestrator = None
-
-
+@cache
 def get_research_orchestrator():
-    """Get or create the research orchestrator."""
-    global _research_orchestrator
-    if _research_orchestrator is None:
-        from agents.research import OrchestratorAgent
-        _research_orchestrator = OrchestratorAgent(get_storage())
-    return _research_orchestrator
+    """Get or create the research orchestrator (built once, shared by MCP, API and SSE)."""
+    from agents.research import OrchestratorAgent
+    return OrchestratorAgent(get_storage())
 
 
 @mcp.tool()
@@ -239,7 +261,7 @@ async def research(query: str) -> str:
     orchestrator = get_research_orchestrator()
     result = await orchestrator.research(query)
 
-    return json.dumps(result.model_dump(), indent=2, default=str)
+    return result.model_dump_json(indent=2, fallback=str)
 
 
 def setup_default_agents() -> None:
@@ -263,6 +285,26 @@ def setup_default_agents() -> None:
     register_agent(router)
 
 
+def use_uvloop() -> None:
+    """Usa uvloop per i prossimi event loop, se installato."""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def freeze_gc() -> None:
+    """
+    Sposta gli oggetti creati all'avvio nella generazione permanente del GC.
+
+    Da chiamare dopo la registrazione degli agenti: registry, storage e
+    moduli importati non vengono più riesaminati a ogni collection, che
+    così non bloccano più a lungo gli stream SSE.
+    """
+    gc.collect()
+    gc.freeze()
+
+
 if __name__ == "__main__":
     setup_default_agents()
+    freeze_gc()
+    use_uvloop()
     mcp.run()
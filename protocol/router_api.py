@@ -5,28 +5,65 @@ Provides REST and SSE endpoints for task routing with real-time updates.
 """
 
 import asyncio
+import hashlib
+import json
+from functools import cache
 from typing import Optional
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel
+from pydantic_core import to_json
 from datetime import datetime
 
 from agents.registry import AgentRegistry
-from agents.router import SmartRouter, TaskInput, RouterResult
+from agents.router import SmartRouter, TaskInput
 from storage.memory import MemoryStorage
+from .sse import EventStreamResponse, SSEBus, TTLStore, sse_frame, sse_json_frame
 
 
 # Router instance (will be initialized on first use)
 router = APIRouter(prefix="/api/router", tags=["router"])
 
-# Storage for results and events
-_results: dict[str, RouterResult] = {}
-_event_queues: dict[str, asyncio.Queue] = {}
+# Storage for results and events (entries expire after an hour, so buses
+# for clients that never connect and uncollected results do not pile up).
+# Results are also capped in number; buses are not, since evicting one
+# would cut off a client that is still streaming.
+_results = TTLStore(max_items=1024)  # task_id -> RouterResult
+_event_queues = TTLStore()           # task_id -> SSEBus
+
+# Frames with a fixed shape, equivalent to sse_frame(...) for the same data.
+# The task id comes from the URL, so it is filled in JSON-encoded (quoted
+# and escaped), never raw.
+_CONNECTED_TEMPLATE = b'event: connected\ndata: {"task_id":%b}\n\n'
+_PING_TEMPLATE = b'event: ping\ndata: {"time":"%b"}\n\n'
 
 # Shared registry and router (lazy init)
 _smart_router: Optional[SmartRouter] = None
 _registry: Optional[AgentRegistry] = None
 
+# Encoded /registry response and the registry version it was built from
+_registry_cache: tuple[int, bytes] = (-1, b"")
+
+# Routing tasks in flight: the event loop only keeps weak references to
+# tasks, so they are held here until done
+_running: set[asyncio.Task] = set()
+
+# Max routings executed at once; further requests wait for a free slot
+MAX_CONCURRENT_ROUTINGS = 64
+
+# Semaphore and the loop it was made for: once contended, an asyncio
+# primitive is bound to its loop, so it is rebuilt if the app moves loop
+_routing_sem: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def _routing_semaphore() -> asyncio.Semaphore:
+    """Get the routing semaphore for the running event loop."""
+    global _routing_sem
+    loop = asyncio.get_running_loop()
+    if _routing_sem is None or _routing_sem[0] is not loop:
+        _routing_sem = (loop, asyncio.Semaphore(MAX_CONCURRENT_ROUTINGS))
+    return _routing_sem[1]
+
 
 def get_registry() -> AgentRegistry:
     """Get or create the shared registry."""
@@ -117,12 +154,14 @@ def get_router() -> SmartRouter:
 
 def _broadcast_event(event: dict) -> None:
     """Broadcast event to all connected clients for this task."""
-    task_id = event.get("data", {}).get("task_id")
-    if task_id and task_id in _event_queues:
-        try:
-            _event_queues[task_id].put_nowait(event)
-        except asyncio.QueueFull:
-            pass
+    data = event.get("data", {})
+    task_id = data.get("task_id")
+    bus = _event_queues.get(task_id) if task_id else None
+    if bus is not None:
+        # Encoded once here: the consumer forwards the frame verbatim.
+        # A full bus drops its oldest event instead of this one.
+        event_type = event.get("event", "message")
+        bus.put_nowait((event_type, sse_frame(event_type, data)))
 
 
 class RouteRequest(BaseModel):
@@ -137,6 +176,31 @@ class RouteResponse(BaseModel):
     message: str
 
 
+class RegisteredAgent(BaseModel):
+    """An agent in the shared registry."""
+    id: str
+    name: str
+    capabilities: list[str]
+    description: str
+
+
+class RegistryResponse(BaseModel):
+    """Registered agents."""
+    agents: list[RegisteredAgent]
+    count: int
+
+
+class CapabilityInfo(BaseModel):
+    """A capability the analyzer can detect."""
+    name: str
+    description: str
+
+
+class CapabilitiesResponse(BaseModel):
+    """Capabilities the analyzer can detect."""
+    capabilities: list[CapabilityInfo]
+
+
 @router.post("/route", response_model=RouteResponse)
 async def route_task(request: RouteRequest):
     """
@@ -148,19 +212,25 @@ async def route_task(request: RouteRequest):
     task_input = TaskInput(task=request.task)
     task_id = task_input.task_id
 
-    # Create event queue for this task
-    _event_queues[task_id] = asyncio.Queue(maxsize=100)
+    # Create event bus for this task
+    _event_queues[task_id] = SSEBus()
 
     # Start routing in background
     smart_router = get_router()
 
     async def run_routing():
-        result = await smart_router.route(task_input)
+        async with _routing_semaphore():
+            result = await smart_router.route(task_input)
         _results[task_id] = result
-        # Signal completion
-        await _event_queues[task_id].put({"event": "result", "data": result.model_dump(mode='json')})
+        # Signal completion (no-op if the client already went away)
+        bus = _event_queues.get(task_id)
+        if bus is not None:
+            frame = sse_json_frame("result", to_json(result))
+            bus.put_nowait(("result", frame))
 
-    asyncio.create_task(run_routing())
+    task = asyncio.create_task(run_routing())
+    _running.add(task)
+    task.add_done_callback(_running.discard)
 
     return RouteResponse(
         task_id=task_id,
@@ -173,7 +243,11 @@ async def route_task(request: RouteRequest):
 async def get_status(task_id: str):
     """Get the status/result of a routing task."""
     if task_id in _results:
-        return _results[task_id].model_dump(mode='json')
+        # JSON bytes straight from pydantic-core, no intermediate dict
+        return Response(
+            content=_results[task_id].model_dump_json(),
+            media_type="application/json"
+        )
 
     if task_id in _event_queues:
         return {"task_id": task_id, "status": "in_progress"}
@@ -184,79 +258,104 @@ async def get_status(task_id: str):
 @router.get("/events/{task_id}")
 async def get_events(task_id: str):
     """SSE endpoint for real-time routing events."""
-    if task_id not in _event_queues:
-        # Create queue if task might start soon
-        _event_queues[task_id] = asyncio.Queue(maxsize=100)
+    bus = _event_queues.get(task_id)
+    if bus is None:
+        # Create bus if task might start soon
+        bus = _event_queues[task_id] = SSEBus()
 
     async def event_generator():
-        queue = _event_queues[task_id]
-
         # Send connected event
-        yield f"event: connected\ndata: {{\"task_id\": \"{task_id}\"}}\n\n"
+        yield _CONNECTED_TEMPLATE % json.dumps(task_id).encode("utf-8")
 
         try:
             while True:
-                try:
-                    event = await asyncio.wait_for(queue.get(), timeout=30)
-
-                    event_type = event.get("event", "message")
-                    data = event.get("data", {})
-
-                    # Convert data to JSON string
-                    import json
-                    if isinstance(data, dict):
-                        data_str = json.dumps(data, default=str)
-                    else:
-                        data_str = json.dumps(data.model_dump(mode='json') if hasattr(data, 'model_dump') else str(data))
-
-                    yield f"event: {event_type}\ndata: {data_str}\n\n"
-
-                    # If result event, we're done
-                    if event_type == "result":
+                # Forward buffered events first, without arming a timeout.
+                # Everything already buffered goes out as a single write.
+                if bus.q:
+                    frames = []
+                    done = False
+                    while bus.q:
+                        event_type, frame = bus.q.popleft()
+                        frames.append(frame)
+                        # If result event, we're done
+                        if event_type == "result":
+                            done = True
+                            break
+                    yield b"".join(frames)
+
+                    if done:
                         break
+                    continue
 
+                try:
+                    await asyncio.wait_for(bus.wait(), timeout=30)
                 except asyncio.TimeoutError:
                     # Send keepalive
-                    yield f"event: ping\ndata: {{\"time\": \"{datetime.now().isoformat()}\"}}\n\n"
+                    yield _PING_TEMPLATE % datetime.now().isoformat().encode("ascii")
 
         finally:
             # Cleanup
             if task_id in _event_queues:
                 del _event_queues[task_id]
 
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+    return EventStreamResponse(event_generator())
 
 
-@router.get("/registry")
+@router.get("/registry", response_model=RegistryResponse)
 async def get_registry_info():
     """Get information about registered agents."""
+    global _registry_cache
     registry = get_registry()
-    agents = []
-    for agent in registry.list_all():
-        agents.append({
-            "id": agent.id,
-            "name": agent.name,
-            "capabilities": agent.config.capabilities,
-            "description": agent.config.description
-        })
-    return {"agents": agents, "count": len(agents)}
-
-
-@router.get("/capabilities")
-async def get_capabilities():
-    """Get list of available capabilities."""
+
+    version, content = _registry_cache
+    if version != registry.version:
+        agents = [
+            RegisteredAgent(
+                id=agent.id,
+                name=agent.name,
+                capabilities=agent.config.capabilities,
+                description=agent.config.description
+            )
+            for agent in registry.list_all()
+        ]
+        content = to_json(RegistryResponse(agents=agents, count=len(agents)))
+        _registry_cache = (registry.version, content)
+
+    return Response(content=content, media_type="application/json")
+
+
+# The capability list only changes with a new deploy: let clients keep it
+_CAPABILITIES_CACHE_CONTROL = "public, max-age=3600, immutable"
+
+
+@router.get("/capabilities", response_model=CapabilitiesResponse)
+async def get_capabilities(if_none_match: Optional[str] = Header(None)):
+    """
+    Get list of available capabilities.
+
+    The list never changes while the server runs, so clients and caches
+    may keep it: a request carrying the current ETag gets an empty 304.
+    """
+    content, etag = _capabilities_json()
+    headers = {"ETag": etag, "Cache-Control": _CAPABILITIES_CACHE_CONTROL}
+
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (tag.strip() for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+@cache
+def _capabilities_json() -> tuple[bytes, str]:
+    """The capability list is a static constant: serialize and hash it once."""
     from agents.router.analyzer import AVAILABLE_CAPABILITIES
-    return {
-        "capabilities": [
-            {"name": cap, "description": desc}
+    content = to_json(CapabilitiesResponse(
+        capabilities=[
+            CapabilityInfo(name=cap, description=desc)
             for cap, desc in AVAILABLE_CAPABILITIES
         ]
-    }
+    ))
+    return content, '"%s"' % hashlib.blake2b(content, digest_size=8).hexdigest()
@@ -9,20 +9,202 @@ Allows remote clients to:
 
 import json
 import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
 from typing import AsyncGenerator, Optional
 from datetime import datetime
 from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from .mcp_server import get_agents, get_storage, setup_default_agents
+from .mcp_server import (
+    get_agents, get_agents_version, get_research_orchestrator, setup_default_agents
+)
+
+try:
+    import orjson  # Optional: faster JSON encoding for SSE frames
+except ImportError:
+    orjson = None
 
 
 router = APIRouter(prefix="/sse", tags=["SSE"])
 
 
-# Event queue for broadcasting
-_event_queues: dict[str, asyncio.Queue] = {}
+# Connected clients, by client id
+_clients: dict[str, "SSEClient"] = {}
+
+# Same clients as an immutable tuple, rebuilt on connect/disconnect
+# (copy-on-write): broadcasts read it without copying, and the batches
+# still pending keep a consistent snapshot
+_subs: tuple["SSEClient", ...] = ()
+
+# Recent broadcast frames, stored once and read by every client through
+# its own cursor, and the sequence number of the newest one
+RING_SIZE = 1024
+_ring: deque[bytes] = deque(maxlen=RING_SIZE)
+_seq: int = 0
+
+# Seconds between keepalive pings, sent whether or not events are flowing
+KEEPALIVE_SECONDS = 15.0
+
+# Clients woken per event loop iteration when broadcasting
+BROADCAST_BATCH = 50
+
+
+if orjson is not None:
+    # Datetimes go through default=str like the stdlib fallback, so the
+    # frames are identical whichever encoder is installed
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _dumps(data) -> bytes:
+        return orjson.dumps(data, default=str, option=_ORJSON_OPTIONS)
+else:
+    def _dumps(data) -> bytes:
+        return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+# Frame layouts, filled with bytes.__mod__: one allocation per frame, and
+# the payload is copied once instead of once per concatenation
+_FRAME = b"event: %b\ndata: %b\n\n"
+_FRAME_WITH_ID = b"id: %b\nevent: %b\ndata: %b\n\n"
+
+
+def sse_frame(event: str, data, id: Optional[str] = None) -> bytes:
+    """
+    Build a UTF-8 encoded SSE frame.
+
+    StreamingResponse writes bytes chunks as-is, so frames are encoded
+    once here. The payload is compact JSON (orjson when available) and
+    default=str covers datetimes without a separate conversion pass.
+    """
+    if id:
+        return _FRAME_WITH_ID % (id.encode("utf-8"), event.encode("utf-8"), _dumps(data))
+    return _FRAME % (event.encode("utf-8"), _dumps(data))
+
+
+def sse_json_frame(event: str, data: bytes) -> bytes:
+    """
+    Build an SSE frame around an already serialized JSON payload.
+
+    Lets pydantic models go straight through pydantic-core's to_json()
+    instead of being dumped to a dict and encoded a second time.
+    """
+    return _FRAME % (event.encode("utf-8"), data)
+
+
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+}
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    StreamingResponse preset for Server-Sent Events.
+
+    Sets the text/event-stream media type and the headers that keep
+    proxies from caching or buffering the stream (X-Accel-Buffering for
+    nginx). Frames are written as the generator yields them: they are
+    already encoded by sse_frame/sse_json_frame.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content, headers: Optional[dict] = None, **kwargs):
+        super().__init__(content, headers={**_SSE_HEADERS, **(headers or {})}, **kwargs)
+
+
+class SSEBus:
+    """
+    Event buffer for a single task/pipeline stream with exactly one consumer.
+
+    Items are (tag, payload) tuples, the payload being the event data or
+    an already encoded frame. A bounded deque plus an Event replaces
+    asyncio.Queue, which keeps getter and putter futures around for a
+    multi-consumer case we never have. When the buffer is full the oldest
+    event is dropped. Producers that track completion separately (e.g. a
+    future) can wake the consumer through wake() without queuing anything.
+    """
+
+    __slots__ = ("q", "ev")
+
+    def __init__(self, maxlen: int = 100):
+        self.q: deque[tuple] = deque(maxlen=maxlen)
+        self.ev = asyncio.Event()
+
+    def put_nowait(self, item: tuple) -> None:
+        self.q.append(item)
+        self.ev.set()
+
+    def wake(self, *_) -> None:
+        """Wake the consumer without queuing anything (usable as a done callback)."""
+        self.ev.set()
+
+    async def wait(self) -> None:
+        """Wait until an event is buffered or wake() is called."""
+        if not self.q:
+            self.ev.clear()
+            await self.ev.wait()
+
+
+class TTLStore:
+    """
+    Per-task store whose entries expire after max_age seconds.
+
+    Used for results and event buses that would otherwise pile up in plain
+    dicts when a client never connects or never collects them. Entries are
+    kept in insertion order with their creation time, so each write first
+    pops the expired entries from the front: memory stays bounded by
+    max_age * tasks/s without a background sweeper task. With max_items
+    set, the oldest entries are also evicted once the store is full, which
+    caps memory during bursts as well.
+    """
+
+    __slots__ = ("_items", "max_age", "max_items")
+
+    def __init__(self, max_age: float = 3600.0, max_items: Optional[int] = None):
+        self._items: dict[str, tuple[float, object]] = {}
+        self.max_age = max_age
+        self.max_items = max_items
+
+    def sweep(self) -> None:
+        """Drop the entries older than max_age."""
+        cutoff = time.monotonic() - self.max_age
+        items = self._items
+        while items:
+            oldest = next(iter(items))
+            if items[oldest][0] >= cutoff:
+                break
+            del items[oldest]
+
+    def __setitem__(self, key: str, value) -> None:
+        self.sweep()
+        items = self._items
+        # Re-inserting moves the key to the end, keeping creation order
+        items.pop(key, None)
+        if self.max_items is not None:
+            while len(items) >= self.max_items:
+                del items[next(iter(items))]
+        items[key] = (time.monotonic(), value)
+
+    def __getitem__(self, key: str):
+        return self._items[key][1]
+
+    def __delitem__(self, key: str) -> None:
+        del self._items[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str, default=None):
+        entry = self._items.get(key)
+        return entry[1] if entry is not None else default
 
 
 class ToolCallRequest(BaseModel):
@@ -31,59 +213,133 @@ class ToolCallRequest(BaseModel):
     params: dict = {}
 
 
-class SSEEvent(BaseModel):
-    """Server-Sent Event structure."""
+@dataclass(frozen=True, slots=True)
+class SSEEvent:
+    """
+    Server-Sent Event structure.
+
+    Only built internally and never parsed from requests, so a plain
+    dataclass: no validation on construction and no per-instance dict.
+    Frozen: an event is encoded once and never changed.
+    """
+
     event: str
     data: dict
     id: Optional[str] = None
 
-    def format(self) -> str:
-        """Format as SSE string."""
-        lines = []
-        if self.id:
-            lines.append(f"id: {self.id}")
-        lines.append(f"event: {self.event}")
-        lines.append(f"data: {json.dumps(self.data)}")
-        lines.append("")  # Empty line to end event
-        return "\n".join(lines) + "\n"
+    def format(self) -> bytes:
+        """Format as an SSE frame, already UTF-8 encoded."""
+        return sse_frame(self.event, self.data, self.id)
+
+
+class SSEClient:
+    """
+    A connected /sse/events client.
+
+    Frames stay in the shared ring: the client only keeps the sequence
+    number of the last frame it sent and an Event to be woken with.
+    """
+
+    __slots__ = ("cursor", "ev")
+
+    def __init__(self, cursor: int):
+        self.cursor = cursor
+        self.ev = asyncio.Event()
+
+    def take(self) -> list[bytes]:
+        """Pop the frames broadcast since the last call."""
+        # A client more than RING_SIZE frames behind loses the oldest ones
+        missed = min(_seq - self.cursor, len(_ring))
+        self.cursor = _seq
+        return list(islice(_ring, len(_ring) - missed, None))
+
+
+# Keepalive task shared by all clients, running while any is connected
+_pinger: Optional[asyncio.Task] = None
+
+
+async def _keepalive() -> None:
+    """Broadcast one ping frame every KEEPALIVE_SECONDS."""
+    while True:
+        await asyncio.sleep(KEEPALIVE_SECONDS)
+        broadcast_event(SSEEvent(
+            event="ping",
+            data={"timestamp": datetime.now().isoformat()}
+        ))
+
+
+def _start_pinger() -> None:
+    """Start the keepalive task unless it already runs on this loop."""
+    global _pinger
+    if _pinger is None or _pinger.done() or _pinger.get_loop() is not asyncio.get_running_loop():
+        _pinger = asyncio.create_task(_keepalive())
+
 
+def _stop_pinger() -> None:
+    """Stop the keepalive task once the last client is gone."""
+    global _pinger
+    if not _clients and _pinger is not None:
+        _pinger.cancel()
+        _pinger = None
 
-async def event_generator(client_id: str) -> AsyncGenerator[str, None]:
+
+async def event_generator(client_id: str) -> AsyncGenerator[bytes, None]:
     """Generate SSE events for a client."""
-    queue = asyncio.Queue()
-    _event_queues[client_id] = queue
+    global _subs
+    client = SSEClient(_seq)
+    _clients[client_id] = client
+    _subs = tuple(_clients.values())
+    # One ping per tick for all clients, from a single task: no timer per
+    # client or per event, and the cadence holds under steady traffic
+    _start_pinger()
 
     try:
         # Send initial connection event
-        yield SSEEvent(
-            event="connected",
-            data={"client_id": client_id, "timestamp": datetime.now().isoformat()}
-        ).format()
+        yield sse_frame(
+            "connected",
+            {"client_id": client_id, "timestamp": datetime.now().isoformat()}
+        )
 
-        # Keep connection alive and send events
+        # Forward pending frames (events and pings) as a single write
         while True:
-            try:
-                # Wait for event with timeout (for keep-alive)
-                event = await asyncio.wait_for(queue.get(), timeout=30.0)
-                yield event.format()
-            except asyncio.TimeoutError:
-                # Send keep-alive ping
-                yield SSEEvent(
-                    event="ping",
-                    data={"timestamp": datetime.now().isoformat()}
-                ).format()
+            await client.ev.wait()
+            client.ev.clear()
+            frames = client.take()
+            if frames:
+                yield b"".join(frames)
     finally:
         # Cleanup on disconnect
-        _event_queues.pop(client_id, None)
+        if _clients.get(client_id) is client:
+            del _clients[client_id]
+            _subs = tuple(_clients.values())
+        _stop_pinger()
 
 
 def broadcast_event(event: SSEEvent) -> None:
     """Broadcast an event to all connected clients."""
-    for queue in _event_queues.values():
-        try:
-            queue.put_nowait(event)
-        except asyncio.QueueFull:
-            pass  # Skip if queue is full
+    global _seq
+    if not _subs:
+        return
+
+    # Encoded and stored once, whatever the number of clients
+    _ring.append(event.format())
+    _seq += 1
+    _wake_batched(_subs)
+
+
+def _wake_batched(clients: tuple, start: int = 0) -> None:
+    """
+    Wake BROADCAST_BATCH clients, then reschedule for the rest.
+
+    Yielding to the loop between batches keeps a large fan-out from
+    stalling other requests. A woken client reads every frame it has not
+    sent yet, so events still arrive in broadcast order.
+    """
+    end = start + BROADCAST_BATCH
+    for client in clients[start:end]:
+        client.ev.set()
+    if end < len(clients):
+        asyncio.get_running_loop().call_soon(_wake_batched, clients, end)
 
 
 @router.get("/events")
@@ -95,21 +351,13 @@ async def sse_events(request: Request):
 
     Events:
     - connected: Initial connection confirmation
-    - ping: Keep-alive (every 30s)
+    - ping: Keep-alive (every 15s)
     - tool_result: Result from tool call
     - agent_message: Message from an agent
     """
     client_id = f"client-{id(request)}"
 
-    return StreamingResponse(
-        event_generator(client_id),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
-        }
-    )
+    return EventStreamResponse(event_generator(client_id))
 
 
 @router.post("/call")
@@ -124,23 +372,16 @@ async def call_tool(request: ToolCallRequest):
     tool_name = request.tool
     params = request.params
 
-    # Available tools
-    tools = {
-        "list_agents": _call_list_agents,
-        "send_message": _call_send_message,
-        "research": _call_research,
-        "get_agent_state": _call_get_agent_state,
-    }
-
-    if tool_name not in tools:
+    tool = _TOOLS.get(tool_name)
+    if tool is None:
         return {
             "error": "tool_not_found",
-            "available_tools": list(tools.keys())
+            "available_tools": list(_TOOLS)
         }
 
     # Call the tool
     try:
-        result = await tools[tool_name](params)
+        result = await tool(params)
 
         # Broadcast result to SSE clients
         broadcast_event(SSEEvent(
@@ -161,17 +402,26 @@ async def call_tool(request: ToolCallRequest):
 
 # Tool implementations
 
+# Agent listing and the registry version it was built from
+_agents_snapshot: tuple[int, dict] = (-1, {})
+
+
 async def _call_list_agents(params: dict) -> dict:
-    """List all agents."""
-    agents = get_agents()
-    return {
-        agent_id: {
-            "name": agent.name,
-            "description": agent.config.description,
-            "capabilities": agent.config.capabilities
+    """List all agents (rebuilt only when the registry changes)."""
+    global _agents_snapshot
+    version = get_agents_version()
+    cached_version, snapshot = _agents_snapshot
+    if cached_version != version:
+        snapshot = {
+            agent_id: {
+                "name": agent.name,
+                "description": agent.config.description,
+                "capabilities": agent.config.capabilities
+            }
+            for agent_id, agent in get_agents().items()
         }
-        for agent_id, agent in agents.items()
-    }
+        _agents_snapshot = (version, snapshot)
+    return snapshot
 
 
 async def _call_send_message(params: dict) -> dict:
@@ -214,13 +464,11 @@ async def _call_send_message(params: dict) -> dict:
 
 async def _call_research(params: dict) -> dict:
     """Perform research query."""
-    from agents.research import OrchestratorAgent
-
     query = params.get("query", "")
-    storage = get_storage()
-    orchestrator = OrchestratorAgent(storage)
 
-    result = await orchestrator.research(query)
+    # The searches are awaited concurrently and the merge is light: reuse
+    # the shared orchestrator instead of building it and its agents per call
+    result = await get_research_orchestrator().research(query)
 
     return result.model_dump()
 
@@ -241,10 +489,19 @@ async def _call_get_agent_state(params: dict) -> dict:
     return state
 
 
+# Available tools, built once rather than on every /sse/call
+_TOOLS = {
+    "list_agents": _call_list_agents,
+    "send_message": _call_send_message,
+    "research": _call_research,
+    "get_agent_state": _call_get_agent_state,
+}
+
+
 @router.get("/status")
 async def sse_status():
     """Get SSE connection status."""
     return {
-        "connected_clients": len(_event_queues),
-        "client_ids": list(_event_queues.keys())
+        "connected_clients": len(_clients),
+        "client_ids": list(_clients.keys())
     }
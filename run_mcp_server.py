@@ -8,6 +8,8 @@ Uso:
 Env vars:
     HOST: Host to bind (default: 127.0.0.1)
     PORT: Port to bind (default: 8000)
+    UVICORN_LOOP: Event loop for the API server: auto, uvloop, asyncio
+        (default: auto, i.e. uvloop when installed)
 """
 
 import os
@@ -22,15 +24,18 @@ def main():
 
         host = os.environ.get("HOST", "127.0.0.1")
         port = int(os.environ.get("PORT", "8000"))
+        loop = os.environ.get("UVICORN_LOOP", "auto")
 
         print(f"[API] Avvio server FastAPI su http://{host}:{port}")
         print(f"[API] Docs disponibili su http://{host}:{port}/docs")
-        uvicorn.run(app, host=host, port=port)
+        uvicorn.run(app, host=host, port=port, loop=loop)
     else:
         # Avvia MCP (default)
-        from protocol.mcp_server import mcp, setup_default_agents
+        from protocol.mcp_server import freeze_gc, mcp, setup_default_agents, use_uvloop
 
         setup_default_agents()
+        freeze_gc()
+        use_uvloop()
         print("[MCP] Avvio server MCP (stdio mode)")
         mcp.run()
 
@@ -1,5 +1,5 @@
 """Storage module."""
-from .base import StorageBase, Message, ConversationLog
+from .base import StorageBase, Message, ConversationLog, conversation_summary
 from .memory import MemoryStorage
 from .file import FileStorage
 from .postgres import PostgresStorage
@@ -8,6 +8,7 @@ __all__ = [
     "StorageBase",
     "Message",
     "ConversationLog",
+    "conversation_summary",
     "MemoryStorage",
     "FileStorage",
     "PostgresStorage",
@@ -7,6 +7,7 @@ Usando un'interfaccia astratta, possiamo cambiare implementazione
 """
 
 from abc import ABC, abstractmethod
+from functools import cached_property
 from typing import Any
 from datetime import datetime
 from pydantic import BaseModel
@@ -21,6 +22,11 @@ class Message(BaseModel):
     timestamp: datetime
     metadata: dict = {}   # Dati extra (es. permessi del caller)
 
+    @cached_property
+    def timestamp_iso(self) -> str:
+        """Timestamp in formato ISO, calcolato una volta (il timestamp non cambia)."""
+        return self.timestamp.isoformat()
+
 
 class ConversationLog(BaseModel):
     """Log di una conversazione tra agenti."""
@@ -29,6 +35,26 @@ class ConversationLog(BaseModel):
     participants: list[str] = []
     created_at: datetime
 
+    @cached_property
+    def created_at_iso(self) -> str:
+        """Data di creazione in formato ISO, calcolata una volta."""
+        return self.created_at.isoformat()
+
+
+def conversation_summary(
+    conversation_id: str,
+    participants: list[str],
+    message_count: int,
+    created_at: datetime
+) -> dict[str, Any]:
+    """Riepilogo di una conversazione, con gli stessi campi per API e MCP."""
+    return {
+        "id": conversation_id,
+        "participants": participants,
+        "message_count": message_count,
+        "created_at": created_at.isoformat()
+    }
+
 
 class StorageBase(ABC):
     """
@@ -42,6 +68,16 @@ class StorageBase(ABC):
         """Salva un messaggio."""
         pass
 
+    async def save_messages(self, messages: list[Message]) -> None:
+        """
+        Salva più messaggi in ordine.
+
+        Di default uno alla volta; gli storage che possono scriverli in
+        blocco (es. un database) ridefiniscono questo metodo.
+        """
+        for message in messages:
+            await self.save_message(message)
+
     @abstractmethod
     async def get_messages(self, conversation_id: str) -> list[Message]:
         """Recupera tutti i messaggi di una conversazione."""
@@ -57,6 +93,17 @@ class StorageBase(ABC):
         """Salva lo stato di un agente."""
         pass
 
+    async def list_conversations(self) -> list[dict[str, Any]]:
+        """
+        Riepilogo di tutte le conversazioni (vedi conversation_summary).
+
+        Di default non supportato: lo ridefiniscono solo gli storage che
+        hanno un elenco completo, senza bloccare l'event loop.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} non supporta l'elenco delle conversazioni"
+        )
+
     @abstractmethod
     async def create_conversation(self, participants: list[str]) -> str:
         """Crea una nuova conversazione, ritorna l'ID."""
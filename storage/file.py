@@ -9,30 +9,86 @@ Persiste i dati su file JSON per:
 Struttura:
     base_path/
     ├── conversations/
-    │   └── {conv_id}.json
+    │   ├── {conv_id}.json    # intestazione (partecipanti, data di creazione)
+    │   └── {conv_id}.jsonl   # messaggi, uno per riga, solo in append
     └── states/
         └── {agent_id}.json
 """
 
 import json
+import logging
+import os
 import uuid
 import asyncio
+import weakref
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-from .base import StorageBase, Message, ConversationLog
+from .base import StorageBase, Message, ConversationLog, conversation_summary
+
+try:
+    import orjson  # Optional: faster JSON encoding/decoding of the files
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger("a2a.storage")
+
+
+def _serialize_datetime(obj: Any) -> Any:
+    """JSON serializer for datetime objects."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+if orjson is not None:
+    # orjson encodes datetimes natively, in the same ISO format
+    _ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+    def _dumps(data: Any) -> bytes:
+        return orjson.dumps(data, default=_serialize_datetime, option=_ORJSON_OPTIONS)
+
+    _loads = orjson.loads
+else:
+    def _dumps(data: Any) -> bytes:
+        return json.dumps(
+            data, indent=2, ensure_ascii=False, default=_serialize_datetime
+        ).encode("utf-8")
+
+    _loads = json.loads
+
+
+def _log_flush_error(task: asyncio.Task) -> None:
+    """Report a failed background flush instead of leaving it unretrieved."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background state flush failed", exc_info=task.exception())
 
 
 class FileStorage(StorageBase):
     """
     Storage su filesystem con file JSON.
 
-    Thread-safe per operazioni async tramite lock.
+    L'I/O su file gira in un thread (asyncio.to_thread), così l'event loop
+    non si blocca sul disco. Le scritture sono serializzate da un lock per
+    conversazione o per agente: file diversi si scrivono in parallelo.
+    Ogni file è riscritto in modo atomico (file temporaneo + os.replace),
+    quindi una lettura concorrente non vede mai un file scritto a metà.
+
+    Gli aggiornamenti di stato restano in memoria per state_flush_delay
+    secondi e poi vanno su disco insieme. Chiudere lo storage con close()
+    (o usarlo come async context manager) è obbligatorio: gli aggiornamenti
+    ancora in attesa all'uscita dell'interprete vanno persi.
+
+    Uso:
+        async with await FileStorage.create("data") as storage:
+            await storage.save_agent_state("agent-1", {"count": 1})
     """
 
-    def __init__(self, base_path: Path | str = "data"):
+    def __init__(self, base_path: Path | str = "data", state_flush_delay: float = 0.05):
         self.base_path = Path(base_path)
+        self.state_flush_delay = state_flush_delay
         self._conversations_path = self.base_path / "conversations"
         self._states_path = self.base_path / "states"
 
@@ -40,44 +96,103 @@ class FileStorage(StorageBase):
         self._conversations_path.mkdir(parents=True, exist_ok=True)
         self._states_path.mkdir(parents=True, exist_ok=True)
 
-        # Lock for file operations
-        self._lock = asyncio.Lock()
+        # Lock per file: conv_id -> Lock, agent_id -> Lock. Riferimenti
+        # deboli: un lock senza più nessuno che lo usa o lo attende sparisce,
+        # invece di restare per sempre (e legato al suo event loop)
+        self._conv_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        self._state_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+
+        # Stati non ancora scritti (agent_id -> chiavi aggiornate) e il
+        # flush programmato che li scriverà
+        self._pending_state: dict[str, dict[str, Any]] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    @classmethod
+    async def create(cls, base_path: Path | str = "data", **kwargs: Any) -> "FileStorage":
+        """
+        Crea lo storage da codice async.
+
+        Il costruttore crea le directory con mkdir, una syscall bloccante
+        (lenta su NFS/FUSE): qui gira in un thread, fuori dall'event loop.
+        """
+        return await asyncio.to_thread(cls, base_path, **kwargs)
+
+    async def close(self) -> None:
+        """Scrive gli stati ancora in attesa: da chiamare allo shutdown."""
+        await self.flush()
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit: flush pending state."""
+        await self.close()
+
+    @staticmethod
+    def _lock(locks: weakref.WeakValueDictionary, key: str) -> asyncio.Lock:
+        """Lock for a file, created on first use and held by its users only."""
+        lock = locks.get(key)
+        if lock is None:
+            lock = locks[key] = asyncio.Lock()
+        return lock
 
     def _conv_file(self, conv_id: str) -> Path:
-        """Path to conversation file."""
+        """Path to conversation header file."""
         return self._conversations_path / f"{conv_id}.json"
 
+    def _conv_log_file(self, conv_id: str) -> Path:
+        """Path to conversation message log (JSON Lines)."""
+        return self._conversations_path / f"{conv_id}.jsonl"
+
     def _state_file(self, agent_id: str) -> Path:
         """Path to agent state file."""
         return self._states_path / f"{agent_id}.json"
 
-    def _serialize_datetime(self, obj: Any) -> Any:
-        """JSON serializer for datetime objects."""
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        """Write JSON atomically: readers see the old file or the new one."""
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(_dumps(data))
+        os.replace(tmp, path)
+
+    def _read_state(self, agent_id: str) -> dict[str, Any]:
+        """Load agent state from file."""
+        path = self._state_file(agent_id)
+        if not path.exists():
+            return {}
+
+        return _loads(path.read_bytes())
+
+    def _merge_state(self, agent_id: str, updates: dict[str, Any]) -> None:
+        """Merge updates into the agent state file."""
+        current = self._read_state(agent_id)
+        current.update(updates)
+        self._write_json(self._state_file(agent_id), current)
 
     def _load_conversation(self, conv_id: str) -> ConversationLog | None:
-        """Load conversation from file."""
+        """Load conversation header and messages from file."""
         path = self._conv_file(conv_id)
         if not path.exists():
             return None
 
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Reconstruct messages
-        messages = [
-            Message(
-                id=m["id"],
-                sender=m["sender"],
-                receiver=m["receiver"],
-                content=m["content"],
-                timestamp=datetime.fromisoformat(m["timestamp"]),
-                metadata=m.get("metadata", {})
-            )
-            for m in data.get("messages", [])
-        ]
+        data = _loads(path.read_bytes())
+
+        # Files written before the message log keep their messages inline
+        messages = [Message.model_validate(m) for m in data.get("messages", [])]
+
+        log_path = self._conv_log_file(conv_id)
+        if log_path.exists():
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    # A line without newline is an append still in progress
+                    if not line.endswith("\n"):
+                        break
+                    messages.append(Message.model_validate_json(line))
 
         return ConversationLog(
             conversation_id=data["conversation_id"],
@@ -87,90 +202,149 @@ class FileStorage(StorageBase):
         )
 
     def _save_conversation(self, conv: ConversationLog) -> None:
-        """Save conversation to file."""
+        """Save conversation header to file (messages go to the log)."""
         path = self._conv_file(conv.conversation_id)
 
         data = {
             "conversation_id": conv.conversation_id,
             "participants": conv.participants,
-            "created_at": conv.created_at.isoformat(),
-            "messages": [
-                {
-                    "id": m.id,
-                    "sender": m.sender,
-                    "receiver": m.receiver,
-                    "content": m.content,
-                    "timestamp": m.timestamp.isoformat(),
-                    "metadata": m.metadata
-                }
-                for m in conv.messages
-            ]
+            "created_at": conv.created_at_iso
         }
 
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self._write_json(path, data)
 
-    async def create_conversation(self, participants: list[str]) -> str:
-        """Crea una nuova conversazione tra i partecipanti."""
-        async with self._lock:
-            conv_id = str(uuid.uuid4())[:8]
+    def _append_message(self, conv_id: str, message: Message) -> None:
+        """Append one message to the conversation log: O(1) bytes per message."""
+        line = message.model_dump_json() + "\n"
+        with open(self._conv_log_file(conv_id), "a", encoding="utf-8") as f:
+            f.write(line)
 
-            conv = ConversationLog(
+    def _store_message(self, conv_id: str, message: Message) -> None:
+        """Append a message, creating the conversation if it does not exist."""
+        if not self._conv_file(conv_id).exists():
+            # Create new conversation
+            conv_id = str(uuid.uuid4())[:8]
+            self._save_conversation(ConversationLog(
                 conversation_id=conv_id,
-                participants=participants,
+                participants=[message.sender, message.receiver],
                 created_at=datetime.now()
-            )
+            ))
+
+        self._append_message(conv_id, message)
+
+    async def create_conversation(self, participants: list[str]) -> str:
+        """Crea una nuova conversazione tra i partecipanti."""
+        # ID nuovo: nessun altro scrive questo file, non serve il lock
+        conv_id = str(uuid.uuid4())[:8]
+
+        conv = ConversationLog(
+            conversation_id=conv_id,
+            participants=participants,
+            created_at=datetime.now()
+        )
 
-            self._save_conversation(conv)
-            print(f"[FileStorage] Creata conversazione {conv_id} tra {participants}")
-            return conv_id
+        await asyncio.to_thread(self._save_conversation, conv)
+        print(f"[FileStorage] Creata conversazione {conv_id} tra {participants}")
+        return conv_id
 
     async def save_message(self, message: Message) -> None:
         """Salva un messaggio nella conversazione."""
-        async with self._lock:
-            conv_id = message.metadata.get("conversation_id", "default")
+        conv_id = message.metadata.get("conversation_id", "default")
 
-            conv = self._load_conversation(conv_id)
-            if conv is None:
-                # Create new conversation
-                conv_id = str(uuid.uuid4())[:8]
-                conv = ConversationLog(
-                    conversation_id=conv_id,
-                    participants=[message.sender, message.receiver],
-                    created_at=datetime.now()
-                )
-
-            conv.messages.append(message)
-            self._save_conversation(conv)
+        async with self._lock(self._conv_locks, conv_id):
+            await asyncio.to_thread(self._store_message, conv_id, message)
             print(f"[FileStorage] Salvato messaggio da {message.sender} a {message.receiver}")
 
     async def get_messages(self, conversation_id: str) -> list[Message]:
         """Recupera tutti i messaggi di una conversazione."""
-        conv = self._load_conversation(conversation_id)
+        conv = await asyncio.to_thread(self._load_conversation, conversation_id)
         if conv is None:
             return []
         return conv.messages
 
     async def get_agent_state(self, agent_id: str) -> dict[str, Any]:
-        """Recupera lo stato di un agente."""
-        path = self._state_file(agent_id)
-        if not path.exists():
-            return {}
-
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        """Recupera lo stato di un agente (file + aggiornamenti non ancora scritti)."""
+        # Il flush toglie un agente dai pendenti solo con il suo lock:
+        # letti sotto lock, file e pendenti sono coerenti tra loro
+        async with self._lock(self._state_locks, agent_id):
+            state = await asyncio.to_thread(self._read_state, agent_id)
+            state.update(self._pending_state.get(agent_id, {}))
+        return state
 
     async def save_agent_state(self, agent_id: str, state: dict[str, Any]) -> None:
-        """Salva lo stato di un agente (merge con esistente)."""
-        async with self._lock:
-            current = await self.get_agent_state(agent_id)
-            current.update(state)
+        """
+        Salva lo stato di un agente (merge con esistente).
+
+        Il merge avviene in memoria; la scrittura è rimandata di
+        state_flush_delay secondi, così una raffica di aggiornamenti
+        costa una sola scrittura per agente.
+        """
+        self._pending_state.setdefault(agent_id, {}).update(state)
+
+        # Un task concluso, o legato a un altro event loop, non scriverà
+        # più nulla: ne serve uno nuovo
+        task = self._flush_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._flush_task = asyncio.create_task(self._flush_later())
+            self._flush_task.add_done_callback(_log_flush_error)
+
+        print(f"[FileStorage] Aggiornato stato di {agent_id}: {list(state.keys())}")
+
+    async def _flush_later(self) -> None:
+        """Scrive gli stati in attesa allo scadere della finestra di debounce."""
+        await asyncio.sleep(self.state_flush_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Scrive su disco tutti gli stati in attesa."""
+        # Gli aggiornamenti che arrivano da qui in poi programmano un nuovo flush
+        task, self._flush_task = self._flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+        for agent_id in list(self._pending_state):
+            async with self._lock(self._state_locks, agent_id):
+                updates = self._pending_state.pop(agent_id, None)
+                if not updates:
+                    continue
+                try:
+                    await asyncio.to_thread(self._merge_state, agent_id, updates)
+                except BaseException:
+                    # Rimessi tra i pendenti (sotto quelli più recenti): li
+                    # riprova il prossimo flush
+                    self._pending_state[agent_id] = {
+                        **updates, **self._pending_state.get(agent_id, {})
+                    }
+                    raise
+
+    def _summarize_conversation(self, path: Path) -> dict[str, Any]:
+        """Summary from the header file: log lines are counted, not parsed."""
+        data = _loads(path.read_bytes())
+        count = len(data.get("messages", []))
+
+        log_path = self._conv_log_file(data["conversation_id"])
+        if log_path.exists():
+            with open(log_path, "rb") as f:
+                # A line without newline is an append still in progress
+                count += sum(1 for line in f if line.endswith(b"\n"))
+
+        return conversation_summary(
+            data["conversation_id"],
+            data["participants"],
+            count,
+            datetime.fromisoformat(data["created_at"])
+        )
 
-            path = self._state_file(agent_id)
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(current, f, indent=2, default=self._serialize_datetime)
+    def _summarize_conversations(self) -> list[dict[str, Any]]:
+        """Summaries of all conversations on disk (blocking I/O)."""
+        return [
+            self._summarize_conversation(path)
+            for path in self._conversations_path.glob("*.json")
+        ]
 
-            print(f"[FileStorage] Aggiornato stato di {agent_id}: {list(state.keys())}")
+    async def list_conversations(self) -> list[dict[str, Any]]:
+        """Riepilogo delle conversazioni, letto dai file in un thread."""
+        return await asyncio.to_thread(self._summarize_conversations)
 
     def get_all_conversations(self) -> dict[str, ConversationLog]:
         """Utility: ritorna tutte le conversazioni."""
@@ -187,6 +361,7 @@ class FileStorage(StorageBase):
         result = {}
         for path in self._states_path.glob("*.json"):
             agent_id = path.stem
-            with open(path, "r", encoding="utf-8") as f:
-                result[agent_id] = json.load(f)
+            result[agent_id] = _loads(path.read_bytes())
+        for agent_id, updates in self._pending_state.items():
+            result.setdefault(agent_id, {}).update(updates)
         return result
@@ -11,10 +11,11 @@ estendere con FileStorage o DatabaseStorage.
 """
 
 import uuid
+from collections import deque
 from datetime import datetime
 from typing import Any
 
-from .base import StorageBase, Message, ConversationLog
+from .base import StorageBase, Message, ConversationLog, conversation_summary
 
 
 class MemoryStorage(StorageBase):
@@ -24,21 +25,35 @@ class MemoryStorage(StorageBase):
     Struttura interna:
     - conversations: {conv_id: ConversationLog}
     - agent_states: {agent_id: {key: value}}
+    - by_participants: {frozenset(partecipanti): conv_id più recente}
+
+    I messaggi di ogni conversazione stanno in una deque limitata a
+    max_messages, tenuta a parte in msgs: {conv_id: deque[Message]}.
+    Append O(1) e memoria limitata anche per conversazioni lunghissime
+    (i messaggi più vecchi vengono scartati), mentre ConversationLog
+    resta il modello di sempre con messages come lista.
     """
 
-    def __init__(self):
+    def __init__(self, max_messages: int = 10_000):
         self._conversations: dict[str, ConversationLog] = {}
         self._agent_states: dict[str, dict[str, Any]] = {}
+        self._msgs: dict[str, deque[Message]] = {}
+        # Indice per i messaggi senza conversazione nota: lookup O(1)
+        self._by_participants: dict[frozenset[str], str] = {}
+        self.max_messages = max_messages
 
     async def create_conversation(self, participants: list[str]) -> str:
         """Crea una nuova conversazione tra i partecipanti."""
         conv_id = str(uuid.uuid4())[:8]  # ID corto per leggibilità
 
-        self._conversations[conv_id] = ConversationLog(
+        conv = ConversationLog(
             conversation_id=conv_id,
             participants=participants,
             created_at=datetime.now()
         )
+        self._conversations[conv_id] = conv
+        self._msgs[conv_id] = deque(maxlen=self.max_messages)
+        self._by_participants[frozenset(participants)] = conv_id
 
         print(f"[Storage] Creata conversazione {conv_id} tra {participants}")
         return conv_id
@@ -49,17 +64,21 @@ class MemoryStorage(StorageBase):
         conv_id = message.metadata.get("conversation_id", "default")
 
         if conv_id not in self._conversations:
-            await self.create_conversation([message.sender, message.receiver])
-            conv_id = list(self._conversations.keys())[-1]
-
-        self._conversations[conv_id].messages.append(message)
+            # Riusa la conversazione tra gli stessi partecipanti, se c'è
+            conv_id = self._by_participants.get(
+                frozenset((message.sender, message.receiver))
+            )
+            if conv_id is None:
+                conv_id = await self.create_conversation(
+                    [message.sender, message.receiver]
+                )
+
+        self._msgs[conv_id].append(message)
         print(f"[Storage] Salvato messaggio da {message.sender} a {message.receiver}")
 
     async def get_messages(self, conversation_id: str) -> list[Message]:
         """Recupera tutti i messaggi di una conversazione."""
-        if conversation_id not in self._conversations:
-            return []
-        return self._conversations[conversation_id].messages
+        return list(self._msgs.get(conversation_id, ()))
 
     async def get_agent_state(self, agent_id: str) -> dict[str, Any]:
         """Recupera lo stato di un agente."""
@@ -73,9 +92,26 @@ class MemoryStorage(StorageBase):
         self._agent_states[agent_id].update(state)
         print(f"[Storage] Aggiornato stato di {agent_id}: {list(state.keys())}")
 
+    async def list_conversations(self) -> list[dict[str, Any]]:
+        """Riepilogo delle conversazioni, senza copiare i messaggi."""
+        return [
+            conversation_summary(
+                conv_id,
+                conv.participants,
+                len(self._msgs.get(conv_id, ())),
+                conv.created_at
+            )
+            for conv_id, conv in self._conversations.items()
+        ]
+
     def get_all_conversations(self) -> dict[str, ConversationLog]:
-        """Utility per debug: vedi tutte le conversazioni."""
-        return self._conversations
+        """Utility per debug: vedi tutte le conversazioni (con i messaggi in lista)."""
+        return {
+            conv_id: conv.model_copy(
+                update={"messages": list(self._msgs.get(conv_id, ()))}
+            )
+            for conv_id, conv in self._conversations.items()
+        }
 
     def get_all_states(self) -> dict[str, dict]:
         """Utility per debug: vedi tutti gli stati."""
@@ -13,7 +13,35 @@ import json
 from datetime import datetime
 from typing import Any, Optional
 
-from .base import StorageBase, Message, ConversationLog
+from .base import StorageBase, Message, ConversationLog, conversation_summary
+
+try:
+    import orjson  # Optional: faster encoding/decoding of the JSONB columns
+except ImportError:
+    orjson = None
+
+
+# JSONB codec installed on every pooled connection (text wire format)
+if orjson is not None:
+    def _dumps(data: Any) -> str:
+        return orjson.dumps(data).decode("utf-8")
+
+    _loads = orjson.loads
+else:
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Conversations referenced by a message are created on the fly, if missing
+_INSERT_CONVERSATION = """
+    INSERT INTO conversations (id, participants, created_at)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (id) DO NOTHING
+"""
+
+_INSERT_MESSAGE = """
+    INSERT INTO messages (id, conversation_id, sender, receiver, content, timestamp, metadata)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+"""
 
 
 class PostgresStorage(StorageBase):
@@ -60,10 +88,18 @@ class PostgresStorage(StorageBase):
         self._pool = await asyncpg.create_pool(
             self._connection_url,
             min_size=self._min_pool_size,
-            max_size=self._max_pool_size
+            max_size=self._max_pool_size,
+            init=self._init_connection
         )
         print(f"[PostgresStorage] Connected to database")
 
+    @staticmethod
+    async def _init_connection(conn) -> None:
+        """Exchange JSONB columns as Python objects instead of JSON strings."""
+        await conn.set_type_codec(
+            "jsonb", encoder=_dumps, decoder=_loads, schema="pg_catalog"
+        )
+
     async def disconnect(self) -> None:
         """Close connection pool."""
         if self._pool:
@@ -134,41 +170,74 @@ class PostgresStorage(StorageBase):
     async def save_message(self, message: Message) -> None:
         """Save a message."""
         conv_id = message.metadata.get("conversation_id")
+        self._ensure_connected()
 
-        if conv_id:
-            # Check if conversation exists
-            exists = await self._fetchone(
-                "SELECT id FROM conversations WHERE id = $1",
-                conv_id
-            )
-            if not exists:
-                # Create conversation
-                await self._execute(
-                    """
-                    INSERT INTO conversations (id, participants, created_at)
-                    VALUES ($1, $2, $3)
-                    """,
+        async with self._pool.acquire() as conn:
+            if conv_id:
+                # Create the conversation if missing: no existence check first
+                await conn.execute(
+                    _INSERT_CONVERSATION,
                     conv_id,
                     [message.sender, message.receiver],
                     datetime.now()
                 )
 
-        await self._execute(
-            """
-            INSERT INTO messages (id, conversation_id, sender, receiver, content, timestamp, metadata)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """,
-            message.id,
-            conv_id,
-            message.sender,
-            message.receiver,
-            message.content,
-            message.timestamp,
-            json.dumps(message.metadata)
-        )
+            await conn.execute(
+                _INSERT_MESSAGE,
+                message.id,
+                conv_id,
+                message.sender,
+                message.receiver,
+                message.content,
+                message.timestamp,
+                message.metadata
+            )
 
         print(f"[PostgresStorage] Saved message from {message.sender}")
 
+    async def save_messages(self, messages: list[Message]) -> None:
+        """
+        Save several messages in one transaction.
+
+        Missing conversations are created with one upsert batch and the
+        messages inserted with one executemany(): asyncpg pipelines each
+        batch, so the round trips no longer grow with the message count.
+        """
+        if not messages:
+            return
+        self._ensure_connected()
+
+        # A new conversation takes its participants from its first message
+        conversations: dict[str, list[str]] = {}
+        for message in messages:
+            conv_id = message.metadata.get("conversation_id")
+            if conv_id and conv_id not in conversations:
+                conversations[conv_id] = [message.sender, message.receiver]
+
+        now = datetime.now()
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                if conversations:
+                    await conn.executemany(
+                        _INSERT_CONVERSATION,
+                        [(conv_id, participants, now)
+                         for conv_id, participants in conversations.items()]
+                    )
+                await conn.executemany(_INSERT_MESSAGE, [
+                    (
+                        message.id,
+                        message.metadata.get("conversation_id"),
+                        message.sender,
+                        message.receiver,
+                        message.content,
+                        message.timestamp,
+                        message.metadata
+                    )
+                    for message in messages
+                ])
+
+        print(f"[PostgresStorage] Saved {len(messages)} messages")
+
     async def get_messages(self, conversation_id: str) -> list[Message]:
         """Get messages for a conversation."""
         rows = await self._fetchall(
@@ -181,14 +250,15 @@ class PostgresStorage(StorageBase):
             conversation_id
         )
 
+        # Rows are already typed by asyncpg: no need to validate them again
         return [
-            Message(
+            Message.model_construct(
                 id=row["id"],
                 sender=row["sender"],
                 receiver=row["receiver"],
                 content=row["content"],
                 timestamp=row["timestamp"],
-                metadata=json.loads(row["metadata"]) if row["metadata"] else {}
+                metadata=row["metadata"] or {}
             )
             for row in rows
         ]
@@ -203,9 +273,7 @@ class PostgresStorage(StorageBase):
         if row is None:
             return {}
 
-        state = row["state"]
-        # asyncpg returns dict directly for JSONB
-        return state if isinstance(state, dict) else json.loads(state)
+        return row["state"]
 
     async def save_agent_state(self, agent_id: str, state: dict[str, Any]) -> None:
         """Save agent state (merge with existing)."""
@@ -220,7 +288,7 @@ class PostgresStorage(StorageBase):
             DO UPDATE SET state = $2, updated_at = $3
             """,
             agent_id,
-            json.dumps(current),
+            current,
             datetime.now()
         )
 
@@ -229,6 +297,27 @@ class PostgresStorage(StorageBase):
 
         print(f"[PostgresStorage] Updated state for {agent_id}")
 
+    async def list_conversations(self) -> list[dict[str, Any]]:
+        """Summaries of all conversations, read from the database (not the cache)."""
+        rows = await self._fetchall(
+            """
+            SELECT c.id, c.participants, c.created_at, COUNT(m.id) AS message_count
+            FROM conversations c
+            LEFT JOIN messages m ON m.conversation_id = c.id
+            GROUP BY c.id
+            ORDER BY c.created_at ASC
+            """
+        )
+        return [
+            conversation_summary(
+                row["id"],
+                list(row["participants"]),
+                row["message_count"],
+                row["created_at"]
+            )
+            for row in rows
+        ]
+
     def get_all_conversations(self) -> dict[str, ConversationLog]:
         """
         Get all conversations (sync, uses cache).
@@ -265,9 +354,6 @@ class PostgresStorage(StorageBase):
             "SELECT agent_id, state FROM agent_states"
         )
         self._states_cache = {
-            row["agent_id"]: (
-                row["state"] if isinstance(row["state"], dict)
-                else json.loads(row["state"])
-            )
+            row["agent_id"]: row["state"]
             for row in rows
         }
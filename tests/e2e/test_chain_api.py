@@ -9,6 +9,7 @@ from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 
 from protocol.api import app
+from protocol.sse import SSEBus, TTLStore
 
 
 client = TestClient(app)
@@ -30,6 +31,21 @@ class TestChainApiEndpoints:
         assert "editor" in step_names
         assert "publisher" in step_names
 
+    def test_list_chain_agents_builds_agents_once(self):
+        """Repeated listings should not instantiate the agents again."""
+        from protocol import chain_router
+
+        chain_router._agent_info_cache.cache_clear()
+        with patch.object(
+            chain_router, "_create_pipeline_agents",
+            wraps=chain_router._create_pipeline_agents
+        ) as create_agents:
+            first = client.get("/api/chain/agents").json()
+            second = client.get("/api/chain/agents").json()
+
+        assert first == second
+        assert create_agents.call_count == 1
+
     def test_run_pipeline_returns_pipeline_id(self):
         """POST /api/chain/run should return pipeline_id."""
         response = client.post(
@@ -123,3 +139,204 @@ class TestChainSseEndpoint:
             content = response.read().decode()
             assert "error" in content
             assert "Pipeline not found" in content
+
+
+class TestChainSseFrames:
+    """Tests for the pre-built SSE frames."""
+
+    def test_ping_template_matches_sse_event(self):
+        """The keepalive template should produce the same frame as SSEEvent."""
+        from protocol.chain_router import _PING_TEMPLATE, _now_iso
+        from protocol.sse import SSEEvent
+
+        timestamp = _now_iso()
+
+        assert _PING_TEMPLATE % timestamp.encode("ascii") == SSEEvent(
+            event="ping", data={"timestamp": timestamp}
+        ).format()
+
+    def test_now_iso_is_reused_within_a_second(self, monkeypatch):
+        """The timestamp string should be formatted once per second."""
+        from protocol import chain_router
+
+        monkeypatch.setattr(chain_router.time, "time", lambda: 1_700_000_000.2)
+        first = chain_router._now_iso()
+        monkeypatch.setattr(chain_router.time, "time", lambda: 1_700_000_000.9)
+        assert chain_router._now_iso() is first
+
+        monkeypatch.setattr(chain_router.time, "time", lambda: 1_700_000_001.0)
+        assert chain_router._now_iso() > first
+
+
+class TestSseBus:
+    """Tests for the single-consumer pipeline event bus."""
+
+    @pytest.mark.asyncio
+    async def test_wait_returns_when_events_are_buffered(self):
+        """wait() should not block while events are buffered."""
+        bus = SSEBus()
+        bus.put_nowait(("a", {}))
+        bus.put_nowait(("b", {}))
+
+        await bus.wait()
+        assert [tag for tag, _ in bus.q] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_wait_blocks_until_event_or_wake(self):
+        """wait() should block until an event is put or the bus is woken."""
+        import asyncio
+
+        bus = SSEBus()
+        waiter = asyncio.create_task(bus.wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        bus.put_nowait(("a", {}))
+        await waiter
+
+        bus.q.clear()
+        waiter = asyncio.create_task(bus.wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(bus.wake)
+        future.set_result(None)
+        await waiter
+
+    def test_full_bus_keeps_newest_events(self):
+        """When full, the oldest events are dropped."""
+        bus = SSEBus(maxlen=2)
+        for tag in ["a", "b", "c"]:
+            bus.put_nowait((tag, None))
+
+        assert [tag for tag, _ in bus.q] == ["b", "c"]
+
+    def test_event_handler_pushes_tag_and_data(self):
+        """Pipeline event dicts should be queued as (tag, data) tuples."""
+        from protocol import chain_router
+
+        chain_router._pipeline_queues["bus-test"] = SSEBus()
+        try:
+            handler = chain_router._create_event_handler("bus-test")
+            handler({"event": "step_started", "data": {"step": "writer"}, "timestamp": "t"})
+            handler({"data": {}})
+
+            assert list(chain_router._pipeline_queues["bus-test"].q) == [
+                ("step_started", {"step": "writer"}),
+                ("update", {}),
+            ]
+        finally:
+            del chain_router._pipeline_queues["bus-test"]
+
+
+class TestPipelineCompletion:
+    """Tests for future-based pipeline completion."""
+
+    @pytest.mark.asyncio
+    async def test_event_stream_ends_with_result(self):
+        """Buffered events should be sent before the final result."""
+        import asyncio
+        from protocol import chain_router
+
+        bus = SSEBus()
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(bus.wake)
+        chain_router._pipeline_queues["future-test"] = bus
+        chain_router._pipeline_futures["future-test"] = future
+
+        from agents.chain.models import PipelineResult
+
+        result = PipelineResult(
+            pipeline_id="future-test",
+            prompt="p",
+            steps=[],
+            final_output="done",
+            total_duration_ms=1,
+            status="completed"
+        )
+
+        async def finish():
+            await asyncio.sleep(0)
+            bus.put_nowait(("step_completed", {"step": "writer"}))
+            future.set_result(result)
+
+        finisher = asyncio.create_task(finish())
+        frames = [f async for f in chain_router._event_generator("future-test")]
+        await finisher
+
+        assert frames[0].startswith(b"event: connected")
+        assert frames[1].startswith(b"event: step_completed")
+        assert frames[2] == (
+            b"event: result\ndata: " + result.model_dump_json().encode("utf-8") + b"\n\n"
+        )
+        assert "future-test" not in chain_router._pipeline_queues
+
+    @pytest.mark.asyncio
+    async def test_failed_pipeline_status(self):
+        """A pipeline that raised should be reported as failed."""
+        import asyncio
+        from protocol import chain_router
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(chain_router._consume_exception)
+        future.set_exception(RuntimeError("boom"))
+        chain_router._pipeline_futures["failed-test"] = future
+
+        status = await chain_router.get_pipeline_status("failed-test")
+
+        assert status["status"] == "failed"
+
+
+class TestPipelineStore:
+    """Tests for the expiring per-pipeline store."""
+
+    def test_expired_entries_are_swept_on_write(self, monkeypatch):
+        """Writing should drop entries older than max_age."""
+        from protocol import chain_router
+
+        now = [1000.0]
+        monkeypatch.setattr(chain_router.time, "monotonic", lambda: now[0])
+
+        store = TTLStore(max_age=60)
+        store["old"] = "a"
+        now[0] += 30
+        store["recent"] = "b"
+        now[0] += 40
+        store["new"] = "c"
+
+        assert "old" not in store
+        assert store["recent"] == "b"
+        assert store.get("new") == "c"
+        assert len(store) == 2
+
+    def test_rewrite_refreshes_age(self, monkeypatch):
+        """Setting an existing key should restart its lifetime."""
+        from protocol import chain_router
+
+        now = [1000.0]
+        monkeypatch.setattr(chain_router.time, "monotonic", lambda: now[0])
+
+        store = TTLStore(max_age=60)
+        store["a"] = 1
+        store["b"] = 2
+        now[0] += 50
+        store["a"] = 3
+        now[0] += 20
+        store["c"] = 4
+
+        assert "b" not in store
+        assert store["a"] == 3
+
+    def test_oldest_entries_evicted_when_full(self):
+        """With max_items set, a write into a full store drops the oldest entry."""
+        store = TTLStore(max_items=2)
+        store["a"] = 1
+        store["b"] = 2
+        store["a"] = 3
+        store["c"] = 4
+
+        assert "b" not in store
+        assert store["a"] == 3
+        assert store["c"] == 4
+        assert len(store) == 2
@@ -1,10 +1,21 @@
 """E2E tests for FastAPI REST API."""
 
+import json
+
 import pytest
+from collections import deque
+from datetime import datetime
 from fastapi.testclient import TestClient
 
-from protocol.api import app
-from protocol.mcp_server import get_agents, setup_default_agents, _agents
+from auth import Role
+from storage import MemoryStorage, Message, ConversationLog, StorageBase
+from protocol import api as api_module
+from protocol.api import app, _build_ctx
+from agents import EchoAgent
+from protocol.mcp_server import (
+    get_agents, get_storage, list_agents, register_agent, setup_default_agents, _agents,
+    list_conversations as mcp_list_conversations
+)
 
 
 @pytest.fixture(autouse=True)
@@ -63,6 +74,17 @@ class TestAgentsEndpoint:
         assert "description" in data
         assert "capabilities" in data
 
+    def test_list_agents_sees_new_registrations(self, client):
+        """Agents registered after a listing should appear in the next one."""
+        assert "late-echo" not in client.get("/api/agents").json()
+        assert "late-echo" not in json.loads(list_agents())
+
+        register_agent(EchoAgent("late-echo", get_storage()))
+
+        assert "late-echo" in client.get("/api/agents").json()
+        assert client.get("/api/agents/late-echo").status_code == 200
+        assert "late-echo" in json.loads(list_agents())
+
     def test_get_nonexistent_agent(self, client):
         """Should return 404 for nonexistent agent."""
         response = client.get("/api/agents/nonexistent")
@@ -70,6 +92,22 @@ class TestAgentsEndpoint:
         assert response.status_code == 404
 
 
+class TestCallerContextDependency:
+    """Tests for the caller context built from headers."""
+
+    def test_same_headers_share_context(self):
+        """Repeated header pairs should reuse the same immutable context."""
+        ctx = _build_ctx("client-1", "guest")
+
+        assert ctx is _build_ctx("client-1", "guest")
+        assert ctx.role == Role.GUEST
+        assert ctx.metadata["source"] == "api"
+
+    def test_different_callers_get_different_contexts(self):
+        """Different callers must not share a context."""
+        assert _build_ctx("client-1", "user") is not _build_ctx("client-2", "user")
+
+
 class TestMessageEndpoint:
     """Tests for /api/agents/{id}/message endpoint."""
 
@@ -124,6 +162,33 @@ class TestMessageEndpoint:
         )
 
         assert response.status_code == 403
+        assert response.json()["detail"]["required_permission"] == "send_messages"
+
+    def test_guest_rejected_before_agent_dispatch(self, client, monkeypatch):
+        """A guest should get 403 without the agent being invoked."""
+        agent = api_module.get_agents()["echo"]
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("agent should not be called")
+
+        monkeypatch.setattr(agent, "receive_message", fail)
+        response = client.post(
+            "/api/agents/echo/message",
+            json={"message": "Guest message"},
+            headers={"X-Caller-Role": "guest"}
+        )
+
+        assert response.status_code == 403
+
+    def test_unknown_role_falls_back_to_user(self, client):
+        """An unknown role header should be treated as a normal user."""
+        response = client.post(
+            "/api/agents/echo/message",
+            json={"message": "Hello"},
+            headers={"X-Caller-Role": "superuser"}
+        )
+
+        assert response.status_code == 200
 
     def test_message_to_nonexistent_agent(self, client):
         """Should return 404 for nonexistent agent."""
@@ -176,6 +241,17 @@ class TestConversationsEndpoint:
         assert response.status_code == 200
         # May be empty or have some from setup
 
+    def test_storage_without_listing_returns_501(self, client, monkeypatch):
+        """Storages without an authoritative listing should be reported as unsupported."""
+        class NoListingStorage(MemoryStorage):
+            list_conversations = StorageBase.list_conversations
+
+        monkeypatch.setattr(api_module, "get_storage", NoListingStorage)
+
+        response = client.get("/api/conversations")
+
+        assert response.status_code == 501
+
     def test_conversation_created_on_message(self, client):
         """Sending messages should create conversations."""
         # Send some messages
@@ -189,6 +265,103 @@ class TestConversationsEndpoint:
         data = response.json()
         assert isinstance(data, list)
 
+    def test_conversations_streamed_as_json_array(self, client, monkeypatch):
+        """Conversations should arrive as a regular JSON array, across chunks."""
+        monkeypatch.setattr(api_module, "_STREAM_BATCH_SIZE", 2)
+        storage = MemoryStorage()
+        for conv_id in ["c1", "c2", "c3"]:
+            storage._conversations[conv_id] = ConversationLog(
+                conversation_id=conv_id,
+                participants=["alice", "echo"],
+                created_at=datetime(2024, 1, 1)
+            )
+        monkeypatch.setattr(api_module, "get_storage", lambda: storage)
+
+        response = client.get("/api/conversations")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [c["id"] for c in data] == ["c1", "c2", "c3"]
+        assert data[0] == {
+            "id": "c1",
+            "participants": ["alice", "echo"],
+            "message_count": 0,
+            "created_at": "2024-01-01T00:00:00"
+        }
+
+    @pytest.mark.asyncio
+    async def test_mcp_listing_matches_api(self, client):
+        """The MCP tool should report the same summaries, keyed by id."""
+        client.post("/api/agents/echo/message", json={"message": "Hello"})
+
+        api_data = client.get("/api/conversations").json()
+        mcp_data = json.loads(await mcp_list_conversations())
+
+        assert mcp_data == {
+            summary.pop("id"): summary for summary in api_data
+        }
+
+    def test_openapi_documents_streamed_arrays(self, client):
+        """Streamed endpoints should still document their array schemas."""
+        paths = client.get("/openapi.json").json()["paths"]
+
+        for path, model in [
+            ("/api/conversations", "ConversationInfo"),
+            ("/api/conversations/{conversation_id}/messages", "MessageInfo"),
+        ]:
+            schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+            assert schema["items"]["$ref"] == f"#/components/schemas/{model}"
+
+
+class TestConversationMessagesEndpoint:
+    """Tests for /api/conversations/{id}/messages."""
+
+    @pytest.mark.asyncio
+    async def test_stream_chunks_hold_batch_size_items(self, monkeypatch):
+        """Each chunk should carry _STREAM_BATCH_SIZE items, separators aside."""
+        monkeypatch.setattr(api_module, "_STREAM_BATCH_SIZE", 2)
+
+        chunks = [c async for c in api_module._stream_json_array(range(5), lambda n: n)]
+
+        assert chunks == [b"[0,1", b",2,3", b",4]"]
+
+    def test_messages_streamed_as_json_array(self, client, monkeypatch):
+        """Messages should arrive as a regular JSON array, in order."""
+        monkeypatch.setattr(api_module, "_STREAM_BATCH_SIZE", 2)
+        storage = MemoryStorage()
+        storage._conversations["stream-test"] = ConversationLog(
+            conversation_id="stream-test",
+            created_at=datetime(2024, 1, 1)
+        )
+        storage._msgs["stream-test"] = deque(
+            Message(
+                id=f"m{i}", sender="alice", receiver="echo",
+                content=text, timestamp=datetime(2024, 1, 1, 0, 0, i)
+            )
+            for i, text in enumerate(["uno", "due", "perché"])
+        )
+        monkeypatch.setattr(api_module, "get_storage", lambda: storage)
+
+        response = client.get("/api/conversations/stream-test/messages")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert [m["content"] for m in data] == ["uno", "due", "perché"]
+        assert data[0] == {
+            "id": "m0",
+            "sender": "alice",
+            "receiver": "echo",
+            "content": "uno",
+            "timestamp": "2024-01-01T00:00:00"
+        }
+
+    def test_unknown_conversation_is_empty_array(self, client):
+        """An unknown conversation should return an empty array."""
+        response = client.get("/api/conversations/missing/messages")
+
+        assert response.json() == []
+
 
 class TestFullConversationFlow:
     """E2E tests for complete conversation flows."""
@@ -234,3 +407,14 @@ class TestFullConversationFlow:
         assert "Echo" in echo_resp.json()["response"]
         assert "50" in calc_resp.json()["response"]
         assert "#1" in counter_resp.json()["response"]
+
+
+class TestResearchOrchestrator:
+    """Tests for the shared research orchestrator factory."""
+
+    def test_single_factory_for_all_surfaces(self):
+        """API, SSE and MCP should share one orchestrator factory."""
+        from protocol import mcp_server, sse
+
+        assert api_module.get_research_orchestrator is mcp_server.get_research_orchestrator
+        assert sse.get_research_orchestrator is mcp_server.get_research_orchestrator
@@ -0,0 +1,200 @@
+"""
+E2E tests for Smart Router API.
+
+Tests the event flow of the router SSE endpoint.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from protocol import router_api
+from protocol.api import app
+from protocol.sse import SSEBus, sse_frame
+
+
+client = TestClient(app)
+
+
+def _parse_frames(body: bytes) -> list[tuple[str, dict]]:
+    """Split an SSE body into (event, data) pairs."""
+    frames = []
+    for block in body.decode().strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        frames.append((lines["event"], json.loads(lines["data"])))
+    return frames
+
+
+class TestRouterRegistry:
+    """Tests for the cached registry listing."""
+
+    def test_registry_reflects_new_agents(self):
+        """The cached listing should be rebuilt after a registration."""
+        from agents.simple_agent import EchoAgent
+        from storage.memory import MemoryStorage
+
+        registry = router_api.get_registry()
+        before = client.get("/api/router/registry").json()
+
+        registry.register(EchoAgent("echo-late", MemoryStorage()))
+        try:
+            after = client.get("/api/router/registry").json()
+        finally:
+            registry.unregister("echo-late")
+
+        assert after["count"] == before["count"] + 1
+        assert "echo-late" in [agent["id"] for agent in after["agents"]]
+
+
+class TestRouterCapabilities:
+    """Tests for the cacheable capability list."""
+
+    def test_capabilities_revalidated_with_etag(self):
+        """A request carrying the current ETag should get an empty 304."""
+        first = client.get("/api/router/capabilities")
+
+        assert first.status_code == 200
+        assert first.json()["capabilities"]
+        assert "immutable" in first.headers["cache-control"]
+
+        second = client.get(
+            "/api/router/capabilities",
+            headers={"If-None-Match": first.headers["etag"]}
+        )
+
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == first.headers["etag"]
+
+    def test_stale_etag_gets_full_body(self):
+        """An unknown ETag should get the full list."""
+        response = client.get(
+            "/api/router/capabilities",
+            headers={"If-None-Match": '"stale"'}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["capabilities"]
+
+
+class TestRouterEvents:
+    """Tests for the per-task event bus."""
+
+    def test_broadcast_ignores_unknown_tasks(self):
+        """Events for tasks without a bus should not create one."""
+        router_api._broadcast_event({"event": "update", "data": {"task_id": "nobody"}})
+
+        assert "nobody" not in router_api._event_queues
+
+    def test_broadcast_queues_encoded_frames(self):
+        """Events are serialized once, when broadcast."""
+        bus = router_api._event_queues["frame-test"] = SSEBus()
+        try:
+            router_api._broadcast_event({"event": "update", "data": {"task_id": "frame-test"}})
+
+            assert list(bus.q) == [("update", b'event: update\ndata: {"task_id":"frame-test"}\n\n')]
+        finally:
+            del router_api._event_queues["frame-test"]
+
+    def test_connected_frame_escapes_task_id(self):
+        """The task id from the URL should be JSON-escaped in the connected frame."""
+        task_id = 'quo"te'
+        assert router_api._CONNECTED_TEMPLATE % json.dumps(task_id).encode() == sse_frame(
+            "connected", {"task_id": task_id}
+        )
+
+    def test_events_stream_until_result(self):
+        """Buffered events are streamed in order and the result ends the stream."""
+        router_api._event_queues["evt-test"] = SSEBus()
+        router_api._broadcast_event({"event": "analysis", "data": {"task_id": "evt-test", "step": 1}})
+        router_api._event_queues["evt-test"].put_nowait(
+            ("result", sse_frame("result", {"task_id": "evt-test"}))
+        )
+
+        response = client.get("/api/router/events/evt-test")
+
+        assert _parse_frames(response.content) == [
+            ("connected", {"task_id": "evt-test"}),
+            ("analysis", {"task_id": "evt-test", "step": 1}),
+            ("result", {"task_id": "evt-test"}),
+        ]
+        assert "evt-test" not in router_api._event_queues
+
+
+    @pytest.mark.asyncio
+    async def test_buffered_events_sent_in_one_chunk(self):
+        """Events already buffered are coalesced into a single write."""
+        bus = router_api._event_queues["chunk-test"] = SSEBus()
+        for step in range(3):
+            router_api._broadcast_event(
+                {"event": "update", "data": {"task_id": "chunk-test", "step": step}}
+            )
+        bus.put_nowait(("result", sse_frame("result", {"task_id": "chunk-test"})))
+
+        response = await router_api.get_events("chunk-test")
+        chunks = [chunk async for chunk in response.body_iterator]
+
+        assert len(chunks) == 2  # connected + everything buffered
+        assert [event for event, _ in _parse_frames(chunks[1])] == ["update"] * 3 + ["result"]
+
+
+
+class TestRouteTask:
+    """Tests for the background routing task."""
+
+    @pytest.mark.asyncio
+    async def test_routing_task_is_tracked_until_done(self, monkeypatch):
+        """The background task is referenced while running and stores its result."""
+        import asyncio
+        from agents.router import RouterResult
+        from agents.router.models import AnalysisResult
+
+        release = asyncio.Event()
+
+        class FakeRouter:
+            async def route(self, task_input):
+                await release.wait()
+                return RouterResult(
+                    task_id=task_input.task_id,
+                    original_task=task_input.task,
+                    analysis=AnalysisResult(
+                        task_id=task_input.task_id, original_task=task_input.task
+                    ),
+                    status="completed"
+                )
+
+        monkeypatch.setattr(router_api, "get_router", lambda: FakeRouter())
+
+        response = await router_api.route_task(router_api.RouteRequest(task="test"))
+        (task,) = [t for t in router_api._running if not t.done()]
+
+        release.set()
+        await task
+
+        assert task not in router_api._running
+        assert router_api._results[response.task_id].status == "completed"
+        frames = [tag for tag, _ in router_api._event_queues[response.task_id].q]
+        assert frames == ["result"]
+        del router_api._event_queues[response.task_id]
+
+    def test_routing_semaphore_follows_event_loop(self, monkeypatch):
+        """A semaphore contended on one loop should not break another loop."""
+        import asyncio
+
+        monkeypatch.setattr(router_api, "MAX_CONCURRENT_ROUTINGS", 1)
+        monkeypatch.setattr(router_api, "_routing_sem", None)
+
+        async def contend():
+            sem = router_api._routing_semaphore()
+            async with sem:
+                waiter = asyncio.create_task(sem.acquire())
+                await asyncio.sleep(0)
+            await waiter
+            sem.release()
+            return sem
+
+        first = asyncio.run(contend())
+        second = asyncio.run(contend())
+
+        assert first is not second
@@ -231,6 +231,7 @@ class TestGraphRunnerIntegration:
             assert status is not None
             assert status["status"] == "completed"
             assert "duration_ms" in status
+            assert result["duration_ms"] == status["duration_ms"]
         finally:
             nodes.set_analyzer(original_analyzer)
 
@@ -271,3 +272,85 @@ class TestGraphRunnerIntegration:
         assert isinstance(mermaid, str)
         assert "analyze" in mermaid
         assert "execute" in mermaid
+
+
+class TestGraphStructureEndpoint:
+    """Tests for the cached /api/graph/structure response."""
+
+    @pytest.mark.asyncio
+    async def test_structure_serialized_once_per_graph(self, monkeypatch):
+        """The structure should be rebuilt only when the compiled graph changes."""
+        import json
+        from agents.graph import graph as graph_module
+        from protocol import graph_api
+
+        calls = []
+        real_get_structure = graph_module.get_graph_structure
+
+        def counting_get_structure(graph):
+            calls.append(graph)
+            return real_get_structure(graph)
+
+        monkeypatch.setattr(graph_module, "get_graph_structure", counting_get_structure)
+        monkeypatch.setattr(graph_api, "_structure_cache", None)
+        runner = graph_api.get_graph_runner()
+
+        first = await graph_api.get_graph_structure()
+        second = await graph_api.get_graph_structure()
+
+        assert len(calls) == 1
+        assert first.body == second.body
+        assert "mermaid" in json.loads(first.body)
+
+        monkeypatch.setattr(runner, "graph", build_router_graph(runner.registry, runner.storage))
+        await graph_api.get_graph_structure()
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_status_serialized_without_validation(self, monkeypatch):
+        """The status endpoint should return the runner's data as JSON bytes."""
+        import json
+        from protocol import graph_api
+
+        runner = graph_api.get_graph_runner()
+        monkeypatch.setitem(runner._tasks, "status-test", {
+            "status": "completed",
+            "started_at": "2024-01-02T03:04:05",
+            "duration_ms": 12
+        })
+
+        response = await graph_api.get_task_status("status-test")
+
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == {
+            "task_id": "status-test",
+            "status": "completed",
+            "started_at": "2024-01-02T03:04:05",
+            "completed_at": None,
+            "duration_ms": 12,
+            "error": None
+        }
+
+    @pytest.mark.asyncio
+    async def test_registry_rebuilt_after_registration(self):
+        """The cached registry listing should follow registry changes."""
+        import json
+        from agents.simple_agent import EchoAgent
+        from protocol import graph_api
+
+        registry = graph_api.get_graph_runner().registry
+        before = json.loads((await graph_api.get_registry_info()).body)
+
+        registry.register(EchoAgent("echo-late", MemoryStorage()))
+        try:
+            after = json.loads((await graph_api.get_registry_info()).body)
+        finally:
+            registry.unregister("echo-late")
+
+        assert len(after["agents"]) == len(before["agents"]) + 1
+        assert after["agents"][-1] == {
+            "id": "echo-late",
+            "name": "Echo Agent (echo-late)",
+            "capabilities": ["echo"]
+        }
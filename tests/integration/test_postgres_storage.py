@@ -108,6 +108,65 @@ class TestPostgresStorageMessages:
         contents = [m.content for m in messages]
         assert contents == ["Message 0", "Message 1", "Message 2"]
 
+    async def test_save_message_creates_missing_conversation_once(self, storage):
+        """The first message creates its conversation; later ones leave it alone."""
+        for i, (sender, receiver) in enumerate([("a", "b"), ("c", "d")]):
+            await storage.save_message(Message(
+                id=f"auto-{i}",
+                sender=sender,
+                receiver=receiver,
+                content=f"Message {i}",
+                timestamp=datetime.now(),
+                metadata={"conversation_id": "autoconv"}
+            ))
+
+        row = await storage._fetchone(
+            "SELECT participants FROM conversations WHERE id = $1",
+            "autoconv"
+        )
+        assert row["participants"] == ["a", "b"]
+        assert len(await storage.get_messages("autoconv")) == 2
+
+    async def test_save_messages_batch(self, storage):
+        """A batch should create its conversation and keep every message."""
+        messages = [
+            Message(
+                id=f"batch-{i}",
+                sender="a",
+                receiver="b",
+                content=f"Message {i}",
+                timestamp=datetime(2024, 1, 1, 0, 0, i),
+                metadata={"conversation_id": "batchcnv"}
+            )
+            for i in range(5)
+        ]
+
+        await storage.save_messages(messages)
+
+        stored = await storage.get_messages("batchcnv")
+        assert [m.id for m in stored] == [f"batch-{i}" for i in range(5)]
+
+    async def test_metadata_stored_as_jsonb(self, storage):
+        """Metadata should round-trip as a JSONB object, not a JSON string."""
+        conv_id = await storage.create_conversation(["a", "b"])
+
+        await storage.save_message(Message(
+            id="msg-jsonb",
+            sender="a",
+            receiver="b",
+            content="Hello",
+            timestamp=datetime.now(),
+            metadata={"conversation_id": conv_id, "nested": {"n": 1}}
+        ))
+
+        row = await storage._fetchone(
+            "SELECT jsonb_typeof(metadata) AS kind, metadata FROM messages WHERE id = $1",
+            "msg-jsonb"
+        )
+
+        assert row["kind"] == "object"
+        assert row["metadata"]["nested"] == {"n": 1}
+
     async def test_get_messages_nonexistent(self, storage):
         """Should return empty list for nonexistent conversation."""
         messages = await storage.get_messages("nonexistent")
@@ -1,11 +1,17 @@
 """Integration tests for SSE transport."""
 
+import asyncio
+from collections import deque
+
 import pytest
 from httpx import AsyncClient, ASGITransport
 
 from protocol.api import app
 from protocol.mcp_server import setup_default_agents
-from protocol.sse import SSEEvent, broadcast_event
+from protocol import sse
+from protocol.sse import (
+    EventStreamResponse, SSEEvent, broadcast_event, sse_frame, sse_json_frame
+)
 
 
 @pytest.fixture
@@ -49,6 +55,19 @@ class TestSSEToolCall:
         assert data["success"] is True
         assert "echo" in data["result"]
 
+    @pytest.mark.asyncio
+    async def test_list_agents_follows_registry(self, client):
+        """The cached agent listing should be rebuilt after a registration."""
+        from agents import EchoAgent
+        from protocol.mcp_server import get_storage, register_agent
+
+        first = await sse._call_list_agents({})
+        assert await sse._call_list_agents({}) is first
+
+        register_agent(EchoAgent("echo-sse-late", get_storage()))
+
+        assert "echo-sse-late" in await sse._call_list_agents({})
+
     @pytest.mark.asyncio
     async def test_call_research(self, client):
         """Should perform research via SSE call."""
@@ -121,6 +140,91 @@ class TestSSEToolCall:
         assert data["success"] is True
 
 
+class TestSSEClientStream:
+    """Tests for the per-client event stream."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_frames_are_coalesced(self):
+        """Events broadcast while the client is busy arrive in one chunk."""
+        stream = sse.event_generator("stream-test")
+        try:
+            assert (await anext(stream)).startswith(b"event: connected")
+            client = sse._clients["stream-test"]
+            assert client in sse._subs
+
+            broadcast_event(SSEEvent(event="a", data={"n": 1}))
+            broadcast_event(SSEEvent(event="b", data={"n": 2}))
+
+            assert await anext(stream) == sse_frame("a", {"n": 1}) + sse_frame("b", {"n": 2})
+        finally:
+            await stream.aclose()
+
+        assert "stream-test" not in sse._clients
+        assert client not in sse._subs
+
+    @pytest.mark.asyncio
+    async def test_broadcast_wakes_clients_in_batches(self, monkeypatch):
+        """Clients past the first batch are woken on later loop iterations."""
+        monkeypatch.setattr(sse, "BROADCAST_BATCH", 2)
+        clients = {f"batch-{i}": sse.SSEClient(sse._seq) for i in range(5)}
+        monkeypatch.setattr(sse, "_subs", tuple(clients.values()))
+
+        broadcast_event(SSEEvent(event="a", data={}))
+        broadcast_event(SSEEvent(event="b", data={}))
+
+        assert [c.ev.is_set() for c in clients.values()] == [True, True, False, False, False]
+
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        expected = [sse_frame("a", {}), sse_frame("b", {})]
+        for client in clients.values():
+            assert client.ev.is_set()
+            assert client.take() == expected
+
+    def test_lagging_client_loses_oldest_frames(self, monkeypatch):
+        """A client further behind than the ring gets only the newest frames."""
+        monkeypatch.setattr(sse, "_ring", deque(maxlen=2))
+        client = sse.SSEClient(sse._seq)
+        monkeypatch.setattr(sse, "_subs", (client,))
+
+        for n in range(3):
+            broadcast_event(SSEEvent(event="n", data={"n": n}))
+
+        assert client.take() == [sse_frame("n", {"n": 1}), sse_frame("n", {"n": 2})]
+        assert client.take() == []
+
+    @pytest.mark.asyncio
+    async def test_ping_when_idle(self, monkeypatch):
+        """An idle client gets a keepalive ping."""
+        monkeypatch.setattr(sse, "KEEPALIVE_SECONDS", 0.01)
+        stream = sse.event_generator("idle-test")
+        try:
+            await anext(stream)
+            assert (await anext(stream)).startswith(b"event: ping")
+        finally:
+            await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_one_pinger_for_all_clients(self):
+        """Clients share a single keepalive task, stopped with the last one."""
+        first = sse.event_generator("ping-a")
+        second = sse.event_generator("ping-b")
+        try:
+            await anext(first)
+            pinger = sse._pinger
+            await anext(second)
+
+            assert pinger is not None
+            assert sse._pinger is pinger
+        finally:
+            await first.aclose()
+            assert sse._pinger is pinger
+            await second.aclose()
+
+        assert sse._pinger is None
+
+
 class TestSSEEvent:
     """Tests for SSE event formatting."""
 
@@ -134,9 +238,11 @@ class TestSSEEvent:
 
         formatted = event.format()
 
-        assert "id: 123" in formatted
-        assert "event: test" in formatted
-        assert 'data: {"message": "hello"}' in formatted
+        assert isinstance(formatted, bytes)
+        assert b"id: 123" in formatted
+        assert b"event: test" in formatted
+        assert b'data: {"message":"hello"}' in formatted
+        assert formatted.endswith(b"\n\n")
 
     def test_event_format_no_id(self):
         """Should format without id."""
@@ -147,5 +253,49 @@ class TestSSEEvent:
 
         formatted = event.format()
 
-        assert "id:" not in formatted
-        assert "event: test" in formatted
+        assert b"id:" not in formatted
+        assert b"event: test" in formatted
+
+    def test_event_format_serializes_datetimes(self):
+        """Non-JSON values such as datetimes should be stringified."""
+        from datetime import datetime
+
+        event = SSEEvent(
+            event="test",
+            data={"at": datetime(2024, 1, 2, 3, 4, 5)}
+        )
+
+        assert b'data: {"at":"2024-01-02 03:04:05"}' in event.format()
+
+    def test_event_is_immutable(self):
+        """Events are frozen: the encoded frame always matches the fields."""
+        import dataclasses
+
+        event = SSEEvent(event="test", data={})
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            event.event = "other"
+
+    def test_sse_frame_matches_event_format(self):
+        """sse_frame() should produce the same bytes as SSEEvent.format()."""
+        data = {"message": "ciao", "count": 3}
+
+        assert sse_frame("test", data, "7") == SSEEvent(event="test", data=data, id="7").format()
+        assert sse_frame("test", data) == b'event: test\ndata: {"message":"ciao","count":3}\n\n'
+
+    def test_sse_frame_accepts_non_dict_payloads(self):
+        """Lists and non-string keys should be encoded like the stdlib does."""
+        assert sse_frame("list", [1, 2]) == b"event: list\ndata: [1,2]\n\n"
+        assert sse_frame("keys", {1: "a"}) == b'event: keys\ndata: {"1":"a"}\n\n'
+
+    def test_sse_json_frame_wraps_serialized_payload(self):
+        """Pre-serialized JSON should be framed as-is."""
+        assert sse_json_frame("result", b'{"a":1}') == sse_frame("result", {"a": 1})
+
+    def test_event_stream_response_headers(self):
+        """SSE responses should disable caching and proxy buffering."""
+        response = EventStreamResponse(iter([b""]), headers={"X-Extra": "1"})
+        assert response.media_type == "text/event-stream"
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["x-accel-buffering"] == "no"
+        assert response.headers["x-extra"] == "1"
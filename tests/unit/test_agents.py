@@ -3,9 +3,11 @@
 import pytest
 from datetime import datetime
 
-from agents import EchoAgent, CounterAgent, CalculatorAgent
+from agents import EchoAgent, CounterAgent, CalculatorAgent, RouterAgent
+from agents import simple_agent
 from agents.base import AgentConfig, AgentResponse
 from storage import MemoryStorage
+from storage.base import Message
 from auth import user_context, guest_context, admin_context, PermissionDenied
 
 
@@ -143,6 +145,51 @@ class TestCalculatorAgent:
 
         assert "5" in response.content
 
+    @pytest.mark.asyncio
+    async def test_integer_operands_stay_integers(self, calculator_agent):
+        """Integer input should produce integer output, decimals stay floats."""
+        ctx = user_context("tester")
+        response = await calculator_agent.receive_message(
+            ctx=ctx,
+            content="7 * 6",
+            sender_id="tester"
+        )
+        assert response.content == "7 * 6 = 42"
+
+        response = await calculator_agent.receive_message(
+            ctx=ctx,
+            content="1.5 + 2",
+            sender_id="tester"
+        )
+        assert response.content == "1.5 + 2 = 3.5"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("parallel", [False, True])
+    async def test_act_keeps_action_order(self, calculator_agent, parallel):
+        """act() should return results in action order, serial or parallel."""
+        calculator_agent.parallel_actions = parallel
+        actions = [
+            {"type": "calculate", "num1": 2, "num2": 3, "operator": "+"},
+            {"type": "unknown"},
+            {"type": "calculate", "num1": 4, "num2": 5, "operator": "*"},
+        ]
+
+        results = await calculator_agent.act(actions)
+
+        assert [r["result"] for r in results] == [5, 20]
+
+    @pytest.mark.asyncio
+    async def test_division_by_zero(self, calculator_agent):
+        """Calculator should report division by zero instead of raising."""
+        ctx = user_context("tester")
+        response = await calculator_agent.receive_message(
+            ctx=ctx,
+            content="10 / 0",
+            sender_id="tester"
+        )
+
+        assert "divisione per zero" in response.content
+
     @pytest.mark.asyncio
     async def test_no_operation_found(self, calculator_agent):
         """Calculator should handle missing operations gracefully."""
@@ -156,6 +203,71 @@ class TestCalculatorAgent:
         assert "non ho trovato" in response.content.lower() or "operazione" in response.content.lower()
 
 
+class TestRouterAgentMatching:
+    """Tests for RouterAgent keyword matching."""
+
+    @pytest.fixture
+    def router(self, storage):
+        router = RouterAgent("test-router", storage)
+        for keyword in ["alpha", "beta", "gamma", "delta", "ta"]:
+            router.add_route(keyword, EchoAgent(f"echo-{keyword}", storage))
+        return router
+
+    def _message(self, content: str) -> Message:
+        return Message(
+            id="m1",
+            sender="tester",
+            receiver="test-router",
+            content=content,
+            timestamp=datetime.now()
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_automaton", [True, False])
+    async def test_first_registered_route_wins(self, router, monkeypatch, use_automaton):
+        """The earliest registered keyword should win, whatever its position in the text."""
+        if use_automaton:
+            pytest.importorskip("ahocorasick")
+        else:
+            monkeypatch.setattr(simple_agent, "ahocorasick", None)
+
+        thought = await router.think(self._message("Delta poi BETA"))
+
+        assert thought["state_updates"] == {"last_route": "beta"}
+        assert thought["actions"][0]["target_agent"].id == "echo-beta"
+
+    @pytest.mark.asyncio
+    async def test_matches_non_ascii_case_insensitively(self, storage):
+        """Keywords should match regardless of case, including non-ASCII text."""
+        router = RouterAgent("test-router", storage)
+        router.add_route("straße", EchoAgent("echo-strasse", storage))
+        router.add_route("perché", EchoAgent("echo-perche", storage))
+
+        thought = await router.think(self._message("Dimmi PERCHÉ"))
+        assert thought["state_updates"] == {"last_route": "perché"}
+
+        thought = await router.think(self._message("STRASSE chiusa"))
+        assert thought["state_updates"] == {"last_route": "strasse"}
+
+    @pytest.mark.asyncio
+    async def test_no_match(self, router):
+        """Router should list keywords when nothing matches."""
+        thought = await router.think(self._message("niente da fare"))
+
+        assert thought["actions"] == []
+        assert "Keyword disponibili" in thought["response"]
+
+    @pytest.mark.asyncio
+    async def test_route_added_after_first_match(self, router, storage):
+        """Routes added later should be visible to the next think()."""
+        await router.think(self._message("alpha"))
+        router.add_route("omega", EchoAgent("echo-omega", storage))
+
+        thought = await router.think(self._message("omega"))
+
+        assert thought["state_updates"] == {"last_route": "omega"}
+
+
 class TestAgentPermissions:
     """Tests for agent permission system."""
 
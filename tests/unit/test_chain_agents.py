@@ -95,6 +95,32 @@ class TestChainModels:
         assert result.final_output == "Edited"
         assert result.status == "completed"
 
+    def test_pipeline_result_json_includes_token_totals(self):
+        """Token totals should be serialized by both model_dump() and model_dump_json()."""
+        import json
+        from agents.chain.models import PipelineResult, StepResult, TokenUsage
+
+        result = PipelineResult(
+            pipeline_id="test-123",
+            prompt="Topic",
+            steps=[
+                StepResult(
+                    step_name="writer",
+                    step_index=0,
+                    input_text="Topic",
+                    output_text="Draft",
+                    duration_ms=100,
+                    tokens=TokenUsage(input_tokens=10, output_tokens=5)
+                )
+            ],
+            final_output="Draft",
+            total_duration_ms=100,
+            status="completed"
+        )
+
+        assert result.model_dump()["total_tokens"] == 15
+        assert json.loads(result.model_dump_json()) == result.model_dump(mode="json")
+
     def test_pipeline_result_status_validation(self):
         """PipelineResult status should be one of: pending, running, completed, failed."""
         from agents.chain.models import PipelineResult
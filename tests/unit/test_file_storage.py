@@ -19,9 +19,11 @@ def temp_dir():
 
 
 @pytest.fixture
-def storage(temp_dir):
+async def storage(temp_dir):
     """FileStorage instance with temp directory."""
-    return FileStorage(base_path=temp_dir)
+    storage = FileStorage(base_path=temp_dir)
+    yield storage
+    await storage.close()
 
 
 class TestFileStorageConversations:
@@ -51,6 +53,15 @@ class TestFileStorageConversations:
         assert conv_id in convs
         assert set(convs[conv_id].participants) == {"alice", "bob", "charlie"}
 
+    @pytest.mark.asyncio
+    async def test_create_from_async_code(self, temp_dir):
+        """The async factory should set up the directories like the constructor."""
+        storage = await FileStorage.create(temp_dir / "async")
+
+        assert isinstance(storage, FileStorage)
+        assert (temp_dir / "async" / "conversations").is_dir()
+        assert (temp_dir / "async" / "states").is_dir()
+
 
 class TestFileStorageMessages:
     """Tests for message operations."""
@@ -97,6 +108,61 @@ class TestFileStorageMessages:
         assert len(messages) == 1
         assert messages[0].content == "Persistent message"
 
+    @pytest.mark.asyncio
+    async def test_messages_appended_to_log(self, storage, temp_dir):
+        """Each message should add one line to the log, leaving the header alone."""
+        conv_id = await storage.create_conversation(["a", "b"])
+        header = temp_dir / "conversations" / f"{conv_id}.json"
+        before = header.read_bytes()
+
+        for i in range(3):
+            await storage.save_message(Message(
+                id=f"msg-{i}",
+                sender="a",
+                receiver="b",
+                content=f"Message {i}",
+                timestamp=datetime(2024, 1, 1, 0, 0, i),
+                metadata={"conversation_id": conv_id}
+            ))
+
+        log = temp_dir / "conversations" / f"{conv_id}.jsonl"
+        assert len(log.read_text(encoding="utf-8").splitlines()) == 3
+        assert header.read_bytes() == before
+
+        messages = await storage.get_messages(conv_id)
+        assert [m.id for m in messages] == ["msg-0", "msg-1", "msg-2"]
+        assert messages[2].timestamp == datetime(2024, 1, 1, 0, 0, 2)
+
+    @pytest.mark.asyncio
+    async def test_inline_messages_still_loaded(self, storage, temp_dir):
+        """Conversation files with inline messages should keep loading."""
+        import json
+
+        (temp_dir / "conversations" / "legacy.json").write_text(json.dumps({
+            "conversation_id": "legacy",
+            "participants": ["a", "b"],
+            "created_at": "2024-01-01T00:00:00",
+            "messages": [{
+                "id": "old-1",
+                "sender": "a",
+                "receiver": "b",
+                "content": "Old",
+                "timestamp": "2024-01-01T00:00:01"
+            }]
+        }), encoding="utf-8")
+
+        await storage.save_message(Message(
+            id="new-1",
+            sender="b",
+            receiver="a",
+            content="New",
+            timestamp=datetime.now(),
+            metadata={"conversation_id": "legacy"}
+        ))
+
+        messages = await storage.get_messages("legacy")
+        assert [m.id for m in messages] == ["old-1", "new-1"]
+
     @pytest.mark.asyncio
     async def test_get_messages_nonexistent(self, storage):
         """Should return empty list for nonexistent conversation."""
@@ -121,6 +187,7 @@ class TestFileStorageAgentState:
     async def test_state_persists_across_instances(self, storage, temp_dir):
         """State should persist when storage is recreated."""
         await storage.save_agent_state("persistent-agent", {"value": 42})
+        await storage.flush()
 
         # New instance
         storage2 = FileStorage(base_path=temp_dir)
@@ -139,6 +206,82 @@ class TestFileStorageAgentState:
         assert state["a"] == 1
         assert state["b"] == 2
 
+    @pytest.mark.asyncio
+    async def test_state_writes_debounced(self, storage, temp_dir, monkeypatch):
+        """A burst of updates should reach the disk as a single write."""
+        writes = []
+        write_json = storage._write_json
+        monkeypatch.setattr(storage, "_write_json", lambda path, data: (
+            writes.append(path), write_json(path, data)
+        ))
+
+        for i in range(5):
+            await storage.save_agent_state("agent-1", {"count": i, f"key-{i}": i})
+
+        assert writes == []
+        assert (await storage.get_agent_state("agent-1"))["count"] == 4
+
+        await storage.flush()
+
+        assert len(writes) == 1
+        state = FileStorage(base_path=temp_dir).get_all_states()["agent-1"]
+        assert state["count"] == 4
+        assert state["key-0"] == 0
+
+    @pytest.mark.asyncio
+    async def test_state_flushed_after_delay(self, temp_dir):
+        """Pending updates should be written once the debounce window passes."""
+        import asyncio
+
+        storage = FileStorage(base_path=temp_dir, state_flush_delay=0.01)
+        await storage.save_agent_state("agent-1", {"x": 1})
+        await asyncio.sleep(0.05)
+
+        assert FileStorage(base_path=temp_dir).get_all_states() == {"agent-1": {"x": 1}}
+
+    @pytest.mark.asyncio
+    async def test_finished_flush_task_replaced(self, temp_dir):
+        """A flush task that already ended should not block new flushes."""
+        import asyncio
+
+        storage = FileStorage(base_path=temp_dir, state_flush_delay=0.01)
+        storage._flush_task = asyncio.get_running_loop().create_future()
+        storage._flush_task.cancel()
+
+        await storage.save_agent_state("agent-1", {"x": 1})
+        await asyncio.sleep(0.05)
+
+        assert FileStorage(base_path=temp_dir).get_all_states() == {"agent-1": {"x": 1}}
+
+    @pytest.mark.asyncio
+    async def test_close_writes_pending_state(self, temp_dir):
+        """Leaving the context manager should flush pending updates."""
+        async with FileStorage(base_path=temp_dir) as storage:
+            await storage.save_agent_state("agent-1", {"x": 1})
+
+        assert FileStorage(base_path=temp_dir).get_all_states() == {"agent-1": {"x": 1}}
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_logged_and_retried(self, temp_dir, monkeypatch, caplog):
+        """A failed background flush should be logged and its updates kept."""
+        import asyncio
+
+        storage = FileStorage(base_path=temp_dir, state_flush_delay=0.01)
+
+        def fail(agent_id, updates):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(storage, "_merge_state", fail)
+        await storage.save_agent_state("agent-1", {"x": 1})
+        await asyncio.sleep(0.05)
+
+        assert "Background state flush failed" in caplog.text
+        assert await storage.get_agent_state("agent-1") == {"x": 1}
+
+        monkeypatch.undo()
+        await storage.close()
+        assert FileStorage(base_path=temp_dir).get_all_states() == {"agent-1": {"x": 1}}
+
     @pytest.mark.asyncio
     async def test_get_state_nonexistent(self, storage):
         """Should return empty dict for nonexistent agent."""
@@ -158,6 +301,25 @@ class TestFileStorageUtilities:
         convs = storage.get_all_conversations()
         assert len(convs) == 2
 
+    @pytest.mark.asyncio
+    async def test_list_conversations(self, storage):
+        """Should summarize conversations, counting logged messages."""
+        conv_id = await storage.create_conversation(["a", "b"])
+        await storage.save_message(Message(
+            id="msg-1",
+            sender="a",
+            receiver="b",
+            content="Hello",
+            timestamp=datetime.now(),
+            metadata={"conversation_id": conv_id}
+        ))
+
+        [summary] = await storage.list_conversations()
+
+        assert summary["id"] == conv_id
+        assert summary["participants"] == ["a", "b"]
+        assert summary["message_count"] == 1
+
     @pytest.mark.asyncio
     async def test_get_all_states(self, storage):
         """Should return all agent states."""
@@ -197,6 +359,36 @@ class TestFileStorageEdgeCases:
         messages = await storage.get_messages(conv_id)
         assert len(messages) == 10
 
+    @pytest.mark.asyncio
+    async def test_locks_released_after_use(self, storage):
+        """Per-file locks should not outlive the operations that use them."""
+        conv_id = await storage.create_conversation(["a", "b"])
+        await storage.save_message(Message(
+            id="msg-1",
+            sender="a",
+            receiver="b",
+            content="Hello",
+            timestamp=datetime.now(),
+            metadata={"conversation_id": conv_id}
+        ))
+        await storage.save_agent_state("agent-1", {"x": 1})
+        await storage.flush()
+
+        assert len(storage._conv_locks) == 0
+        assert len(storage._state_locks) == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_state_merges(self, storage):
+        """Concurrent merges into one agent state should not lose keys."""
+        import asyncio
+
+        await asyncio.gather(*[
+            storage.save_agent_state("agent-1", {f"key-{i}": i}) for i in range(10)
+        ])
+
+        state = await storage.get_agent_state("agent-1")
+        assert state == {f"key-{i}": i for i in range(10)}
+
     @pytest.mark.asyncio
     async def test_special_characters_in_content(self, storage):
         """Should handle special characters in message content."""
@@ -7,6 +7,7 @@ from datetime import datetime
 from agents.llm_agent import LLMAgent, ToolUsingLLMAgent
 from storage import MemoryStorage
 from storage.base import Message
+from auth.permissions import PermissionDenied, guest_context, user_context
 
 
 @pytest.fixture
@@ -178,6 +179,148 @@ class TestLLMAgent:
             assert "API Error" in result["response"]
 
 
+class TestLLMAgentPromptCaching:
+    """Tests for system prompt caching."""
+
+    def test_plain_system_message_by_default(self, storage):
+        """Without caching the system prompt should be a plain string."""
+        agent = LLMAgent("test-llm", storage, system_prompt="Prompt")
+
+        assert agent._system_message() == {"role": "system", "content": "Prompt"}
+
+    def test_cached_system_message(self, storage):
+        """With caching the system prompt should carry cache_control."""
+        agent = LLMAgent("test-llm", storage, system_prompt="Prompt", cache_system_prompt=True)
+
+        content = agent._system_message()["content"]
+        assert content == [{
+            "type": "text",
+            "text": "Prompt",
+            "cache_control": {"type": "ephemeral"}
+        }]
+
+    @pytest.mark.asyncio
+    async def test_cached_usage_reports_cache_reads(self, storage, mock_litellm_response):
+        """Cache read tokens should be tracked when caching is enabled."""
+        agent = LLMAgent("test-llm", storage, cache_system_prompt=True)
+
+        with patch("litellm.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            response = mock_litellm_response("Test", input_tokens=50, output_tokens=10)
+            response.usage.cache_read_input_tokens = 40
+            mock_acompletion.return_value = response
+
+            msg = Message(
+                id="msg-1",
+                sender="user",
+                receiver="test-llm",
+                content="Test",
+                timestamp=datetime.now()
+            )
+
+            result = await agent.think(msg)
+
+            assert result["metadata"]["usage"]["cache_read_input_tokens"] == 40
+
+
+class TestLLMAgentStream:
+    """Tests for streaming responses."""
+
+    @staticmethod
+    def _chunks(texts, input_tokens=10, output_tokens=5):
+        """Build an async iterator of LiteLLM-like stream chunks."""
+        async def _gen():
+            for text in texts:
+                chunk = Mock()
+                chunk.choices = [Mock()]
+                chunk.choices[0].delta.content = text
+                chunk.usage = None
+                yield chunk
+            final = Mock()
+            final.choices = []
+            final.usage = Mock(prompt_tokens=input_tokens, completion_tokens=output_tokens)
+            yield final
+        return _gen()
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_text_and_usage(self, storage):
+        """stream() should yield deltas and report usage at the end."""
+        agent = LLMAgent("test-llm", storage)
+        msg = Message(
+            id="msg-1",
+            sender="user",
+            receiver="test-llm",
+            content="Hi",
+            timestamp=datetime.now()
+        )
+
+        with patch("litellm.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = self._chunks(["Ciao", None, " mondo"])
+
+            usage = {}
+            tokens = [t async for t in agent.stream(msg, usage=usage)]
+
+            assert tokens == ["Ciao", " mondo"]
+            assert usage == {"input_tokens": 10, "output_tokens": 5}
+            assert mock_acompletion.call_args[1]["stream"] is True
+
+    @pytest.mark.asyncio
+    async def test_stream_handles_error(self, storage):
+        """stream() should yield an error message instead of raising."""
+        agent = LLMAgent("test-llm", storage)
+        msg = Message(
+            id="msg-1",
+            sender="user",
+            receiver="test-llm",
+            content="Hi",
+            timestamp=datetime.now()
+        )
+
+        with patch("litellm.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.side_effect = Exception("API Error")
+
+            tokens = [t async for t in agent.stream(msg)]
+
+            assert len(tokens) == 1
+            assert "API Error" in tokens[0]
+
+    @pytest.mark.asyncio
+    async def test_receive_message_stream_saves_conversation(self, storage):
+        """receive_message_stream() should persist both sides like receive_message()."""
+        agent = LLMAgent("test-llm", storage)
+        ctx = user_context("alice")
+        conv_id = await storage.create_conversation(["alice", "test-llm"])
+
+        with patch("litellm.acompletion", new_callable=AsyncMock) as mock_acompletion:
+            mock_acompletion.return_value = self._chunks(["Ciao", " mondo"])
+
+            tokens = [
+                t async for t in agent.receive_message_stream(
+                    ctx=ctx, content="Hi", sender_id="alice", conversation_id=conv_id
+                )
+            ]
+
+        assert tokens == ["Ciao", " mondo"]
+        messages = await storage.get_messages(conv_id)
+        assert [(m.sender, m.content) for m in messages] == [
+            ("alice", "Hi"), ("test-llm", "Ciao mondo")
+        ]
+        assert messages[0].metadata["caller_context"]["caller_id"] == "alice"
+        assert (await storage.get_agent_state("test-llm"))["last_tokens"] == 5
+
+    @pytest.mark.asyncio
+    async def test_receive_message_stream_checks_permission(self, storage):
+        """Callers without SEND_MESSAGES should be rejected before anything is saved."""
+        agent = LLMAgent("test-llm", storage)
+
+        with pytest.raises(PermissionDenied):
+            async for _ in agent.receive_message_stream(
+                ctx=guest_context("visitor"), content="Hi", sender_id="visitor"
+            ):
+                pass
+
+        assert storage.get_all_conversations() == {}
+
+
 class TestToolUsingLLMAgent:
     """Tests for ToolUsingLLMAgent."""
 
@@ -203,6 +346,20 @@ class TestToolUsingLLMAgent:
         assert schemas[0]["type"] == "function"
         assert schemas[0]["function"]["name"] == "calculator"
 
+    def test_tool_schemas_cached_until_new_tool(self, storage):
+        """Tool schemas should be reused until a tool is added."""
+        agent = ToolUsingLLMAgent("tool-agent", storage)
+        agent.add_tool("a", "Tool A", {"type": "object"}, lambda x: "a")
+
+        first = agent._get_tool_schemas()
+        assert agent._get_tool_schemas() is first
+
+        agent.add_tool("b", "Tool B", {"type": "object"}, lambda x: "b")
+        second = agent._get_tool_schemas()
+
+        assert second is not first
+        assert [s["function"]["name"] for s in second] == ["a", "b"]
+
     @pytest.mark.asyncio
     async def test_execute_tool_sync(self, storage):
         """Should execute sync tool handlers."""
@@ -13,6 +13,7 @@ from auth import (
     guest_context,
     agent_context,
     ROLE_PERMISSIONS,
+    CALLER_ROLES,
 )
 
 
@@ -82,6 +83,76 @@ class TestCallerContext:
         assert Permission.SEND_MESSAGES in perms
         assert Permission.MANAGE_AGENTS not in perms
 
+    def test_get_all_permissions_ignores_unknown_custom(self):
+        """Unknown custom permissions should be ignored."""
+        ctx = CallerContext(
+            caller_id="custom",
+            role=Role.GUEST,
+            custom_permissions={"send_messages", "not_a_permission"}
+        )
+
+        assert ctx.get_all_permissions() == {
+            Permission.READ_MESSAGES,
+            Permission.READ_STATE,
+            Permission.SEND_MESSAGES,
+        }
+
+    def test_admin_gets_shared_permission_set(self):
+        """Admin contexts should reuse the module-level set of all permissions."""
+        ctx = admin_context("admin")
+
+        assert ctx.get_all_permissions() is ROLE_PERMISSIONS[Role.ADMIN]
+
+    def test_permissions_are_computed_once(self):
+        """The effective permission set should be reused across calls."""
+        ctx = user_context("user")
+
+        assert ctx.get_all_permissions() is ctx.get_all_permissions()
+
+    def test_context_is_immutable(self):
+        """Role changes after construction would invalidate cached permissions."""
+        ctx = guest_context("guest")
+
+        with pytest.raises(Exception):
+            ctx.role = Role.ADMIN
+
+    def test_context_is_hashable(self):
+        """Contexts with metadata should hash, and equal contexts hash equal."""
+        ctx = CallerContext(caller_id="test", role=Role.USER, metadata={"ip": "1.2.3.4"})
+        same = CallerContext(caller_id="test", role=Role.USER, metadata={"ip": "1.2.3.4"})
+
+        assert ctx == same
+        assert hash(ctx) == hash(same)
+        assert len({ctx, same, user_context("other")}) == 2
+
+    def test_role_string_is_coerced(self):
+        """A role given as its string value should become the Role enum."""
+        ctx = CallerContext(caller_id="test", role="user")
+
+        assert ctx.role is Role.USER
+        assert ctx.has_permission(Permission.SEND_MESSAGES) is True
+
+    def test_invalid_role_rejected(self):
+        """Unknown roles should fail at construction time."""
+        with pytest.raises(ValueError):
+            CallerContext(caller_id="test", role="superuser")
+
+    def test_to_dict_is_json_friendly(self):
+        """to_dict() should only contain plain JSON types."""
+        ctx = CallerContext(
+            caller_id="custom",
+            role=Role.USER,
+            custom_permissions={"modify_state"},
+            metadata={"source": "api"}
+        )
+
+        assert ctx.to_dict() == {
+            "caller_id": "custom",
+            "role": "user",
+            "custom_permissions": ["modify_state"],
+            "metadata": {"source": "api"},
+        }
+
 
 class TestRolePermissions:
     """Tests for role-permission mapping."""
@@ -91,6 +162,11 @@ class TestRolePermissions:
         admin_perms = ROLE_PERMISSIONS[Role.ADMIN]
         assert admin_perms == set(Permission)
 
+    def test_role_permissions_are_frozen(self):
+        """Role permission sets should be immutable."""
+        for perms in ROLE_PERMISSIONS.values():
+            assert isinstance(perms, frozenset)
+
     def test_guest_role_is_limited(self):
         """Guest role should only have read permissions."""
         guest_perms = ROLE_PERMISSIONS[Role.GUEST]
@@ -99,6 +175,11 @@ class TestRolePermissions:
         assert Permission.READ_STATE in guest_perms
         assert len(guest_perms) == 2
 
+    def test_external_callers_cannot_claim_agent_role(self):
+        """Only admin, user and guest should be declarable by clients."""
+        assert set(CALLER_ROLES.values()) == {Role.ADMIN, Role.USER, Role.GUEST}
+        assert "agent" not in CALLER_ROLES
+
 
 class TestRequiresPermissionDecorator:
     """Tests for @requires_permission decorator."""
@@ -145,6 +226,56 @@ class TestRequiresPermissionDecorator:
 
         assert result == "state"
 
+    @pytest.mark.asyncio
+    async def test_works_on_methods(self):
+        """Should find context after self, positionally or by keyword."""
+
+        class Service:
+            @requires_permission(Permission.SEND_MESSAGES)
+            async def send(self, ctx: CallerContext, text: str) -> str:
+                return text
+
+        service = Service()
+
+        assert await service.send(user_context("user"), "a") == "a"
+        assert await service.send(ctx=user_context("user"), text="b") == "b"
+        with pytest.raises(PermissionDenied):
+            await service.send(guest_context("guest"), "c")
+
+    @pytest.mark.asyncio
+    async def test_works_with_caller_context_name(self):
+        """Should find an unannotated parameter named caller_context."""
+
+        @requires_permission(Permission.READ_STATE)
+        async def read_state(caller_context) -> str:
+            return "state"
+
+        assert await read_state(caller_context=guest_context("guest")) == "state"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_scanning_args(self):
+        """Signatures without a context parameter should still be supported."""
+
+        @requires_permission(Permission.READ_STATE)
+        async def passthrough(*args) -> int:
+            return len(args)
+
+        assert await passthrough("x", guest_context("guest")) == 2
+
+    @pytest.mark.asyncio
+    async def test_audit_log_at_debug(self, caplog, capsys):
+        """Allowed calls should be audited via logging, not stdout."""
+
+        @requires_permission(Permission.READ_STATE)
+        async def read_state(ctx: CallerContext) -> str:
+            return "state"
+
+        with caplog.at_level("DEBUG", logger="a2a.auth"):
+            await read_state(guest_context("guest"))
+
+        assert "guest (guest) -> read_state" in caplog.text
+        assert capsys.readouterr().out == ""
+
     @pytest.mark.asyncio
     async def test_raises_without_context(self):
         """Should raise ValueError if no context provided."""
@@ -79,6 +79,17 @@ class TestAgentRegistration:
         result = registry.unregister("nonexistent")
         assert result is None
 
+    def test_version_tracks_changes(self, registry, storage):
+        """version should change on register/unregister, not on no-ops."""
+        start = registry.version
+
+        registry.register(EchoAgent("versioned", storage))
+        registry.unregister("nonexistent")
+        assert registry.version == start + 1
+
+        registry.unregister("versioned")
+        assert registry.version == start + 2
+
 
 class TestAgentDiscovery:
     """Tests for agent discovery."""
@@ -1,5 +1,6 @@
 """Unit tests for TaskExecutor."""
 
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime
@@ -174,6 +175,44 @@ class TestTaskExecutor:
         assert len(results) == 2
         assert all(r.success for r in results)
 
+    @pytest.mark.asyncio
+    async def test_execute_all_runs_concurrently(self, executor, registry):
+        """TaskExecutor should overlap agents and keep match order."""
+        running = 0
+        peak = 0
+
+        def make_agent(agent_id: str, delay: float) -> MagicMock:
+            async def receive_message(**kwargs):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(delay)
+                running -= 1
+                return AgentResponse(content=agent_id, agent_id=agent_id, timestamp=datetime.now())
+
+            agent = MagicMock()
+            agent.id = agent_id
+            agent.name = agent_id
+            agent.receive_message = receive_message
+            return agent
+
+        registry.register(make_agent("slow", 0.05))
+        registry.register(make_agent("fast", 0.0))
+
+        matches = [
+            CapabilityMatch(capability="a", agent_ids=["slow"], matched=True),
+            CapabilityMatch(capability="b", agent_ids=["fast"], matched=True)
+        ]
+
+        results = await executor.execute_all(
+            matches=matches,
+            subtasks={"a": "first", "b": "second"},
+            task_id="test-parallel"
+        )
+
+        assert peak == 2
+        assert [r.output_text for r in results] == ["slow", "fast"]
+
 
 class TestTaskExecutorEvents:
     """Tests for TaskExecutor event emission."""
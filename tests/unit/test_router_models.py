@@ -214,3 +214,9 @@ class TestGenerateTaskId:
         """generate_task_id should return unique IDs."""
         ids = [generate_task_id() for _ in range(100)]
         assert len(set(ids)) == 100
+
+    def test_generates_hex_ids(self):
+        """generate_task_id should return lowercase hex characters."""
+        task_id = generate_task_id()
+        assert int(task_id, 16) >= 0
+        assert task_id == task_id.lower()
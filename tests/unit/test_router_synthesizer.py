@@ -0,0 +1,248 @@
+"""Unit tests for SynthesizerAgent."""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agents.router.synthesizer import SynthesizerAgent
+from agents.router.models import ExecutionResult
+from storage.memory import MemoryStorage
+
+
+@pytest.fixture
+def storage():
+    return MemoryStorage()
+
+
+@pytest.fixture
+def synthesizer(storage):
+    return SynthesizerAgent(storage=storage)
+
+
+def make_execution(agent_id: str, output: str, success: bool = True) -> ExecutionResult:
+    return ExecutionResult(
+        agent_id=agent_id,
+        agent_name=f"{agent_id} agent",
+        capability=f"{agent_id}_cap",
+        input_text="subtask",
+        output_text=output,
+        duration_ms=10,
+        success=success
+    )
+
+
+class TestSynthesizerAgent:
+    """Tests for SynthesizerAgent."""
+
+    def test_init(self, synthesizer):
+        """SynthesizerAgent should initialize with a cached system prompt."""
+        assert synthesizer.id == "synthesizer"
+        assert synthesizer.cache_system_prompt is True
+
+    def test_system_prompt_describes_input_schema(self, synthesizer):
+        """The cached system prompt should carry the static input schema."""
+        assert "<task>" in synthesizer.system_prompt
+        assert "<result agent=" in synthesizer.system_prompt
+
+    @pytest.mark.asyncio
+    async def test_synthesize_prompt_fills_slots(self, synthesizer):
+        """The message should only carry the per-call task and results."""
+        executions = [
+            make_execution("a", "out-a"),
+            make_execution("x", "failed", success=False),
+            make_execution("b", "out-b")
+        ]
+
+        with patch.object(synthesizer, 'think', new_callable=AsyncMock) as mock_think:
+            mock_think.return_value = {"response": "merged"}
+
+            await synthesizer.synthesize("task X", executions, "t-1")
+
+            prompt = mock_think.call_args[0][0].content
+            assert prompt == (
+                "<task>task X</task>\n"
+                '<result agent="a agent" capability="a_cap">\nout-a\n</result>\n'
+                '<result agent="b agent" capability="b_cap">\nout-b\n</result>\n'
+            )
+
+    def test_prompt_escapes_xml(self, synthesizer):
+        """Markup characters in the per-call data should be escaped."""
+        execution = make_execution("a", 'x < y & "z"')
+        execution.agent_name = 'say "hi"'
+
+        prompt = synthesizer._build_prompt("<b>task</b>", [execution])
+
+        assert prompt == (
+            "<task>&lt;b&gt;task&lt;/b&gt;</task>\n"
+            "<result agent='say \"hi\"' capability=\"a_cap\">\n"
+            'x &lt; y &amp; "z"\n</result>\n'
+        )
+
+    @pytest.mark.asyncio
+    async def test_synthesize_reports_tokens(self, synthesizer):
+        """Token usage should be read from the LLM metadata."""
+        executions = [make_execution("a", "out-a"), make_execution("b", "out-b")]
+
+        with patch.object(synthesizer, 'think', new_callable=AsyncMock) as mock_think:
+            mock_think.return_value = {
+                "response": "merged",
+                "metadata": {"usage": {
+                    "input_tokens": 100,
+                    "output_tokens": 20,
+                    "cache_read_input_tokens": 80
+                }}
+            }
+
+            result = await synthesizer.synthesize("task", executions, "t-1")
+
+            assert result["synthesized_output"] == "merged"
+            assert result["sources"] == ["a", "b"]
+            assert result["tokens"] == {"input": 100, "output": 20, "cache_read": 80}
+
+    @pytest.mark.asyncio
+    async def test_synthesize_many_preserves_order(self, synthesizer):
+        """synthesize_many should return one result per request, in order."""
+        async def fake_think(message):
+            return {"response": message.metadata["task_id"]}
+
+        with patch.object(synthesizer, 'think', side_effect=fake_think):
+            results = await synthesizer.synthesize_many([
+                ("task 1", [make_execution("a", "x"), make_execution("b", "y")], "t-1"),
+                ("task 2", [make_execution("c", "z"), make_execution("d", "w")], "t-2"),
+            ])
+
+        assert [r["synthesized_output"] for r in results] == ["t-1", "t-2"]
+
+    @pytest.mark.asyncio
+    async def test_single_success_skips_llm(self, synthesizer):
+        """A single successful execution should be returned verbatim."""
+        executions = [make_execution("a", "only"), make_execution("b", "", success=False)]
+
+        with patch.object(synthesizer, 'think', new_callable=AsyncMock) as mock_think:
+            result = await synthesizer.synthesize("task", executions, "t-1")
+
+            mock_think.assert_not_called()
+            assert result["synthesized_output"] == "only"
+            assert result["sources"] == ["a"]
+            assert result["tokens"]["input"] == 0
+
+    @pytest.mark.asyncio
+    async def test_no_success_skips_llm(self, synthesizer):
+        """No successful execution should not reach the LLM."""
+        executions = [make_execution("a", "", success=False)]
+
+        with patch.object(synthesizer, 'think', new_callable=AsyncMock) as mock_think:
+            result = await synthesizer.synthesize("task", executions, "t-1")
+
+            mock_think.assert_not_called()
+            assert result["synthesized_output"] == "All executions failed."
+            assert result["sources"] == []
+
+    @pytest.mark.asyncio
+    async def test_synthesize_stream_yields_deltas_then_result(self, synthesizer):
+        """synthesize_stream should forward chunks and end with the full result."""
+        executions = [make_execution("a", "out-a"), make_execution("b", "out-b")]
+
+        async def fake_stream(message, usage=None):
+            usage.update({"input_tokens": 30, "output_tokens": 4})
+            for text in ["Sin", "tesi"]:
+                yield text
+
+        with patch.object(synthesizer, 'stream', side_effect=fake_stream):
+            events = [e async for e in synthesizer.synthesize_stream("task", executions, "t-1")]
+
+        assert [e["data"]["text"] for e in events[:-1]] == ["Sin", "tesi"]
+        assert events[-1]["event"] == "synthesis_completed"
+        assert events[-1]["data"]["synthesized_output"] == "Sintesi"
+        assert events[-1]["data"]["sources"] == ["a", "b"]
+        assert events[-1]["data"]["tokens"]["input"] == 30
+
+    @pytest.mark.asyncio
+    async def test_synthesize_stream_single_success(self, synthesizer):
+        """synthesize_stream should pass a single result through without the LLM."""
+        with patch.object(synthesizer, 'stream') as mock_stream:
+            events = [
+                e async for e in synthesizer.synthesize_stream(
+                    "task", [make_execution("a", "only")], "t-1"
+                )
+            ]
+
+            mock_stream.assert_not_called()
+            assert events[0] == {"event": "synthesis_delta", "data": {"text": "only"}}
+            assert events[1]["data"]["synthesized_output"] == "only"
+
+
+class TestSynthesizeBatch:
+    """Tests for SynthesizerAgent.synthesize_batch()."""
+
+    @staticmethod
+    def _job(task_id: str):
+        return (f"task {task_id}", [make_execution("a", "x"), make_execution("b", "y")], task_id)
+
+    @pytest.mark.asyncio
+    async def test_one_request_per_batch(self, synthesizer):
+        """Jobs should be packed batch_size at a time into single LLM calls."""
+        async def fake_think(message):
+            task_ids = message.metadata["task_ids"]
+            return {
+                "response": json.dumps([f"sintesi {t}" for t in task_ids]),
+                "metadata": {"usage": {"input_tokens": 10, "output_tokens": 5}}
+            }
+
+        jobs = [self._job(f"t-{i}") for i in range(5)]
+        with patch.object(synthesizer, 'think', side_effect=fake_think) as mock_think:
+            results = await synthesizer.synthesize_batch(jobs, batch_size=2)
+
+        assert mock_think.call_count == 3
+        assert [r["synthesized_output"] for r in results] == [f"sintesi t-{i}" for i in range(5)]
+        assert results[0]["sources"] == ["a", "b"]
+        # Usage of a 2-job batch is split without losing tokens
+        assert results[0]["tokens"]["input"] + results[1]["tokens"]["input"] == 10
+        assert results[0]["tokens"]["output"] + results[1]["tokens"]["output"] == 5
+
+    @pytest.mark.asyncio
+    async def test_prompt_uses_job_delimiters(self, synthesizer):
+        """Each job should appear under its own delimiter."""
+        with patch.object(synthesizer, 'think', new_callable=AsyncMock) as mock_think:
+            mock_think.return_value = {"response": '["uno", "due"]'}
+
+            await synthesizer.synthesize_batch([self._job("t-1"), self._job("t-2")])
+
+            prompt = mock_think.call_args[0][0].content
+            assert "---JOB 0---\n<task>task t-1</task>" in prompt
+            assert "---JOB 1---\n<task>task t-2</task>" in prompt
+
+    @pytest.mark.asyncio
+    async def test_passthrough_jobs_skip_llm(self, synthesizer):
+        """Jobs with a single success should keep their slot without an LLM call."""
+        jobs = [
+            ("task 1", [make_execution("a", "only")], "t-1"),
+            self._job("t-2"),
+        ]
+        with patch.object(synthesizer, 'think', new_callable=AsyncMock) as mock_think:
+            mock_think.return_value = {"response": '["merged"]'}
+
+            results = await synthesizer.synthesize_batch(jobs)
+
+            assert mock_think.call_count == 1
+            assert [r["synthesized_output"] for r in results] == ["only", "merged"]
+
+    @pytest.mark.asyncio
+    async def test_malformed_answer_falls_back(self, synthesizer):
+        """An unparsable batch answer should fall back to one call per job."""
+        async def fake_think(message):
+            if "task_ids" in message.metadata:
+                return {"response": "non è JSON"}
+            return {"response": message.metadata["task_id"]}
+
+        with patch.object(synthesizer, 'think', side_effect=fake_think):
+            results = await synthesizer.synthesize_batch([self._job("t-1"), self._job("t-2")])
+
+        assert [r["synthesized_output"] for r in results] == ["t-1", "t-2"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_batch_size(self, synthesizer):
+        """batch_size must be positive."""
+        with pytest.raises(ValueError):
+            await synthesizer.synthesize_batch([self._job("t-1")], batch_size=0)
@@ -63,6 +63,69 @@ class TestMemoryStorage:
         messages = await storage.get_messages(conv_id)
         assert len(messages) == 5
 
+    @pytest.mark.asyncio
+    async def test_save_messages(self, storage):
+        """Should save a batch of messages in order."""
+        conv_id = await storage.create_conversation(["alice", "bob"])
+
+        await storage.save_messages([
+            Message(
+                id=f"msg-{i}",
+                sender="alice",
+                receiver="bob",
+                content=f"Message {i}",
+                timestamp=datetime.now(),
+                metadata={"conversation_id": conv_id}
+            )
+            for i in range(3)
+        ])
+
+        messages = await storage.get_messages(conv_id)
+        assert [m.id for m in messages] == ["msg-0", "msg-1", "msg-2"]
+
+    @pytest.mark.asyncio
+    async def test_messages_capped_at_max(self):
+        """Only the newest max_messages messages should be kept."""
+        storage = MemoryStorage(max_messages=3)
+        conv_id = await storage.create_conversation(["alice", "bob"])
+
+        for i in range(5):
+            await storage.save_message(Message(
+                id=f"msg-{i}",
+                sender="alice",
+                receiver="bob",
+                content=f"Message {i}",
+                timestamp=datetime.now(),
+                metadata={"conversation_id": conv_id}
+            ))
+
+        messages = await storage.get_messages(conv_id)
+        assert [m.id for m in messages] == ["msg-2", "msg-3", "msg-4"]
+        assert isinstance(messages, list)
+
+        # The model keeps its list field: it serializes without warnings
+        conv = storage.get_all_conversations()[conv_id]
+        assert isinstance(conv.messages, list)
+        assert [m["id"] for m in conv.model_dump()["messages"]] == ["msg-2", "msg-3", "msg-4"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_conversation_reused_by_participants(self, storage):
+        """Messages without a known conversation should share one per pair."""
+        for i, (sender, receiver) in enumerate([("alice", "bob"), ("bob", "alice")]):
+            await storage.save_message(Message(
+                id=f"msg-{i}",
+                sender=sender,
+                receiver=receiver,
+                content=f"Message {i}",
+                timestamp=datetime.now(),
+                metadata={"conversation_id": "default"}
+            ))
+
+        convs = storage.get_all_conversations()
+        assert len(convs) == 1
+        [conv_id] = convs
+        assert [m.id for m in await storage.get_messages(conv_id)] == ["msg-0", "msg-1"]
+
     @pytest.mark.asyncio
     async def test_agent_state_save_and_get(self, storage):
         """Should save and retrieve agent state."""
@@ -103,6 +166,25 @@ class TestMemoryStorage:
         convs = storage.get_all_conversations()
         assert len(convs) == 2
 
+    @pytest.mark.asyncio
+    async def test_list_conversations(self, storage):
+        """Should summarize conversations without copying messages."""
+        conv_id = await storage.create_conversation(["a", "b"])
+        await storage.save_message(Message(
+            id="msg-1",
+            sender="a",
+            receiver="b",
+            content="Hello",
+            timestamp=datetime.now(),
+            metadata={"conversation_id": conv_id}
+        ))
+
+        [summary] = await storage.list_conversations()
+
+        assert summary["id"] == conv_id
+        assert summary["participants"] == ["a", "b"]
+        assert summary["message_count"] == 1
+
     @pytest.mark.asyncio
     async def test_get_all_states(self, storage):
         """Should return all agent states."""
@@ -113,3 +195,30 @@ class TestMemoryStorage:
         assert len(states) == 2
         assert "agent-1" in states
         assert "agent-2" in states
+
+
+class TestStorageModels:
+    """Tests for storage models."""
+
+    def test_message_timestamp_iso_is_cached(self):
+        """The ISO timestamp should be formatted once and excluded from dumps."""
+        msg = Message(
+            id="m1",
+            sender="a",
+            receiver="b",
+            content="hi",
+            timestamp=datetime(2024, 5, 6, 7, 8, 9)
+        )
+
+        assert msg.timestamp_iso == "2024-05-06T07:08:09"
+        assert msg.timestamp_iso is msg.timestamp_iso
+        assert "timestamp_iso" not in msg.model_dump()
+
+    def test_conversation_created_at_iso(self):
+        """The conversation creation date should be available in ISO format."""
+        conv = ConversationLog(
+            conversation_id="c1",
+            created_at=datetime(2024, 5, 6, 7, 8, 9)
+        )
+
+        assert conv.created_at_iso == "2024-05-06T07:08:09"